@@ -0,0 +1,89 @@
+import itertools
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+
+# --- Admission Control ---
+# Membatasi jumlah permintaan klasifikasi yang berjalan bersamaan di satu proses (decode +
+# inferensi). Permintaan lain menunggu di antrean FIFO terbatas; jika antrean penuh atau
+# deadline lewat, Overloaded dinaikkan segera agar UI bisa menampilkan "sibuk, coba lagi"
+# alih-alih menggantung.
+class Overloaded(RuntimeError):
+    def __init__(self, reason, message):
+        super().__init__(message)
+        # "queue_full" atau "deadline"
+        self.reason = reason
+
+
+class AdmissionController:
+    def __init__(self, max_concurrent=4, max_queue=16, timeout=15.0, window=1024):
+        if max_concurrent < 1:
+            raise ValueError("max_concurrent harus >= 1")
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.timeout = timeout
+
+        self._cond = threading.Condition()
+        self._tickets = itertools.count()
+        self._waiting = deque()
+        self._active = 0
+        self._waits = deque(maxlen=window)
+        self._counters = {"admitted": 0, "rejected_queue_full": 0, "rejected_deadline": 0, "timed_out": 0, "peak_waiting": 0}
+
+    @contextmanager
+    def admit(self, timeout=None):
+        # Menghasilkan deadline absolut (time.monotonic) untuk diteruskan ke tahap berikutnya,
+        # mis. timeout future engine; slot dilepas saat blok with selesai
+        deadline = time.monotonic() + (self.timeout if timeout is None else timeout)
+        start = time.monotonic()
+        with self._cond:
+            if self._active >= self.max_concurrent or self._waiting:
+                if len(self._waiting) >= self.max_queue:
+                    self._counters["rejected_queue_full"] += 1
+                    raise Overloaded("queue_full", f"antrean penuh ({len(self._waiting)} permintaan menunggu)")
+                ticket = next(self._tickets)
+                self._waiting.append(ticket)
+                self._counters["peak_waiting"] = max(self._counters["peak_waiting"], len(self._waiting))
+                admitted = self._cond.wait_for(
+                    lambda: self._waiting[0] == ticket and self._active < self.max_concurrent,
+                    max(0.0, deadline - time.monotonic()),
+                )
+                self._waiting.remove(ticket)
+                if not admitted:
+                    self._counters["rejected_deadline"] += 1
+                    self._cond.notify_all()
+                    raise Overloaded("deadline", f"tidak mendapat giliran dalam {deadline - start:.1f} detik")
+            self._active += 1
+            self._counters["admitted"] += 1
+            self._waits.append(time.monotonic() - start)
+            # Giliran berikutnya mungkin juga sudah bisa masuk
+            self._cond.notify_all()
+        try:
+            yield deadline
+        finally:
+            with self._cond:
+                self._active -= 1
+                self._cond.notify_all()
+
+    def timed_out(self):
+        # Dipanggil pemanggil jika deadline habis setelah masuk, mis. saat menunggu engine
+        with self._cond:
+            self._counters["timed_out"] += 1
+
+    def stats(self):
+        with self._cond:
+            stats = dict(self._counters, active=self._active, waiting=len(self._waiting))
+            waits = list(self._waits)
+        stats["max_concurrent"] = self.max_concurrent
+        stats["max_queue"] = self.max_queue
+        stats["wait_p50_ms"] = float(np.percentile(waits, 50)) * 1000 if waits else 0.0
+        stats["wait_p95_ms"] = float(np.percentile(waits, 95)) * 1000 if waits else 0.0
+        return stats
+
+
+def remaining(deadline):
+    return max(0.0, deadline - time.monotonic())
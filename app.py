@@ -1,12 +1,16 @@
 import streamlit as st
 import time
-import os
-import gdown 
+
+import cpu_tuning
+
+# Profil thread CPU harus diterapkan sebelum TensorFlow diimport dan dijalankan
+cpu_profile = cpu_tuning.load_profile()
+cpu_tuning.apply_before_import(cpu_profile)
 
 try:
     import tensorflow as tf
     tf.config.set_visible_devices([], 'GPU')  # Nonaktif GPU
-    from tensorflow.keras.models import load_model
+    cpu_tuning.apply_tf_threading(cpu_profile, tf)
 except ImportError:
     st.error("TensorFlow tidak terinstal dengan benar. Silakan instal ulang dengan perintah: pip install tensorflow-cpu")
     st.stop()
@@ -17,6 +21,25 @@ except Exception as e:
 from PIL import Image
 import numpy as np
 import io
+import base64
+import concurrent.futures
+import hashlib
+
+import config
+from inference import InferenceEngine
+from admission import AdmissionController, Overloaded, remaining
+from model_loader import ModelReloader, load_backend
+from backends import CascadeBackend
+from model_store import open_store
+from labels import class_labels
+from preprocessing import IMAGE_SIZE, ImageRejected, decode_image, open_image, to_rgb, resize_image, make_thumbnail, thumbnail_mime
+from prediction_cache import PredictionCache, model_version
+from prediction_log import PredictionLog
+from near_duplicate import NearDuplicateIndex
+from live_camera import LiveClassifier, frame_source
+from multi_item import MultiItemScorer, backend_model, draw_overlay
+from metrics import stage_metrics, start_exporter
+from remote import RemoteClient
 
 # --- Configuration Streamlit ---
 st.set_page_config(
@@ -356,6 +379,25 @@ st.markdown(
         height: 100%; 
     }
     
+    .result-thumbnail {
+        display: flex;
+        flex-direction: column;
+        align-items: center;
+        margin: 0;
+    }
+
+    .result-thumbnail img {
+        width: 100%;
+        height: auto;
+        border-radius: 12px;
+    }
+
+    .result-thumbnail figcaption {
+        margin-top: 0.5rem;
+        font-size: 0.875rem;
+        color: #64748b;
+    }
+    
     .prediction-card {
         background: linear-gradient(135deg, #ffffff 0%, #f8fafc 100%);
         border-radius: 16px;
@@ -478,26 +520,169 @@ st.markdown(
 
 # --- Load Model ---
 @st.cache_resource
-def load_ml_model():
-    model_path = 'model_sampah_vgg16.keras' 
-    gdrive_file_id = "1lWx7TBcjxxFO3MOUWKEW7oUPVepWxgqN" 
-
+def load_ml_model(backend=config.BACKEND):
     try:
-        if os.path.exists(model_path) and os.path.getsize(model_path) < 100000000:
-            st.warning(f"File '{model_path}' ditemukan tetapi ukurannya terlalu kecil ({os.path.getsize(model_path)} bytes). Mengunduh ulang...")
-            os.remove(model_path)
+        return load_backend(backend, on_warning=st.warning)
+
+    except Exception as e:
+        if backend != "keras":
+            st.error(f"**GAGAL MEMUAT BACKEND {backend}!** Detail: {e}")
+            st.error("Buat artefak TFLite terlebih dahulu dengan: python convert_tflite.py --calibration-dir <folder gambar>")
+        else:
+            st.error(f"**GAGAL MEMUAT ATAU MENGUNDUH MODEL!** Detail: {e}")
+            st.error("Pastikan ID file Google Drive benar, file publik, dan ada cukup memori/disk di lingkungan deployment.")
+        st.stop()
 
-        if not os.path.exists(model_path):
-            gdown.download(id=gdrive_file_id, output=model_path, quiet=False, fuzzy=True)
+# --- Shared Inference Engine ---
+# Dibuat sekali per proses dan dipakai bersama oleh semua sesi
+@st.cache_resource
+def load_inference_engine(_backend):
+    # Engine menerima buffer uint8; rescale ke 0..1 dilakukan di dalam graph
+    return InferenceEngine(
+        _backend.predict_uint8,
+        max_batch_size=config.BATCH_MAX_SIZE,
+        max_wait_ms=config.BATCH_WINDOW_MS,
+    )
 
-        # Muat model
-        model = load_model(model_path)
-        return model
+# --- Admission Control ---
+# Batas klasifikasi bersamaan untuk semua sesi di proses ini; None jika dinonaktifkan
+@st.cache_resource
+def load_admission_controller():
+    if not config.ADMISSION_MAX_CONCURRENT:
+        return None
+    return AdmissionController(
+        max_concurrent=config.ADMISSION_MAX_CONCURRENT,
+        max_queue=config.ADMISSION_MAX_QUEUE,
+        timeout=config.ADMISSION_TIMEOUT,
+    )
 
+# --- Remote Inference ---
+# ECOSORT_INFERENCE_URL: klasifikasi dilakukan oleh server.py, model tidak dimuat di sini
+@st.cache_resource
+def load_remote_client(url):
+    client = RemoteClient(url, timeout=config.INFERENCE_TIMEOUT)
+    try:
+        client.model_version = client.ready_info()["model_version"]
     except Exception as e:
-        st.error(f"**GAGAL MEMUAT ATAU MENGUNDUH MODEL!** Detail: {e}")
-        st.error("Pastikan ID file Google Drive benar, file publik, dan ada cukup memori/disk di lingkungan deployment.")
+        st.error(f"**SERVER INFERENSI TIDAK SIAP!** Detail: {e}")
+        st.error(f"Pastikan server.py berjalan dan dapat diakses di {url}.")
         st.stop()
+    return client
+
+# --- Prediction Cache ---
+# Rerun Streamlit dengan gambar yang sama langsung memakai hasil sebelumnya
+@st.cache_resource
+def load_prediction_cache(version):
+    return PredictionCache(
+        version,
+        max_entries=config.PREDICTION_CACHE_SIZE,
+        ttl_seconds=config.PREDICTION_CACHE_TTL,
+        disk_dir=config.PREDICTION_CACHE_DIR or None,
+    )
+
+# --- Near-duplicate Index ---
+# Foto ulang kamera yang hampir sama (jarak pHash kecil) memakai prediksi sebelumnya.
+# Tidak berlaku untuk upload: dua barang berbeda dengan latar yang sama bisa berjarak kecil.
+# Satu index per proses; dikosongkan on_swap saat model diganti.
+# Matikan dengan ECOSORT_NEAR_DUP=0 jika setiap gambar harus diklasifikasi persis.
+@st.cache_resource
+def load_near_duplicate_index():
+    if not config.NEAR_DUP:
+        return None
+    return NearDuplicateIndex(
+        max_distance=config.NEAR_DUP_DISTANCE,
+        max_entries=config.NEAR_DUP_SIZE,
+        hash_name=config.NEAR_DUP_HASH,
+    )
+
+# --- Multi-item ---
+# Satu scorer per proses; None jika dinonaktifkan atau klasifikasi dilakukan server remote.
+# Backend Keras memakai model konvolusional penuh, backend lain mengklasifikasi per jendela
+# lewat engine. Model konvolusional penuh baru dibangun saat toggle pertama kali dipakai
+@st.cache_resource
+def load_multi_item_scorer(_backend, _engine):
+    if not config.MULTI_ITEM or _backend is None:
+        return None
+    scorer = MultiItemScorer(
+        model=backend_model(_backend),
+        predict_fn=_engine.predict,
+        size=config.MULTI_ITEM_SIZE,
+        stride=config.MULTI_ITEM_STRIDE,
+        min_confidence=config.MULTI_ITEM_MIN_CONFIDENCE,
+        min_cells=config.MULTI_ITEM_MIN_CELLS,
+        batch_size=config.BATCH_MAX_SIZE,
+        resample=config.RESAMPLE_FILTER,
+    )
+    return scorer
+
+# --- Hot Reload ---
+# Aktif jika model diambil dari store dan versinya tidak di-pin
+@st.cache_resource
+def load_model_reloader(_engine, _cache, _near_duplicates, _backend, _multi_item=None):
+    store = open_store()
+    if store is None or config.MODEL_VERSION or not config.MODEL_RELOAD_INTERVAL:
+        return None
+
+    def on_swap(new_backend):
+        # Entri cache versi lama otomatis tidak terpakai lagi
+        _cache.model_version = model_version(new_backend.artifact_path)
+        if _near_duplicates is not None:
+            _near_duplicates.clear()
+        if isinstance(new_backend, CascadeBackend):
+            stage_metrics.register_gauges("cascade", new_backend.stats)
+        if hasattr(new_backend, "precision_report"):
+            stage_metrics.register_gauges("precision", lambda: new_backend.precision_report)
+        if _multi_item is not None:
+            _multi_item.load(backend_model(new_backend), _engine.predict)
+
+    return ModelReloader(
+        store,
+        _engine,
+        _backend.name,
+        _backend.version,
+        interval=config.MODEL_RELOAD_INTERVAL,
+        on_swap=on_swap,
+    )
+
+# --- Prediction Log ---
+# Log audit Parquet (opt-in lewat ECOSORT_PREDICTION_LOG_DIR), satu writer per proses
+@st.cache_resource
+def load_prediction_log():
+    if not config.PREDICTION_LOG_DIR:
+        return None
+    return PredictionLog(
+        config.PREDICTION_LOG_DIR,
+        capacity=config.PREDICTION_LOG_BUFFER,
+        flush_rows=config.PREDICTION_LOG_FLUSH_ROWS,
+        flush_interval=config.PREDICTION_LOG_FLUSH_SECONDS,
+        rotate_mb=config.PREDICTION_LOG_ROTATE_MB,
+        rotate_seconds=config.PREDICTION_LOG_ROTATE_SECONDS,
+    )
+
+# --- Metrics Exporter ---
+# Dump Prometheus ke file dan/atau endpoint /metrics, dijalankan sekali per proses
+@st.cache_resource
+def load_metrics_exporter():
+    stage_metrics.register_gauges("engine", engine.stats)
+    stage_metrics.register_gauges("prediction_cache", prediction_cache.stats)
+    if near_duplicates is not None:
+        stage_metrics.register_gauges("near_duplicates", near_duplicates.stats)
+    if isinstance(backend, CascadeBackend):
+        stage_metrics.register_gauges("cascade", backend.stats)
+    if hasattr(backend, "precision_report"):
+        stage_metrics.register_gauges("precision", lambda: backend.precision_report)
+    if admission is not None:
+        stage_metrics.register_gauges("admission", admission.stats)
+    if prediction_log is not None:
+        stage_metrics.register_gauges("prediction_log", prediction_log.stats)
+    if multi_item is not None:
+        stage_metrics.register_gauges("multi_item", multi_item.stats)
+    return start_exporter(
+        stage_metrics,
+        file_path=config.METRICS_FILE or None,
+        port=config.METRICS_PORT,
+        interval=config.METRICS_INTERVAL,
+    )
 
 # Inisialisasi session state
 if 'show_camera' not in st.session_state:
@@ -509,17 +694,26 @@ if 'camera_file_buffer' not in st.session_state:
 
 
 # Load model
-model = load_ml_model()
-
-# --- Define Class Label ---
-class_labels = {
-    0: 'Anorganik Daur Ulang',
-    1: 'Anorganik Tidak Daur Ulang',
-    2: 'B3 (Bahan Berbahaya dan Beracun)',
-    3: 'Organik'
-}
+if config.INFERENCE_URL:
+    engine = load_remote_client(config.INFERENCE_URL)
+    prediction_cache = load_prediction_cache(f"remote-{engine.model_version}")
+    # Gambar tidak di-decode di sisi app, jadi hash perseptual tidak tersedia
+    near_duplicates = None
+    backend = None
+    multi_item = None
+else:
+    backend = load_ml_model()
+    engine = load_inference_engine(backend)
+    prediction_cache = load_prediction_cache(model_version(backend.artifact_path))
+    near_duplicates = load_near_duplicate_index()
+    multi_item = load_multi_item_scorer(backend, engine)
+    load_model_reloader(engine, prediction_cache, near_duplicates, backend, multi_item)
+admission = load_admission_controller()
+prediction_log = load_prediction_log()
+load_metrics_exporter()
 
 # Color for each category
+DEFAULT_COLOR = '#6366f1'
 category_colors = {
     'Anorganik Daur Ulang': '#22c55e', # Green
     'Anorganik Tidak Daur Ulang': '#ef4444', # Red
@@ -528,23 +722,205 @@ category_colors = {
 }
 
 # --- Function Prediction ---
-def predict_image(image_file, model, class_labels):
-    try:
-        img = Image.open(image_file).convert("RGB") 
-        img = img.resize((224, 224))
-        img_array = np.array(img)
-        img_array = img_array / 255.0
+# Decode JPEG cukup besar untuk thumbnail tampilan, tidak hanya untuk input model
+DECODE_SIZE = (max(IMAGE_SIZE[0], config.THUMBNAIL_SIZE),) * 2
+
+def display_thumbnail(img, image_file, source):
+    if not config.THUMBNAIL_SIZE:
+        return None
+    with stage_metrics.timer("thumbnail", source):
+        thumbnail = make_thumbnail(img)
+    # Foto yang sudah kecil bisa membesar saat di-encode ulang; kirim file aslinya saja
+    original = image_file.getvalue()
+    return original if len(original) <= len(thumbnail) else thumbnail
+
+def predict_image(image_file, engine, class_labels, cache=None, source="upload", near_duplicates=None, admission=None, prediction_log=None):
+    # Mengembalikan (label, confidence, thumbnail); thumbnail berupa bytes WebP/JPEG atau
+    # None jika dinonaktifkan
+    image_digest = None
+    # (label, confidence, thumbnail, probabilities, outcome) untuk log prediksi
+    result = (None, None, None, None, "error")
+    with stage_metrics.collect() as stages:
+        try:
+            # Ukuran file dan dimensi header diperiksa sebelum hashing dan decode
+            with stage_metrics.timer("intake", source):
+                open_image(image_file)
+
+            # Cache hit melewati decode dan inferensi sepenuhnya; entri lama tanpa thumbnail
+            # dianggap miss
+            cache_key = cached = None
+            with stage_metrics.timer("cache_lookup", source):
+                image_digest = hashlib.sha256(image_file.getvalue())
+                if cache is not None:
+                    cache_key = cache.key_for_digest(image_digest)
+                    cached = cache.get(cache_key)
+
+            # Cache hit tidak memakai slot; decode dan inferensi dibatasi admission control
+            if cached is not None and len(cached) == 3:
+                result = (*cached, None, "cache")
+            else:
+                result = run_admitted(admission, lambda deadline: classify_image(
+                    image_file, engine, class_labels, cache, cache_key, source, near_duplicates, deadline
+                ))
+        except Overloaded as e:
+            result = (None, None, None, None, "busy")
+            st.warning(f"⏳ Server sedang sibuk ({e}). Silakan coba lagi dalam beberapa detik.")
+            st.button("🔄 Coba lagi", key=f"retry_{source}")
+        except ImageRejected as e:
+            result = (None, None, None, None, "rejected")
+            st.warning(f"Gambar ditolak: {e}. Coba foto dengan resolusi lebih kecil.")
+        except Exception as e:
+            st.error(f"Terjadi kesalahan saat memproses gambar: {e}")
+
+    predicted_label, confidence, thumbnail, probabilities, outcome = result
+    if prediction_log is not None:
+        # Hanya memasukkan tuple ke buffer; penulisan Parquet di thread writer
+        prediction_log.append(
+            image_digest.hexdigest() if image_digest is not None else None,
+            source,
+            outcome,
+            predicted_label,
+            confidence,
+            probabilities,
+            cache.model_version if cache is not None else None,
+            stages,
+        )
+    return predicted_label, confidence, thumbnail
+
+def run_admitted(admission, classify):
+    # classify(deadline); deadline None jika admission control dinonaktifkan
+    if admission is None:
+        return classify(None)
+    with admission.admit() as deadline:
+        try:
+            return classify(deadline)
+        except concurrent.futures.TimeoutError:
+            # Bukan builtin TimeoutError: sebelum Python 3.11 keduanya kelas berbeda
+            admission.timed_out()
+            raise Overloaded("deadline", f"inferensi tidak selesai dalam {admission.timeout:.0f} detik")
+
+def classify_image(image_file, engine, class_labels, cache, cache_key, source, near_duplicates, deadline=None):
+    if isinstance(engine, RemoteClient):
+        # Inferensi dilakukan oleh server.py; app hanya men-decode untuk thumbnail
+        with stage_metrics.timer("remote", source):
+            result = engine.classify(image_file.getvalue())
+        predicted_label, confidence = result["label"], result["confidence"]
+        probabilities = [result["probabilities"][label] for label in class_labels.values()]
+        thumbnail = display_thumbnail(to_rgb(decode_image(image_file, min_size=DECODE_SIZE)), image_file, source) if config.THUMBNAIL_SIZE else None
+        if cache_key is not None:
+            cache.put(cache_key, (predicted_label, confidence, thumbnail))
+        return predicted_label, confidence, thumbnail, probabilities, "remote"
+
+    with stage_metrics.timer("decode", source):
+        img = decode_image(image_file, min_size=DECODE_SIZE)
+    with stage_metrics.timer("convert", source):
+        img = to_rgb(img)
+    thumbnail = display_thumbnail(img, image_file, source)
+    with stage_metrics.timer("resize", source):
+        img = resize_image(img)
+
+    image_hash = None
+    if near_duplicates is not None and source == "camera":
+        with stage_metrics.timer("near_dup_lookup", source):
+            image_hash = near_duplicates.hash(img)
+            cached = near_duplicates.get(image_hash)
+        if cached is not None:
+            predicted_label, confidence = cached
+            if cache_key is not None:
+                cache.put(cache_key, (predicted_label, confidence, thumbnail))
+            return predicted_label, confidence, thumbnail, None, "near_duplicate"
+
+    with stage_metrics.timer("to_array", source):
+        img_array = np.asarray(img)
         img_array = np.expand_dims(img_array, axis=0)
-        
-        predictions = model.predict(img_array)
-        predicted_class_idx = np.argmax(predictions, axis=1)[0]
-        confidence = predictions[0][predicted_class_idx] * 100
-        predicted_label = class_labels.get(predicted_class_idx, "Tidak Diketahui")
-        
-        return predicted_label, confidence, img
-    except Exception as e:
-        st.error(f"Terjadi kesalahan saat memproses gambar: {e}")
-        return None, None, None
+    
+    with stage_metrics.timer("predict", source):
+        predictions = engine.predict(img_array, timeout=None if deadline is None else remaining(deadline))
+    predicted_class_idx = np.argmax(predictions, axis=1)[0]
+    confidence = predictions[0][predicted_class_idx] * 100
+    predicted_label = class_labels.get(predicted_class_idx, "Tidak Diketahui")
+
+    if cache_key is not None:
+        cache.put(cache_key, (predicted_label, float(confidence), thumbnail))
+    if image_hash is not None:
+        near_duplicates.put(image_hash, (predicted_label, float(confidence)))
+    
+    return predicted_label, confidence, thumbnail, predictions[0], "model"
+
+def predict_regions(image_file, scorer, class_labels, cache=None, source="upload", admission=None, prediction_log=None):
+    # Mode multi-item: mengembalikan (regions, overlay); overlay berupa bytes WebP/JPEG
+    image_digest = None
+    result = (None, None, "error")
+    with stage_metrics.collect() as stages:
+        try:
+            with stage_metrics.timer("intake", source):
+                open_image(image_file)
+
+            cache_key = cached = None
+            with stage_metrics.timer("cache_lookup", source):
+                image_digest = hashlib.sha256(image_file.getvalue())
+                if cache is not None:
+                    # Key terpisah dari hasil satu label; ukuran dan stride menentukan grid.
+                    # Stride dari konfigurasi: scorer.stride membangun model konvolusional
+                    # penuh, yang harus terjadi di dalam admission control
+                    region_digest = image_digest.copy()
+                    region_digest.update(f"multi-item:{scorer.size}:{scorer.requested_stride}".encode())
+                    cache_key = cache.key_for_digest(region_digest)
+                    cached = cache.get(cache_key)
+
+            if cached is not None and len(cached) == 2:
+                result = (*cached, "cache")
+            else:
+                result = run_admitted(admission, lambda deadline: score_regions(
+                    image_file, scorer, class_labels, cache, cache_key, source, deadline
+                ))
+        except Overloaded as e:
+            result = (None, None, "busy")
+            st.warning(f"⏳ Server sedang sibuk ({e}). Silakan coba lagi dalam beberapa detik.")
+            st.button("🔄 Coba lagi", key=f"retry_multi_{source}")
+        except ImageRejected as e:
+            result = (None, None, "rejected")
+            st.warning(f"Gambar ditolak: {e}. Coba foto dengan resolusi lebih kecil.")
+        except Exception as e:
+            st.error(f"Terjadi kesalahan saat memproses gambar: {e}")
+
+    regions, overlay, outcome = result
+    if prediction_log is not None:
+        # Label dan confidence dari region terbesar
+        top = regions[0] if regions else {}
+        prediction_log.append(
+            image_digest.hexdigest() if image_digest is not None else None,
+            source,
+            outcome,
+            top.get("label"),
+            top.get("confidence"),
+            None,
+            cache.model_version if cache is not None else None,
+            stages,
+        )
+    return regions, overlay
+
+def score_regions(image_file, scorer, class_labels, cache, cache_key, source, deadline=None):
+    # Decode cukup besar untuk grid, bukan hanya 224x224
+    with stage_metrics.timer("decode", source):
+        img = decode_image(image_file, min_size=(scorer.size, scorer.size))
+    with stage_metrics.timer("convert", source):
+        img = to_rgb(img)
+    with stage_metrics.timer("resize", source):
+        img = scorer.prepare(img)
+
+    with stage_metrics.timer("multi_item", source):
+        grid = scorer.probabilities(np.asarray(img), timeout=None if deadline is None else remaining(deadline))
+    regions = scorer.regions(grid, img.size)
+    for region in regions:
+        region["label"] = class_labels.get(region["label_idx"], "Tidak Diketahui")
+        region["confidence"] *= 100
+
+    with stage_metrics.timer("overlay", source):
+        overlay = make_thumbnail(draw_overlay(img, regions, category_colors, DEFAULT_COLOR), max_size=max(img.size))
+    if cache_key is not None:
+        cache.put(cache_key, (regions, overlay))
+    return regions, overlay, "multi_item"
 
 def get_tips(category, base_color):
     # Function to convert from hexadesimal to RGB
@@ -599,33 +975,99 @@ def get_tips(category, base_color):
     
     return selected_tips
 
-# Wrap the entire app content in the main-container for overall layout
-with st.container(): # Main container for overall app layout
-    st.markdown('<div class="main-container">', unsafe_allow_html=True)
-
-    # --- Header Section ---
-    st.markdown("""
-    <div class="hero-section">
-        <h1 class="hero-title">🌍 EcoSort AI</h1>
-        <p class="hero-subtitle">
-            <center>Klasifikasi Sampah Cerdas dengan Kecerdasan Buatan
-            <br>Mari bersama menciptakan lingkungan yang lebih bersih dan berkelanjutan<center>
-        </p>
+# --- Render Assets ---
+# Palet tips dan HTML hasil untuk setiap kelas dihitung sekali per proses; saat render
+# hanya confidence yang diisi ke template
+def build_render_assets(category, color):
+    tips = get_tips(category, color)
+    card = f"""
+    <div class="prediction-card" style="border-left-color: {color};">
+        <h3 class="prediction-title">📊 Hasil Klasifikasi</h3>
+        <div class="prediction-result" style="background: linear-gradient(135deg, {color}15 0%, {color}25 100%); color: {color}; border: 2px solid {color}30;">
+            {category}
+        </div>
+        <p style="color: #64748b; margin-bottom: 0.5rem;">Tingkat Kepercayaan</p>
+        <div class="confidence-bar">
+            <div class="confidence-fill" style="width: {{confidence}}%; background: linear-gradient(90deg, {color} 0%, {color}80 100%);"></div>
+        </div>
+        <p style="text-align: center; font-weight: 600; color: {color};">{{confidence:.1f}}%</p>
     </div>
-    """, unsafe_allow_html=True)
-
-    # --- Project Explanation ---
-    st.markdown("""
-    <div class="project-description glass-card">
-        <h2>Apa itu EcoSort AI?</h2>
-        <p>
-            EcoSort AI adalah sebuah aplikasi inovatif yang dirancang untuk membantu Anda mengklasifikasikan berbagai jenis sampah menggunakan teknologi kecerdasan buatan, khususnya model Deep Learning VGG16.
-            Dengan mengunggah gambar sampah atau mengambil foto langsung, EcoSort AI akan secara otomatis mengidentifikasi kategori sampah tersebut—apakah itu <b>Organik</b>, <b>Anorganik Daur Ulang</b>, <b>Anorganik Tidak Daur Ulang</b>, atau <b>Bahan Berbahaya dan Beracun (B3)</b>.
-            Tujuan utama proyek ini adalah untuk meningkatkan kesadaran akan pentingnya pemilahan sampah yang benar, mendukung praktik daur ulang, dan berkontribusi pada pengelolaan limbah yang lebih efektif demi lingkungan yang lebih hijau dan berkelanjutan.
-        </p>
+    """
+    tips_html = f"""
+    <div class="tips-section" style="background: linear-gradient(135deg, {tips['bg_color_start']} 0%, {tips['bg_color_end']} 100%); border-left-color: {tips['border_color']};">
+        <div class="tips-title" style="color: {tips['text_color']};">
+            <span style="font-size: 1.2rem;">{tips['icon']}</span>
+            {tips['title']}
+        </div>
+        <div class="tips-content" style="color: {tips['text_color']}e0;">
+            {tips['content']}
+        </div>
     </div>
-    """, unsafe_allow_html=True)
+    """
+    return {"card": card, "tips": tips_html}
+
+@st.cache_resource
+def load_render_assets():
+    return {label: build_render_assets(label, category_colors.get(label, DEFAULT_COLOR)) for label in class_labels.values()}
+
+render_assets = load_render_assets()
+
+# --- Camera Callbacks ---
+# Dijalankan sebelum rerun fragment, sehingga tidak perlu st.rerun() tambahan
+def activate_camera():
+    st.session_state.show_camera = True
+    st.session_state.camera_file_buffer = None
+
+def store_camera_capture():
+    if st.session_state.camera_input is not None:
+        st.session_state.camera_file_buffer = st.session_state.camera_input
+        st.session_state.show_camera = False
+
+# --- Multi-item Results ---
+def render_regions(regions, overlay):
+    results_col1, results_col2 = st.columns(2)
+    with results_col1:
+        st.markdown(f"""
+        <figure class="result-thumbnail">
+            <img src="data:{thumbnail_mime(overlay)};base64,{base64.b64encode(overlay).decode()}" alt="Area sampah yang terdeteksi">
+            <figcaption>Area yang Terdeteksi</figcaption>
+        </figure>
+        """, unsafe_allow_html=True)
 
+    with results_col2:
+        rows = ""
+        for number, region in enumerate(regions, 1):
+            color = category_colors.get(region["label"], DEFAULT_COLOR)
+            rows += f"""
+            <div style="display: flex; align-items: center; gap: 0.75rem; margin-bottom: 1rem;">
+                <span style="background: {color}; color: white; border-radius: 6px; padding: 0.1rem 0.6rem; font-weight: 700;">{number}</span>
+                <div style="flex: 1;">
+                    <div style="font-weight: 600; color: {color};">{region["label"]}</div>
+                    <div class="confidence-bar">
+                        <div class="confidence-fill" style="width: {region["confidence"]}%; background: linear-gradient(90deg, {color} 0%, {color}80 100%);"></div>
+                    </div>
+                    <div style="color: #64748b; font-size: 0.85rem;">{region["confidence"]:.1f}% · {region["share"]:.0%} foto</div>
+                </div>
+            </div>
+            """
+        st.markdown(f"""
+        <div class="prediction-card" style="border-left-color: {DEFAULT_COLOR};">
+            <h3 class="prediction-title">🧩 {len(regions)} Area Terdeteksi</h3>
+            {rows}
+        </div>
+        """, unsafe_allow_html=True)
+
+    # Satu kartu tips per jenis sampah
+    for label in dict.fromkeys(region["label"] for region in regions):
+        assets = render_assets.get(label) or build_render_assets(label, DEFAULT_COLOR)
+        st.markdown(assets["tips"], unsafe_allow_html=True)
+
+# --- Classifier Panel ---
+# Fragment: upload, kamera, dan hasil hanya menjalankan ulang panel ini, bukan CSS,
+# header, dan deskripsi di luar. Hasil ikut di fragment yang sama karena bergantung
+# langsung pada widget upload/kamera.
+@st.fragment
+def classifier_panel():
     # --- Upload Section ---
     st.markdown("""
     <div class="glass-card">
@@ -674,16 +1116,9 @@ with st.container(): # Main container for overall app layout
 
             if st.session_state.show_camera:
                 with camera_col_placeholder.container(): # Container internal for camera_input
-                    captured_camera_file = st.camera_input("Ambil foto sampah", key="camera_input", label_visibility="hidden")
-                    if captured_camera_file is not None:
-                        st.session_state.camera_file_buffer = captured_camera_file
-                        st.session_state.show_camera = False
-                        st.rerun()
+                    st.camera_input("Ambil foto sampah", key="camera_input", label_visibility="hidden", on_change=store_camera_capture)
             else:
-                if camera_col_placeholder.button("📷 Aktifkan Kamera", key="camera_btn", help="Klik untuk mengaktifkan kamera"):
-                    st.session_state.show_camera = True
-                    st.session_state.camera_file_buffer = None
-                    st.rerun()
+                camera_col_placeholder.button("📷 Aktifkan Kamera", key="camera_btn", help="Klik untuk mengaktifkan kamera", on_click=activate_camera)
             
             st.markdown("""
                 </div> <!-- Tutup .button-container -->
@@ -694,58 +1129,68 @@ with st.container(): # Main container for overall app layout
 
     # --- Choose Source Image ---
     image_source = None
+    image_source_type = None
     if uploaded_file is not None:
         image_source = uploaded_file
+        image_source_type = "upload"
         if st.session_state.camera_file_buffer is not None:
             st.session_state.camera_file_buffer = None
     elif st.session_state.camera_file_buffer is not None:
         image_source = st.session_state.camera_file_buffer
+        image_source_type = "camera"
         
+    # Tidak tersedia jika klasifikasi dilakukan server remote
+    multi_mode = multi_item is not None and st.toggle(
+        "🧩 Mode Multi-item (beberapa sampah dalam satu foto)",
+        key="multi_item_mode",
+        help="Foto dipindai per area dan setiap area diberi label sendiri",
+    )
+
     # --- Result Prediction ---
     if image_source is not None:
         st.markdown('<div class="glass-card">', unsafe_allow_html=True)
         
         with st.spinner("Menganalisis gambar..."):
-            time.sleep(1) # Simulate processing time
-            predicted_label, confidence, display_img = predict_image(image_source, model, class_labels)
+            with stage_metrics.timer("total", image_source_type):
+                if multi_mode:
+                    regions, overlay = predict_regions(image_source, multi_item, class_labels, prediction_cache, image_source_type, admission, prediction_log)
+                    if multi_item.fallback_reason and backend is not None and backend_model(backend) is not None:
+                        st.warning(f"Mode multi-item memakai klasifikasi per jendela (lebih lambat): {multi_item.fallback_reason}")
+                else:
+                    predicted_label, confidence, thumbnail = predict_image(image_source, engine, class_labels, prediction_cache, image_source_type, near_duplicates, admission, prediction_log)
         
-        if predicted_label:
-            color = category_colors.get(predicted_label, '#6366f1')
+        render_start = time.perf_counter()
+        if multi_mode and regions:
+            render_regions(regions, overlay)
+            st.session_state.prediction_made = True
+        elif multi_mode and overlay:
+            st.markdown("""
+            <div class="custom-alert alert-warning">
+                ⚠️ Tidak ada area yang dapat diklasifikasi dengan yakin. Coba foto lebih dekat atau matikan mode multi-item.
+            </div>
+            """, unsafe_allow_html=True)
+        elif not multi_mode and predicted_label:
+            assets = render_assets.get(predicted_label) or build_render_assets(predicted_label, DEFAULT_COLOR)
             
             results_col1, results_col2 = st.columns(2)
 
             with results_col1:
                 with st.container(): 
-                    st.image(image_source, use_container_width=True, caption='Gambar yang Diunggah/Diambil')
+                    if thumbnail:
+                        # Data URI di markdown: st.image akan meng-encode ulang WebP menjadi JPEG
+                        st.markdown(f"""
+                        <figure class="result-thumbnail">
+                            <img src="data:{thumbnail_mime(thumbnail)};base64,{base64.b64encode(thumbnail).decode()}" alt="Gambar yang Diunggah/Diambil">
+                            <figcaption>Gambar yang Diunggah/Diambil</figcaption>
+                        </figure>
+                        """, unsafe_allow_html=True)
+                    else:
+                        st.image(image_source, use_container_width=True, caption='Gambar yang Diunggah/Diambil')
             
             with results_col2:
-                st.markdown(f"""
-                <div class="prediction-card" style="border-left-color: {color};">
-                    <h3 class="prediction-title">📊 Hasil Klasifikasi</h3>
-                    <div class="prediction-result" style="background: linear-gradient(135deg, {color}15 0%, {color}25 100%); color: {color}; border: 2px solid {color}30;">
-                        {predicted_label}
-                    </div>
-                    <p style="color: #64748b; margin-bottom: 0.5rem;">Tingkat Kepercayaan</p>
-                    <div class="confidence-bar">
-                        <div class="confidence-fill" style="width: {confidence}%; background: linear-gradient(90deg, {color} 0%, {color}80 100%);"></div>
-                    </div>
-                    <p style="text-align: center; font-weight: 600; color: {color};">{confidence:.1f}%</p>
-                </div>
-                """, unsafe_allow_html=True)
-            
-            tips = get_tips(predicted_label, color)
+                st.markdown(assets["card"].format(confidence=confidence), unsafe_allow_html=True)
 
-            st.markdown(f"""
-            <div class="tips-section" style="background: linear-gradient(135deg, {tips['bg_color_start']} 0%, {tips['bg_color_end']} 100%); border-left-color: {tips['border_color']};">
-                <div class="tips-title" style="color: {tips['text_color']};">
-                    <span style="font-size: 1.2rem;">{tips['icon']}</span>
-                    {tips['title']}
-                </div>
-                <div class="tips-content" style="color: {tips['text_color']}e0;">
-                    {tips['content']}
-                </div>
-            </div>
-            """, unsafe_allow_html=True)
+            st.markdown(assets["tips"], unsafe_allow_html=True)
             
             st.session_state.prediction_made = True
         else:
@@ -756,6 +1201,7 @@ with st.container(): # Main container for overall app layout
             """, unsafe_allow_html=True)
         
         st.markdown('</div>', unsafe_allow_html=True)
+        stage_metrics.observe("render", image_source_type, time.perf_counter() - render_start)
 
     else:
         st.markdown("""
@@ -785,6 +1231,100 @@ with st.container(): # Main container for overall app layout
         </div>
         """, unsafe_allow_html=True)
 
+# --- Live Camera ---
+# Kamera kiosk (ECOSORT_LIVE_SOURCE) diklasifikasi terus-menerus oleh satu LiveClassifier
+# per proses; panel hanya membaca label terbaru secara berkala
+def remote_predict_fn(client):
+    def predict(batch):
+        rows = []
+        for img_array in batch:
+            buffer = io.BytesIO()
+            Image.fromarray(img_array).save(buffer, format="JPEG", quality=90)
+            probabilities = client.classify(buffer.getvalue())["probabilities"]
+            rows.append([probabilities[label] for label in class_labels.values()])
+        return np.array(rows, dtype=np.float32)
+    return predict
+
+def admitted_predict_fn(predict_fn, admission):
+    # Frame live ikut antre bersama upload; frame yang ditolak dihitung sebagai error
+    def predict(batch):
+        with admission.admit():
+            return predict_fn(batch)
+    return predict
+
+@st.cache_resource
+def load_live_classifier(source, _engine, _admission):
+    predict_fn = remote_predict_fn(_engine) if isinstance(_engine, RemoteClient) else _engine.predict
+    if _admission is not None:
+        predict_fn = admitted_predict_fn(predict_fn, _admission)
+    live = LiveClassifier(frame_source(source), predict_fn, config.LIVE_SMOOTHING, config.LIVE_MAX_FPS, config.LIVE_DUTY_CYCLE)
+    stage_metrics.register_gauges("live", live.stats)
+    return live
+
+@st.fragment(run_every=config.LIVE_REFRESH_MS / 1000)
+def live_view(live):
+    latest = live.latest()
+    stats = live.stats()
+    if stats["source_error"]:
+        st.error(f"Kamera live tidak dapat dibaca: {stats['source_error']}")
+    if latest is None:
+        st.caption("Menunggu frame pertama...")
+        return
+    assets = render_assets.get(latest["label"]) or build_render_assets(latest["label"], DEFAULT_COLOR)
+    live_col1, live_col2 = st.columns(2)
+    with live_col1:
+        st.image(latest["frame"], use_container_width=True, output_format="JPEG", caption="Frame terbaru")
+    with live_col2:
+        st.markdown(assets["card"].format(confidence=latest["confidence"]), unsafe_allow_html=True)
+    st.caption(
+        f"{stats['fps']:.1f} fps · frame dibuang {stats['drop_rate']:.0%} · "
+        f"frame-ke-label p50 {stats['frame_to_label_p50_ms']:.0f} ms, p95 {stats['frame_to_label_p95_ms']:.0f} ms"
+    )
+
+# Wrap the entire app content in the main-container for overall layout
+with st.container(): # Main container for overall app layout
+    st.markdown('<div class="main-container">', unsafe_allow_html=True)
+
+    # --- Header Section ---
+    st.markdown("""
+    <div class="hero-section">
+        <h1 class="hero-title">🌍 EcoSort AI</h1>
+        <p class="hero-subtitle">
+            <center>Klasifikasi Sampah Cerdas dengan Kecerdasan Buatan
+            <br>Mari bersama menciptakan lingkungan yang lebih bersih dan berkelanjutan<center>
+        </p>
+    </div>
+    """, unsafe_allow_html=True)
+
+    # --- Project Explanation ---
+    st.markdown("""
+    <div class="project-description glass-card">
+        <h2>Apa itu EcoSort AI?</h2>
+        <p>
+            EcoSort AI adalah sebuah aplikasi inovatif yang dirancang untuk membantu Anda mengklasifikasikan berbagai jenis sampah menggunakan teknologi kecerdasan buatan, khususnya model Deep Learning VGG16.
+            Dengan mengunggah gambar sampah atau mengambil foto langsung, EcoSort AI akan secara otomatis mengidentifikasi kategori sampah tersebut—apakah itu <b>Organik</b>, <b>Anorganik Daur Ulang</b>, <b>Anorganik Tidak Daur Ulang</b>, atau <b>Bahan Berbahaya dan Beracun (B3)</b>.
+            Tujuan utama proyek ini adalah untuk meningkatkan kesadaran akan pentingnya pemilahan sampah yang benar, mendukung praktik daur ulang, dan berkontribusi pada pengelolaan limbah yang lebih efektif demi lingkungan yang lebih hijau dan berkelanjutan.
+        </p>
+    </div>
+    """, unsafe_allow_html=True)
+
+    classifier_panel()
+
+    if config.LIVE_SOURCE:
+        st.markdown('<div class="glass-card">', unsafe_allow_html=True)
+        live = load_live_classifier(config.LIVE_SOURCE, engine, admission)
+        # Toggle sengaja di luar fragment: hanya rerun penuh yang menghentikan timer
+        # refresh live_view di browser
+        if st.toggle("🎥 Mode Live (kamera kiosk)", key="live_mode"):
+            try:
+                live.start()
+                live_view(live)
+            except RuntimeError as e:
+                st.warning(f"Mode live belum bisa dimulai ulang: {e}. Coba lagi beberapa detik lagi.")
+        elif live.running:
+            live.stop()
+        st.markdown('</div>', unsafe_allow_html=True)
+
     # --- Footer ---
     st.markdown("""
     <div style="text-align: center; padding: 2rem; color: rgba(255, 255, 255, 0.8);">
@@ -794,3 +1334,53 @@ with st.container(): # Main container for overall app layout
     """, unsafe_allow_html=True)
 
     st.markdown('</div>', unsafe_allow_html=True) # Close main-container div
+
+# --- Admin Panel ---
+# Opt-in (ECOSORT_ADMIN_PANEL=1): latency per tahap, batch engine, dan cache prediksi.
+# Fragment dengan tombol perbarui, karena klasifikasi di panel utama tidak lagi
+# menjalankan ulang sidebar
+@st.fragment
+def admin_panel():
+    st.button("🔄 Perbarui", key="admin_refresh")
+    st.subheader("📈 Latency per Tahap")
+    rows = [
+        {
+            "stage": row["stage"],
+            "source": row["source"],
+            "count": row["count"],
+            **{q: f"{row[q] * 1000:.1f} ms" if row[q] is not None else "-" for q in ("p50", "p95", "p99")},
+        }
+        for row in stage_metrics.snapshot()
+    ]
+    if rows:
+        st.table(rows)
+    else:
+        st.caption("Belum ada data.")
+    st.subheader("⚙️ Inference Engine")
+    st.json(engine.stats())
+    if admission is not None:
+        st.subheader("🚦 Admission Control")
+        st.json(admission.stats())
+    if prediction_log is not None:
+        st.subheader("📝 Log Prediksi")
+        st.json(prediction_log.stats())
+    st.subheader("🗄️ Cache Prediksi")
+    st.json(prediction_cache.stats())
+    if near_duplicates is not None:
+        st.subheader("🔁 Near-duplicate")
+        st.json(near_duplicates.stats())
+    # Dibaca dari gauge agar tetap mengikuti backend baru setelah hot reload
+    cascade_stats = {key[len("cascade_"):]: value for key, value in stage_metrics.gauges().items() if key.startswith("cascade_")}
+    if cascade_stats:
+        st.subheader("🪜 Cascade")
+        st.json(cascade_stats)
+    if hasattr(backend, "precision_report"):
+        st.subheader("🧮 Presisi")
+        st.json(backend.precision_report)
+    if multi_item is not None:
+        st.subheader("🧩 Multi-item")
+        st.json(multi_item.stats())
+
+if config.ADMIN_PANEL:
+    with st.sidebar:
+        admin_panel()
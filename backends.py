@@ -0,0 +1,244 @@
+import io
+import os
+import threading
+
+import numpy as np
+import tensorflow as tf
+
+from preprocessing import preprocess_image_uint8
+
+
+INPUT_SHAPE = (224, 224, 3)
+BACKENDS = ("keras", "savedmodel", "tflite-float", "tflite-dynamic", "tflite-fp16", "tflite-int8")
+
+
+# --- In-graph Preprocessing ---
+# Rescale (dan decode + resize untuk input bytes) dilakukan di dalam graph sehingga sisi
+# Python cukup mengirim buffer uint8 atau bytes JPEG/PNG apa adanya tanpa konversi float.
+def _decode_and_resize(encoded):
+    img = tf.io.decode_image(encoded, channels=3, expand_animations=False)
+    img = tf.image.resize(img, INPUT_SHAPE[:2], method="bicubic", antialias=True)
+    return tf.cast(tf.clip_by_value(tf.round(img), 0, 255), tf.uint8)
+
+
+def serving_functions(model, jit_compile=False):
+    @tf.function(
+        input_signature=[tf.TensorSpec((None, *INPUT_SHAPE), tf.float32)],
+        jit_compile=jit_compile,
+        reduce_retracing=True,
+    )
+    def serve_float(batch):
+        return model(batch, training=False)
+
+    @tf.function(
+        input_signature=[tf.TensorSpec((None, *INPUT_SHAPE), tf.uint8)],
+        jit_compile=jit_compile,
+        reduce_retracing=True,
+    )
+    def serve_uint8(batch):
+        return model(tf.cast(batch, tf.float32) / 255.0, training=False)
+
+    # Decode tidak didukung XLA, jadi fungsi bytes tidak di-JIT
+    @tf.function(input_signature=[tf.TensorSpec((None,), tf.string)])
+    def serve_bytes(encoded):
+        images = tf.map_fn(_decode_and_resize, encoded, fn_output_signature=tf.TensorSpec(INPUT_SHAPE, tf.uint8))
+        return model(tf.cast(images, tf.float32) / 255.0, training=False)
+
+    return {"float": serve_float, "uint8": serve_uint8, "bytes": serve_bytes}
+
+
+# --- Keras predict ---
+# Jalur lama: model.predict membangun data adapter dan loop setiap kali dipanggil
+def keras_predict_fn(model):
+    return lambda batch: model.predict(batch, verbose=0)
+
+
+# --- Compiled Inference ---
+# tf.function dengan input signature tetap (None, 224, 224, 3) sehingga hanya di-trace
+# sekali; opsional di-JIT dengan XLA. Warmup dilakukan saat load agar request pertama
+# tidak membayar tracing/kompilasi.
+def compiled_predict_fn(model, jit_compile=False, warmup_batch_sizes=(1, 2, 4, 8)):
+    return _CompiledFunctions(model, jit_compile, warmup_batch_sizes).predict
+
+
+class _CompiledFunctions:
+    def __init__(self, model, jit_compile, warmup_batch_sizes):
+        self._fns = serving_functions(model, jit_compile=jit_compile)
+        # XLA mengompilasi ulang per ukuran batch, jadi warmup mencakup ukuran yang umum
+        for size in warmup_batch_sizes:
+            self.predict(np.zeros((size, *INPUT_SHAPE), dtype=np.float32))
+            self.predict_uint8(np.zeros((size, *INPUT_SHAPE), dtype=np.uint8))
+        self.predict_bytes([tf.io.encode_png(tf.zeros(INPUT_SHAPE, tf.uint8)).numpy()])
+
+    def predict(self, batch):
+        return self._fns["float"](np.asarray(batch, dtype=np.float32)).numpy()
+
+    def predict_uint8(self, batch):
+        return self._fns["uint8"](np.asarray(batch, dtype=np.uint8)).numpy()
+
+    def predict_bytes(self, encoded):
+        return self._fns["bytes"](tf.constant(list(encoded), dtype=tf.string)).numpy()
+
+
+# --- Backend Interface ---
+# Semua backend menyediakan name, artifact_path, dan:
+#   predict(batch)         float (N, 224, 224, 3) bernilai 0..1
+#   predict_uint8(batch)   uint8 (N, 224, 224, 3) bernilai 0..255
+#   predict_bytes(list)    bytes JPEG/PNG mentah
+# masing-masing -> (N, num_classes). Implementasi dasar di bawah adalah fallback Python
+# untuk backend yang tidak punya preprocessing di dalam graph.
+class Backend:
+    name = None
+    artifact_path = None
+
+    def predict(self, batch):
+        raise NotImplementedError
+
+    def predict_uint8(self, batch):
+        return self.predict(np.asarray(batch, dtype=np.float32) / 255.0)
+
+    def predict_bytes(self, encoded):
+        return self.predict_uint8(np.stack([preprocess_image_uint8(io.BytesIO(data)) for data in encoded]))
+
+
+class KerasBackend(Backend):
+    def __init__(self, model, artifact_path, path="compiled", jit_compile=False, warmup_batch_sizes=(1, 2, 4, 8)):
+        self.name = "keras"
+        self.model = model
+        self.artifact_path = artifact_path
+        self._compiled = None
+        if path == "compiled":
+            self._compiled = _CompiledFunctions(model, jit_compile, warmup_batch_sizes)
+        elif path != "predict":
+            raise ValueError(f"Inference path tidak dikenal: {path!r} (pilih 'compiled' atau 'predict')")
+
+    def predict(self, batch):
+        if self._compiled is None:
+            return self.model.predict(batch, verbose=0)
+        return self._compiled.predict(batch)
+
+    def predict_uint8(self, batch):
+        if self._compiled is None:
+            return super().predict_uint8(batch)
+        return self._compiled.predict_uint8(batch)
+
+    def predict_bytes(self, encoded):
+        if self._compiled is None:
+            return super().predict_bytes(encoded)
+        return self._compiled.predict_bytes(encoded)
+
+
+class SavedModelBackend(Backend):
+    # Model hasil export_serving_model.py; preprocessing sudah menjadi bagian dari graph
+    def __init__(self, artifact_path, name="savedmodel"):
+        if not os.path.exists(artifact_path):
+            raise FileNotFoundError(f"Serving model tidak ditemukan: {artifact_path}")
+        self.name = name
+        self.artifact_path = artifact_path
+        self._loaded = tf.saved_model.load(artifact_path)
+
+    def predict(self, batch):
+        return self._loaded.serve_float(tf.constant(batch, dtype=tf.float32)).numpy()
+
+    def predict_uint8(self, batch):
+        return self._loaded.serve_uint8(tf.constant(batch, dtype=tf.uint8)).numpy()
+
+    def predict_bytes(self, encoded):
+        return self._loaded.serve_bytes(tf.constant(list(encoded), dtype=tf.string)).numpy()
+
+
+class TFLiteBackend(Backend):
+    def __init__(self, artifact_path, name="tflite", num_threads=None, use_xnnpack=True):
+        if not os.path.exists(artifact_path):
+            raise FileNotFoundError(f"Artefak TFLite tidak ditemukan: {artifact_path}")
+        self.name = name
+        self.artifact_path = artifact_path
+        options = {}
+        if not use_xnnpack:
+            # Hanya kernel bawaan, tanpa delegate XNNPACK default (lebih lambat; untuk
+            # membandingkan memori dan parity)
+            options["experimental_op_resolver_type"] = tf.lite.experimental.OpResolverType.BUILTIN_WITHOUT_DEFAULT_DELEGATES
+        self._interpreter = tf.lite.Interpreter(model_path=artifact_path, num_threads=num_threads, **options)
+        self._input = self._interpreter.get_input_details()[0]
+        self._output = self._interpreter.get_output_details()[0]
+        self._batch_size = None
+        # Interpreter tidak thread-safe
+        self._lock = threading.Lock()
+
+    def predict(self, batch):
+        batch = np.asarray(batch, dtype=np.float32)
+        with self._lock:
+            if batch.shape[0] != self._batch_size:
+                self._interpreter.resize_tensor_input(self._input["index"], batch.shape)
+                self._interpreter.allocate_tensors()
+                self._batch_size = batch.shape[0]
+            self._interpreter.set_tensor(self._input["index"], _quantize(batch, self._input))
+            self._interpreter.invoke()
+            output = self._interpreter.get_tensor(self._output["index"])
+        return _dequantize(output, self._output)
+
+
+# --- Cascade ---
+# Early exit: tahap pertama (model kecil) memutuskan sendiri jika confidence-nya
+# >= threshold; hanya gambar yang ragu diteruskan ke model utama. Nama dan artefak
+# mengikuti model utama agar hot reload dan versi cache tetap berlaku.
+class CascadeBackend(Backend):
+    def __init__(self, first, second, threshold=0.9):
+        self.name = second.name
+        self.artifact_path = second.artifact_path
+        self.first = first
+        self.second = second
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._counters = {"images": 0, "early_exit": 0}
+
+    def predict(self, batch):
+        return self._run("predict", batch)
+
+    def predict_uint8(self, batch):
+        return self._run("predict_uint8", batch)
+
+    def stats(self):
+        with self._lock:
+            images = self._counters["images"]
+            return dict(
+                self._counters,
+                early_exit_rate=self._counters["early_exit"] / images if images else 0.0,
+                threshold=self.threshold,
+            )
+
+    def _run(self, method, batch):
+        batch = np.asarray(batch)
+        probabilities = np.array(getattr(self.first, method)(batch), dtype=np.float32)
+        unsure = probabilities.max(axis=1) < self.threshold
+        if unsure.any():
+            probabilities[unsure] = getattr(self.second, method)(batch[unsure])
+        with self._lock:
+            self._counters["images"] += len(batch)
+            self._counters["early_exit"] += int(len(batch) - unsure.sum())
+        return probabilities
+
+
+def _quantize(batch, details):
+    # Model full-int8 menerima input terkuantisasi; skala diambil dari metadata tensor
+    scale, zero_point = details["quantization"]
+    if details["dtype"] == np.float32 or scale == 0:
+        return batch.astype(details["dtype"])
+    info = np.iinfo(details["dtype"])
+    return np.clip(np.round(batch / scale + zero_point), info.min, info.max).astype(details["dtype"])
+
+
+def _dequantize(output, details):
+    scale, zero_point = details["quantization"]
+    if output.dtype == np.float32 or scale == 0:
+        return output.astype(np.float32)
+    return (output.astype(np.float32) - zero_point) * scale
+
+
+def tflite_path(backend, tflite_dir, model_path):
+    # mis. tflite-int8 -> <tflite_dir>/model_sampah_vgg16_int8.tflite
+    if backend not in BACKENDS or not backend.startswith("tflite-"):
+        raise ValueError(f"Backend TFLite tidak dikenal: {backend!r}")
+    variant = backend.split("-", 1)[1]
+    stem = os.path.splitext(os.path.basename(model_path))[0]
+    return os.path.join(tflite_dir, f"{stem}_{variant}.tflite")
@@ -0,0 +1,167 @@
+import argparse
+import concurrent.futures
+import io
+import json
+import multiprocessing
+import resource
+import threading
+import time
+
+import numpy as np
+from PIL import Image
+
+import config
+from admission import AdmissionController, Overloaded, remaining
+from inference import InferenceEngine
+from labels import class_labels
+from preprocessing import decode_image, resize_image, to_rgb
+
+
+# --- Benchmark: admission control di bawah beban ---
+# python -m benchmarks.admission --sessions 30 --ramp-seconds 2 --item-ms 250
+# Model pengganti yang lambat (sleep per batch + per gambar) di belakang InferenceEngine
+# yang sama dengan app; --sessions thread berperan sebagai sesi yang mengunggah foto
+# bersamaan. Dibandingkan tanpa batas vs AdmissionController: latency jawaban berhasil,
+# waktu sampai jawaban "sibuk", kedalaman antrean, dan peak RSS.
+def slow_model(batch_ms, item_ms):
+    def predict(batch):
+        time.sleep((batch_ms + item_ms * len(batch)) / 1000.0)
+        probabilities = np.full((len(batch), len(class_labels)), 0.1, dtype=np.float32)
+        probabilities[:, 0] = 0.7
+        return probabilities
+    return predict
+
+
+def photo_payload(size=(4032, 3024)):
+    rng = np.random.default_rng(0)
+    buffer = io.BytesIO()
+    Image.fromarray(rng.integers(0, 256, size=(size[1], size[0], 3), dtype=np.uint8)).save(buffer, format="JPEG", quality=85)
+    return buffer.getvalue()
+
+
+class Gauge:
+    # Jumlah permintaan yang sedang decode/predict (bukan menunggu giliran) dan puncaknya
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0
+        self.peak = 0
+
+    def add(self, delta):
+        with self._lock:
+            self.value += delta
+            self.peak = max(self.peak, self.value)
+
+
+def classify(payload, engine, admission, working):
+    # Jalur app.classify_image tanpa cache: decode + resize + predict
+    def run(deadline=None):
+        working.add(1)
+        try:
+            img = resize_image(to_rgb(decode_image(io.BytesIO(payload))))
+            timeout = None if deadline is None else remaining(deadline)
+            return engine.predict(np.asarray(img)[np.newaxis], timeout=timeout)
+        finally:
+            working.add(-1)
+
+    if admission is None:
+        return run()
+    with admission.admit() as deadline:
+        try:
+            return run(deadline)
+        except concurrent.futures.TimeoutError:
+            admission.timed_out()
+            raise Overloaded("deadline", "inferensi melewati deadline")
+
+
+def run_mode(args, limited, queue):
+    # Dijalankan di proses spawn agar peak RSS tiap mode terpisah
+    payload = photo_payload()
+    engine = InferenceEngine(slow_model(args.batch_ms, args.item_ms), max_batch_size=args.batch_size, max_wait_ms=config.BATCH_WINDOW_MS)
+    admission = AdmissionController(args.max_concurrent, args.max_queue, args.timeout) if limited else None
+    rows = []
+    lock = threading.Lock()
+    working = Gauge()
+
+    def session(delay):
+        time.sleep(delay)
+        start = time.perf_counter()
+        try:
+            classify(payload, engine, admission, working)
+            outcome = "ok"
+        except Overloaded as e:
+            outcome = e.reason
+        with lock:
+            rows.append((outcome, time.perf_counter() - start))
+
+    rng = np.random.default_rng(1)
+    delays = np.sort(rng.uniform(0, args.ramp_seconds, size=args.sessions))
+    threads = [threading.Thread(target=session, args=(float(delay),)) for delay in delays]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    engine.close()
+
+    def percentile(values, q):
+        return float(np.percentile(values, q)) * 1000 if values else 0.0
+
+    ok = [seconds for outcome, seconds in rows if outcome == "ok"]
+    busy = [seconds for outcome, seconds in rows if outcome != "ok"]
+    result = {
+        "mode": "admission" if limited else "tanpa_batas",
+        "ok": len(ok),
+        "queue_full": sum(outcome == "queue_full" for outcome, _ in rows),
+        "deadline": sum(outcome == "deadline" for outcome, _ in rows),
+        "ok_p50_ms": percentile(ok, 50),
+        "ok_p95_ms": percentile(ok, 95),
+        "ok_max_ms": max(ok) * 1000 if ok else 0.0,
+        "busy_p95_ms": percentile(busy, 95),
+        "peak_working": working.peak,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+    if admission is not None:
+        stats = admission.stats()
+        result.update(peak_waiting=stats["peak_waiting"], wait_p95_ms=stats["wait_p95_ms"])
+    queue.put(result)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bandingkan latency dan load shedding dengan/tanpa admission control.")
+    parser.add_argument("--sessions", type=int, default=30)
+    parser.add_argument("--ramp-seconds", type=float, default=2.0, help="Sesi datang acak merata dalam rentang ini")
+    parser.add_argument("--batch-ms", type=float, default=50.0, help="Biaya tetap per forward pass model pengganti")
+    parser.add_argument("--item-ms", type=float, default=250.0, help="Biaya per gambar model pengganti")
+    parser.add_argument("--batch-size", type=int, default=config.BATCH_MAX_SIZE)
+    parser.add_argument("--max-concurrent", type=int, default=config.ADMISSION_MAX_CONCURRENT or config.BATCH_MAX_SIZE)
+    parser.add_argument("--max-queue", type=int, default=config.ADMISSION_MAX_QUEUE)
+    parser.add_argument("--timeout", type=float, default=config.ADMISSION_TIMEOUT)
+    parser.add_argument("--output", help="Simpan hasil sebagai JSON")
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context("spawn")
+    results = []
+    for limited in (False, True):
+        queue = ctx.Queue()
+        process = ctx.Process(target=run_mode, args=(args, limited, queue))
+        process.start()
+        results.append(queue.get())
+        process.join()
+
+    print(
+        f"{args.sessions} sesi dalam {args.ramp_seconds:g} s, model {args.batch_ms:g} ms + {args.item_ms:g} ms/gambar; "
+        f"admission {args.max_concurrent} bersamaan, antrean {args.max_queue}, deadline {args.timeout:g} s"
+    )
+    print(f"{'mode':<13}{'ok':>4}{'penuh':>7}{'deadline':>10}{'ok p50':>9}{'ok p95':>9}{'ok max':>9}{'sibuk p95':>11}{'diproses':>10}{'RSS MB':>8}")
+    for row in results:
+        print(
+            f"{row['mode']:<13}{row['ok']:>4}{row['queue_full']:>7}{row['deadline']:>10}{row['ok_p50_ms']:>9.0f}"
+            f"{row['ok_p95_ms']:>9.0f}{row['ok_max_ms']:>9.0f}{row['busy_p95_ms']:>11.0f}{row['peak_working']:>10}{row['peak_rss_mb']:>8.0f}"
+        )
+    print("latency dalam ms")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import argparse
+import json
+import time
+
+import numpy as np
+
+import config
+from backends import BACKENDS
+from model_loader import MODEL_PATH, load_backend
+from preprocessing import iter_labeled_images, preprocess_image
+
+
+# --- Backend Parity & Latency Report ---
+# python -m benchmarks.backend_parity --data data/uji --backends keras,tflite-fp16,tflite-int8
+# Folder data: <data>/<nama kelas atau indeks>/<gambar>. Backend keras menjadi acuan parity.
+def evaluate(backend, images):
+    probabilities, timings = [], []
+    for img_array in images:
+        start = time.perf_counter()
+        probabilities.append(backend.predict(img_array[np.newaxis])[0])
+        timings.append(time.perf_counter() - start)
+    return np.array(probabilities), np.array(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bandingkan akurasi dan latency antar backend.")
+    parser.add_argument("--data", required=True, help="Folder gambar berlabel")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--tflite-dir", default=config.TFLITE_DIR)
+    parser.add_argument("--backends", default=",".join(BACKENDS))
+    parser.add_argument("--output", help="Simpan laporan sebagai JSON")
+    args = parser.parse_args()
+
+    samples = list(iter_labeled_images(args.data))
+    if not samples:
+        raise SystemExit(f"Tidak ada gambar berlabel di {args.data}")
+    labels = np.array([class_idx for _, class_idx in samples])
+    images = [preprocess_image(path).astype(np.float32) for path, _ in samples]
+
+    names = args.backends.split(",")
+    if "keras" in names:
+        names.remove("keras")
+    names.insert(0, "keras")
+
+    report = []
+    reference = None
+    for name in names:
+        probabilities, timings = evaluate(load_backend(name, args.model, args.tflite_dir), images)
+        predicted = probabilities.argmax(axis=1)
+        if reference is None:
+            reference = probabilities
+        reference_top1 = reference.argmax(axis=1)
+        report.append({
+            "backend": name,
+            "images": len(samples),
+            "accuracy": float((predicted == labels).mean()),
+            "top1_agreement": float((predicted == reference_top1).mean()),
+            # Selisih confidence pada kelas yang dipilih backend acuan
+            "confidence_drift": float(np.abs(
+                probabilities[np.arange(len(samples)), reference_top1]
+                - reference[np.arange(len(samples)), reference_top1]
+            ).mean()),
+            "latency_p50_ms": float(np.percentile(timings, 50)),
+            "latency_p95_ms": float(np.percentile(timings, 95)),
+        })
+
+    print(f"{'backend':<16}{'accuracy':>10}{'agree':>8}{'drift':>8}{'p50 ms':>9}{'p95 ms':>9}")
+    for row in report:
+        print(
+            f"{row['backend']:<16}{row['accuracy']:>10.3f}{row['top1_agreement']:>8.3f}"
+            f"{row['confidence_drift']:>8.3f}{row['latency_p50_ms']:>9.1f}{row['latency_p95_ms']:>9.1f}"
+        )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
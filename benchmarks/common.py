@@ -0,0 +1,48 @@
+import numpy as np
+
+
+# --- Model Pengganti ---
+# Dipakai bersama oleh benchmark yang harus berjalan offline tanpa model terlatih
+# (suite, precision, multi_item): arsitektur VGG16 dengan bobot acak ber-seed.
+def make_stand_in_model(path, size):
+    import tensorflow as tf
+
+    from labels import class_labels
+
+    # Seed sebelum layer dibuat agar bobot pengganti sama di setiap run
+    tf.keras.utils.set_random_seed(0)
+    inputs = tf.keras.Input((224, 224, 3))
+    if size == "vgg16":
+        x = tf.keras.applications.VGG16(weights=None, include_top=False, input_tensor=inputs).output
+        x = tf.keras.layers.Flatten()(x)
+        x = tf.keras.layers.Dense(256, activation="relu")(x)
+        x = tf.keras.layers.Dropout(0.5)(x)
+    else:
+        # Versi kecil untuk cek cepat; angka absolutnya tidak sebanding dengan vgg16
+        x = tf.keras.layers.Conv2D(16, 3, strides=2, activation="relu")(inputs)
+        x = tf.keras.layers.GlobalAveragePooling2D()(x)
+    outputs = tf.keras.layers.Dense(len(class_labels), activation="softmax")(x)
+    tf.keras.Model(inputs, outputs).save(path)
+
+
+def sharpen_stand_in(model, images, target_confidence):
+    # Bobot acak menghasilkan probabilitas hampir seragam (drift bf16 jadi ~0). Kernel Dense
+    # terakhir diskalakan agar rata-rata confidence top-1 mendekati model terlatih.
+    import keras
+
+    head = model.layers[-1]
+    features = keras.Model(model.input, head.input)
+    hidden = np.concatenate([np.asarray(features(images[i:i + 8].astype(np.float32) / 255.0)) for i in range(0, len(images), 8)])
+    kernel, bias = head.get_weights()
+
+    def mean_confidence(scale):
+        logits = hidden @ (kernel * scale) + bias
+        logits -= logits.max(axis=1, keepdims=True)
+        probabilities = np.exp(logits) / np.exp(logits).sum(axis=1, keepdims=True)
+        return probabilities.max(axis=1).mean()
+
+    low, high = 1.0, 1e6
+    for _ in range(60):
+        middle = (low * high) ** 0.5
+        low, high = (middle, high) if mean_confidence(middle) < target_confidence else (low, middle)
+    head.set_weights([kernel * low, bias])
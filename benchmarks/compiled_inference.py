@@ -0,0 +1,48 @@
+import argparse
+import time
+
+import numpy as np
+from tensorflow.keras.models import load_model
+
+from backends import INPUT_SHAPE, compiled_predict_fn, keras_predict_fn
+
+
+# --- Benchmark: model.predict vs compiled path ---
+# Jalankan dari root repo: python -m benchmarks.compiled_inference --model model_sampah_vgg16.keras
+def measure(predict_fn, batch_size, repeats):
+    batch = np.random.rand(batch_size, *INPUT_SHAPE).astype(np.float32)
+    predict_fn(batch)  # panggilan pertama tidak dihitung
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        predict_fn(batch)
+        timings.append(time.perf_counter() - start)
+    timings = np.array(timings) / batch_size * 1000
+    return np.median(timings), np.percentile(timings, 95)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bandingkan latency per gambar model.predict vs jalur compiled.")
+    parser.add_argument("--model", default="model_sampah_vgg16.keras")
+    parser.add_argument("--batch-sizes", default="1,2,4,8")
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--xla", action="store_true", help="Aktifkan XLA pada jalur compiled")
+    args = parser.parse_args()
+
+    batch_sizes = [int(size) for size in args.batch_sizes.split(",")]
+    model = load_model(args.model)
+
+    start = time.perf_counter()
+    compiled = compiled_predict_fn(model, jit_compile=args.xla, warmup_batch_sizes=batch_sizes)
+    print(f"Warmup compiled path: {time.perf_counter() - start:.2f} s")
+
+    paths = {"predict": keras_predict_fn(model), "compiled": compiled}
+    print(f"{'path':<10}{'batch':>6}{'p50 ms/img':>12}{'p95 ms/img':>12}")
+    for batch_size in batch_sizes:
+        for name, predict_fn in paths.items():
+            p50, p95 = measure(predict_fn, batch_size, args.repeats)
+            print(f"{name:<10}{batch_size:>6}{p50:>12.2f}{p95:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import argparse
+import multiprocessing
+import os
+import resource
+import time
+
+import numpy as np
+from PIL import Image
+
+from preprocessing import decode_image, iter_image_files, resize_image, to_rgb
+
+
+# --- Benchmark: decode penuh vs draft/DCT scaling ---
+# python -m benchmarks.decode --images data/foto_asli
+# Tanpa --images, korpus sintetis berukuran foto ponsel (12 MP) dibuat di --workdir.
+def make_synthetic_corpus(workdir, count=8, size=(4032, 3024)):
+    os.makedirs(workdir, exist_ok=True)
+    rng = np.random.default_rng(0)
+    # Gradien + noise ringan agar ukuran file mendekati foto asli, bukan noise murni
+    y, x = np.mgrid[0:size[1], 0:size[0]]
+    base = np.stack([x * 255 // size[0], y * 255 // size[1], (x + y) * 255 // sum(size)], axis=-1).astype(np.uint16)
+    for i in range(count):
+        noise = rng.integers(0, 24, size=base.shape, dtype=np.uint16)
+        Image.fromarray(((base + noise + i * 17) % 256).astype(np.uint8)).save(
+            os.path.join(workdir, f"foto_{i}.jpg"), quality=92
+        )
+    return workdir
+
+
+def run_mode(paths, fast, queue):
+    # Dijalankan di proses terpisah agar peak RSS tiap mode tidak saling tercampur
+    timings, pixel_bytes = [], []
+    for path in paths:
+        start = time.perf_counter()
+        img = decode_image(path, fast=fast)
+        pixel_bytes.append(img.width * img.height * len(img.getbands()))
+        resize_image(to_rgb(img))
+        timings.append(time.perf_counter() - start)
+    queue.put({
+        "timings_ms": [t * 1000 for t in timings],
+        "pixel_mb": [b / 1e6 for b in pixel_bytes],
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bandingkan waktu decode dan memori per gambar.")
+    parser.add_argument("--images", help="Folder foto berukuran asli")
+    parser.add_argument("--workdir", default="bench_decode_corpus")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    # Semua kerja berat dijalankan di proses spawn: di Linux ru_maxrss proses induk ikut
+    # terbawa ke proses anak, jadi induk harus tetap kecil
+    ctx = multiprocessing.get_context("spawn")
+    folder = args.images
+    if not folder:
+        folder = args.workdir
+        process = ctx.Process(target=make_synthetic_corpus, args=(folder,))
+        process.start()
+        process.join()
+    paths = list(iter_image_files(folder)) * args.repeats
+    if not paths:
+        raise SystemExit(f"Tidak ada gambar di {folder}")
+
+    print(f"{'mode':<8}{'p50 ms':>9}{'p95 ms':>9}{'pixel MB/img':>14}{'peak RSS MB':>13}")
+    for name, fast in (("full", False), ("draft", True)):
+        queue = ctx.Queue()
+        process = ctx.Process(target=run_mode, args=(paths, fast, queue))
+        process.start()
+        result = queue.get()
+        process.join()
+        timings = np.array(result["timings_ms"])
+        print(
+            f"{name:<8}{np.percentile(timings, 50):>9.1f}{np.percentile(timings, 95):>9.1f}"
+            f"{np.mean(result['pixel_mb']):>14.1f}{result['peak_rss_mb']:>13.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
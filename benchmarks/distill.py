@@ -0,0 +1,141 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from labels import class_labels
+
+
+# --- Benchmark: distilasi teacher -> student ---
+# python -m benchmarks.distill --train-images 400 --test-images 200 --epochs 15
+# Sepenuhnya offline: gambar sintetis 4 kelas (warna dominan + bentuk berbeda per kelas)
+# dan teacher pengganti berarsitektur VGG16 (bobot konvolusi acak, head dilatih pada
+# gambar latih). Pipeline distill.py dijalankan sebagai subprocess: targets (dua kali,
+# yang kedua harus memakai cache), train, lalu report pada folder uji terpisah.
+PALETTES = ((200, 60, 40), (40, 160, 70), (50, 80, 200), (210, 190, 50))
+
+
+def make_image(rng, class_idx, size=(320, 240)):
+    # Latar gradien acak + beberapa bentuk; warna bentuk dan jenisnya ditentukan kelas
+    width, height = size
+    y, x = np.mgrid[0:height, 0:width]
+    tint = rng.integers(60, 200, size=3)
+    background = (tint + (x * 40 // width + y * 40 // height)[..., None] + rng.integers(0, 20, size=(height, width, 3))) % 256
+    img = Image.fromarray(background.astype(np.uint8))
+    draw = ImageDraw.Draw(img)
+    color = np.clip(np.array(PALETTES[class_idx]) + rng.integers(-30, 30, size=3), 0, 255)
+    for _ in range(rng.integers(2, 5)):
+        cx, cy, r = rng.integers(40, width - 40), rng.integers(40, height - 40), rng.integers(20, 60)
+        box = (cx - r, cy - r, cx + r, cy + r)
+        if class_idx % 2 == 0:
+            draw.ellipse(box, fill=tuple(int(c) for c in color))
+        else:
+            draw.rectangle(box, fill=tuple(int(c) for c in color))
+    return img
+
+
+def make_folder(root, count, seed):
+    rng = np.random.default_rng(seed)
+    for i in range(count):
+        class_idx = i % len(class_labels)
+        os.makedirs(os.path.join(root, str(class_idx)), exist_ok=True)
+        make_image(rng, class_idx).save(os.path.join(root, str(class_idx), f"{i:05d}.jpg"), quality=90)
+    return root
+
+
+def make_teacher(path, data_dir, epochs):
+    # Konvolusi VGG16 acak dibekukan; fitur dihitung sekali, lalu head (Normalization +
+    # Dense) dilatih di atas fitur tersebut sehingga teacher punya batas keputusan yang
+    # berarti dengan biaya inferensi VGG16 penuh
+    import tensorflow as tf
+
+    from preprocessing import iter_labeled_images, preprocess_image_uint8
+
+    tf.keras.utils.set_random_seed(0)
+    samples = list(iter_labeled_images(data_dir))
+    images = np.stack([preprocess_image_uint8(p) for p, _ in samples]).astype(np.float32) / 255.0
+    labels = np.array([label for _, label in samples])
+
+    inputs = tf.keras.Input((224, 224, 3))
+    base = tf.keras.applications.VGG16(weights=None, include_top=False, input_tensor=inputs)
+    features = tf.keras.layers.Flatten()(base.output)
+    extractor = tf.keras.Model(inputs, features)
+    cached = extractor.predict(images, batch_size=16, verbose=0)
+
+    normalize = tf.keras.layers.Normalization()
+    normalize.adapt(cached)
+    head_inputs = tf.keras.Input(cached.shape[1:])
+    x = normalize(head_inputs)
+    x = tf.keras.layers.Dense(256, activation="relu")(x)
+    x = tf.keras.layers.Dropout(0.5)(x)
+    head_outputs = tf.keras.layers.Dense(len(class_labels), activation="softmax")(x)
+    head = tf.keras.Model(head_inputs, head_outputs)
+    head.compile(optimizer=tf.keras.optimizers.Adam(1e-3), loss="sparse_categorical_crossentropy", metrics=["accuracy"])
+    head.fit(cached, labels, batch_size=32, epochs=epochs, validation_split=0.2, verbose=2)
+    tf.keras.Model(inputs, head(features)).save(path)
+
+
+def run(args, *command):
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, args.distill_script, *command], capture_output=True, text=True)
+    if result.returncode != 0:
+        raise SystemExit(result.stderr[-4000:])
+    return time.perf_counter() - start, result.stdout
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Jalankan pipeline distill.py end-to-end dengan teacher pengganti VGG16.")
+    parser.add_argument("--workdir", default=os.path.join(tempfile.gettempdir(), "bench_distill"))
+    parser.add_argument("--train-images", type=int, default=400)
+    parser.add_argument("--test-images", type=int, default=200)
+    parser.add_argument("--teacher-epochs", type=int, default=30)
+    parser.add_argument("--epochs", type=int, default=15)
+    parser.add_argument("--arch", default="narrow")
+    parser.add_argument("--width", type=float, default=1.0)
+    parser.add_argument("--output", help="Simpan hasil sebagai JSON")
+    args = parser.parse_args()
+    args.distill_script = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "distill.py")
+
+    os.makedirs(args.workdir, exist_ok=True)
+    train_dir = os.path.join(args.workdir, "latih")
+    test_dir = os.path.join(args.workdir, "uji")
+    teacher = os.path.join(args.workdir, "teacher_vgg16.keras")
+    student = os.path.join(args.workdir, "student.keras")
+    if not os.path.exists(train_dir):
+        make_folder(train_dir, args.train_images, seed=0)
+        make_folder(test_dir, args.test_images, seed=1)
+    if not os.path.exists(teacher):
+        make_teacher(teacher, train_dir, args.teacher_epochs)
+
+    timings = {}
+    targets = os.path.join(args.workdir, "targets_latih")
+    timings["targets_s"], _ = run(args, "targets", "--data", train_dir, "--targets", targets, "--teacher", teacher, "--force")
+    timings["targets_cached_s"], cached = run(args, "targets", "--data", train_dir, "--targets", targets, "--teacher", teacher)
+    timings["train_s"], _ = run(
+        args, "train", "--targets", targets, "--output", student, "--arch", args.arch, "--width", str(args.width),
+        "--weights", "none", "--epochs", str(args.epochs),
+    )
+    test_targets = os.path.join(args.workdir, "targets_uji")
+    run(args, "targets", "--data", test_dir, "--targets", test_targets, "--teacher", teacher)
+    report_path = os.path.join(args.workdir, "report.json")
+    _, report_text = run(args, "report", "--targets", test_targets, "--student", student, "--teacher", teacher, "--output", report_path)
+    with open(report_path, encoding="utf-8") as f:
+        report = json.load(f)
+
+    print(f"Teacher atas {args.train_images} gambar latih: {timings['targets_s']:.0f} s; dijalankan ulang: {timings['targets_cached_s']:.1f} s ({cached.strip()})")
+    print(f"Training student ({args.arch}, {args.epochs} epoch) dari cache: {timings['train_s']:.0f} s")
+    print(f"Folder uji ({args.test_images} gambar):")
+    print(report_text.rstrip())
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "timings": timings, "report": report}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import resource
+import struct
+import sys
+import tempfile
+import time
+import zlib
+
+import numpy as np
+from PIL import Image
+
+import config
+from preprocessing import ImageRejected, decode_image, resize_image, to_rgb
+
+# Batas bawaan PIL (peringatan di atas nilai ini, error di atas 2x), dipakai mode tanpa intake
+PIL_DEFAULT_MAX_PIXELS = 1024 * 1024 * 1024 // 4 // 3
+
+
+# --- Benchmark: intake gambar patologis ---
+# python -m benchmarks.intake --cap-mb 256
+# Membuat korpus file patologis (PNG zlib bomb, header JPEG palsu, file raksasa, format
+# lain, file rusak) dan foto normal, lalu men-decode setiap file di proses terpisah dengan
+# intake (decode_image) dan tanpa intake (Image.open + load bawaan PIL). Keluar dengan
+# kode 1 jika peak RSS proses intake melebihi --cap-mb.
+def png_chunk(kind, data):
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+
+def write_png_bomb(path, width, height, color_type=2, bit_depth=8, text_mb=0):
+    # Piksel nol dikompres baris per baris: file beberapa ratus KB, hasil decode ratusan MB
+    channels = {0: 1, 2: 3, 6: 4}[color_type]
+    row = b"\x00" * (1 + (width * channels * bit_depth + 7) // 8)
+    compressor = zlib.compressobj(9)
+    with open(path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        f.write(png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, bit_depth, color_type, 0, 0, 0)))
+        if text_mb:
+            f.write(png_chunk(b"zTXt", b"Comment\x00\x00" + zlib.compress(b" " * (text_mb * 1024 * 1024), 9)))
+        idat = b"".join(compressor.compress(row) for _ in range(height)) + compressor.flush()
+        f.write(png_chunk(b"IDAT", idat))
+        f.write(png_chunk(b"IEND", b""))
+
+
+def jpeg_bytes(width, height, quality=85, noise=True):
+    rng = np.random.default_rng(0)
+    y, x = np.mgrid[0:height, 0:width]
+    pixels = np.stack([x * 255 // width, y * 255 // height, (x + y) * 255 // (width + height)], axis=-1)
+    if noise:
+        pixels = pixels + rng.integers(0, 24, size=pixels.shape)
+    buffer = io.BytesIO()
+    Image.fromarray((pixels % 256).astype(np.uint8)).save(buffer, format="JPEG", quality=quality)
+    return buffer.getvalue()
+
+
+def make_corpus(workdir):
+    os.makedirs(workdir, exist_ok=True)
+    small = jpeg_bytes(64, 48)
+
+    def write(name, data):
+        with open(os.path.join(workdir, name), "wb") as f:
+            f.write(data)
+
+    write("foto_12mp.jpg", jpeg_bytes(4032, 3024))
+    buffer = io.BytesIO()
+    Image.new("RGB", (1170, 2532), (240, 240, 240)).save(buffer, format="PNG")
+    write("screenshot.png", buffer.getvalue())
+    write("jpeg_48mp.jpg", jpeg_bytes(8000, 6000, noise=False))
+    write_png_bomb(os.path.join(workdir, "png_bomb_3600mp.png"), 60000, 60000, color_type=0, bit_depth=1)
+    write_png_bomb(os.path.join(workdir, "png_bomb_150mp.png"), 12000, 12500)
+    write_png_bomb(os.path.join(workdir, "png_bomb_36mp.png"), 6000, 6000)
+    # Kasus terberat yang masih diterima: PNG RGBA tepat di budget decode 16 MP
+    write_png_bomb(os.path.join(workdir, "png_rgba_16mp.png"), 4000, 4000, color_type=6)
+    write_png_bomb(os.path.join(workdir, "png_text_bomb.png"), 64, 64, text_mb=256)
+    # Header SOF diubah ke 65000x65000; data entropy tetap milik gambar 64x48
+    sof = small.index(b"\xff\xc0")
+    write("jpeg_header_65000.jpg", small[:sof + 5] + struct.pack(">HH", 65000, 65000) + small[sof + 9:])
+    write("jpeg_padding_30mb.jpg", small + b"\x00" * (30 * 1024 * 1024))
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 48)).save(buffer, format="BMP")
+    bmp = bytearray(buffer.getvalue())
+    bmp[18:26] = struct.pack("<ii", 30000, 30000)
+    write("bmp_header_30000.bmp", bytes(bmp))
+    write("truncated.jpg", jpeg_bytes(1280, 960)[:20000])
+    write("bukan_gambar.jpg", b"bukan gambar " * 100)
+    return workdir
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def decode_in_child(path, intake, memory_limit_mb, queue):
+    if not intake:
+        Image.MAX_IMAGE_PIXELS = PIL_DEFAULT_MAX_PIXELS
+        # Batas address space agar file bomb gagal dengan MemoryError, bukan OOM killer
+        limit = memory_limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    start_rss = peak_rss_mb()
+    start = time.perf_counter()
+    try:
+        if intake:
+            img = decode_image(path)
+        else:
+            img = Image.open(path)
+            img.load()
+        size = img.size
+        resize_image(to_rgb(img))
+        outcome = f"ok {size[0]}×{size[1]}"
+    except ImageRejected as e:
+        outcome = f"ditolak: {e}"
+    except Exception as e:
+        outcome = f"{type(e).__name__}: {e}"
+    queue.put({
+        "outcome": outcome,
+        "ms": (time.perf_counter() - start) * 1000,
+        "start_rss_mb": start_rss,
+        "peak_rss_mb": peak_rss_mb(),
+    })
+
+
+def run(ctx, path, intake, memory_limit_mb, timeout):
+    queue = ctx.Queue()
+    process = ctx.Process(target=decode_in_child, args=(path, intake, memory_limit_mb, queue))
+    process.start()
+    try:
+        result = queue.get(timeout=timeout)
+    except Exception:
+        process.kill()
+        result = {"outcome": f"timeout/exit {process.exitcode}", "ms": timeout * 1000, "start_rss_mb": 0.0, "peak_rss_mb": float("nan")}
+    process.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Decode korpus gambar patologis dengan dan tanpa intake budget.")
+    parser.add_argument("--workdir", default=os.path.join(tempfile.gettempdir(), "bench_intake_corpus"))
+    parser.add_argument("--cap-mb", type=float, default=256.0, help="Peak RSS maksimum proses intake")
+    parser.add_argument("--baseline-limit-mb", type=int, default=4096, help="RLIMIT_AS untuk mode tanpa intake")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--output", help="Simpan hasil sebagai JSON")
+    args = parser.parse_args()
+
+    # Korpus dibuat dan di-decode di proses spawn agar peak RSS induk tidak ikut terbawa
+    ctx = multiprocessing.get_context("spawn")
+    process = ctx.Process(target=make_corpus, args=(args.workdir,))
+    process.start()
+    process.join()
+
+    print(
+        f"budget: file {config.INTAKE_MAX_BYTES / 2**20:.0f} MB, header {config.INTAKE_MAX_PIXELS / 1e6:.0f} MP, "
+        f"decode {config.INTAKE_DECODE_PIXELS / 1e6:.0f} MP; cap RSS {args.cap_mb:.0f} MB"
+    )
+    results = []
+    over_cap = []
+    for name in sorted(os.listdir(args.workdir)):
+        path = os.path.join(args.workdir, name)
+        row = {"file": name, "bytes": os.path.getsize(path)}
+        for mode, intake in (("intake", True), ("tanpa_intake", False)):
+            row[mode] = run(ctx, path, intake, args.baseline_limit_mb, args.timeout)
+        results.append(row)
+        if not row["intake"]["peak_rss_mb"] <= args.cap_mb:
+            over_cap.append(name)
+        print(f"\n{name} ({row['bytes'] / 1024:.0f} KB)")
+        for mode in ("intake", "tanpa_intake"):
+            result = row[mode]
+            print(f"  {mode:<13}{result['peak_rss_mb']:>7.0f} MB{result['ms']:>9.0f} ms  {result['outcome'][:110]}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"cap_mb": args.cap_mb, "results": results}, f, indent=2)
+    if over_cap:
+        print(f"\nGAGAL: peak RSS intake melebihi {args.cap_mb:.0f} MB untuk {', '.join(over_cap)}")
+        sys.exit(1)
+    print(f"\nOK: peak RSS intake <= {args.cap_mb:.0f} MB untuk semua {len(results)} file")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+import argparse
+import json
+import time
+
+import numpy as np
+
+import config
+from labels import class_labels
+from live_camera import LiveClassifier, PredictionSmoother, frame_source, synthetic_frames
+
+
+# --- Benchmark: live camera mode ---
+# python -m benchmarks.live_camera --seconds 30 --camera-fps 30 --fake-latency-ms 120
+# python -m benchmarks.live_camera --seconds 30 --images data/uji/organik --backend tflite-int8
+# Frame sintetis (atau --source folder/URL MJPEG) masuk ke LiveClassifier; dilaporkan FPS
+# inferensi, frame yang dibuang, latency frame-ke-label, dan jumlah pergantian label
+# sebelum/sesudah smoothing.
+def fake_predictor(latency_ms, flip_rate, seed=0):
+    # Tanpa model: kelas ditentukan warna rata-rata frame, dengan sebagian prediksi acak
+    # untuk meniru frame blur yang salah klasifikasi
+    rng = np.random.default_rng(seed)
+
+    def predict(batch):
+        time.sleep(latency_ms / 1000.0)
+        probabilities = np.full((len(batch), len(class_labels)), 0.1, dtype=np.float32)
+        for row, img in zip(probabilities, batch):
+            class_idx = int(img.mean(axis=(0, 1)).argmax()) % len(class_labels)
+            if rng.random() < flip_rate:
+                class_idx = int(rng.integers(len(class_labels)))
+            row[class_idx] = 0.7
+        return probabilities
+    return predict
+
+
+def label_changes(labels):
+    return int(sum(a != b for a, b in zip(labels, labels[1:])))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ukur FPS, frame dibuang, dan latency frame-ke-label live mode.")
+    parser.add_argument("--source", default="synthetic", help="'synthetic', folder gambar, atau URL MJPEG")
+    parser.add_argument("--images", help="Folder gambar untuk adegan sintetis")
+    parser.add_argument("--camera-fps", type=float, default=30.0)
+    parser.add_argument("--seconds", type=float, default=20.0)
+    parser.add_argument("--max-fps", type=float, default=config.LIVE_MAX_FPS)
+    parser.add_argument("--duty-cycle", type=float, default=config.LIVE_DUTY_CYCLE)
+    parser.add_argument("--smoothing", type=int, default=config.LIVE_SMOOTHING)
+    parser.add_argument("--backend", default=config.BACKEND)
+    parser.add_argument("--fake-latency-ms", type=float, help="Pakai prediktor palsu dengan latency ini alih-alih model")
+    parser.add_argument("--flip-rate", type=float, default=0.2, help="Porsi prediksi acak pada prediktor palsu")
+    parser.add_argument("--output", help="Simpan hasil sebagai JSON")
+    args = parser.parse_args()
+
+    if args.fake_latency_ms is not None:
+        predict_fn = fake_predictor(args.fake_latency_ms, args.flip_rate)
+    else:
+        from model_loader import load_backend
+        predict_fn = load_backend(args.backend).predict_uint8
+        predict_fn(np.zeros((1, 224, 224, 3), dtype=np.uint8))  # warmup
+
+    if args.source == "synthetic":
+        open_frames = lambda: synthetic_frames(args.camera_fps, images=args.images)  # noqa: E731
+    else:
+        open_frames = frame_source(args.source, args.camera_fps)
+
+    raw = []
+
+    def recording_predict(batch):
+        probabilities = predict_fn(batch)
+        raw.append(probabilities[0])
+        return probabilities
+
+    live = LiveClassifier(open_frames, recording_predict, args.smoothing, args.max_fps, args.duty_cycle)
+    live.start()
+    time.sleep(args.seconds)
+    live.stop()
+    stats = live.stats()
+
+    smoother = PredictionSmoother(args.smoothing)
+    smoothed = [int(np.argmax(smoother.update(p))) for p in raw]
+    result = {
+        **stats,
+        "seconds": args.seconds,
+        "camera_fps": stats["received"] / args.seconds,
+        "label_changes_raw": label_changes([int(np.argmax(p)) for p in raw]),
+        "label_changes_smoothed": label_changes(smoothed),
+    }
+    print(f"Frame kamera        : {stats['received']} ({result['camera_fps']:.1f} fps), dibuang {stats['dropped']} ({stats['drop_rate']:.0%})")
+    print(f"Inferensi           : {stats['inferred']} frame, {stats['fps']:.1f} fps, interval {stats['interval_ms']:.0f} ms")
+    print(f"Latency model       : {stats['model_latency_ms']:.0f} ms")
+    print(f"Frame-ke-label      : p50 {stats['frame_to_label_p50_ms']:.0f} ms, p95 {stats['frame_to_label_p95_ms']:.0f} ms")
+    print(f"Pergantian label    : {result['label_changes_raw']} tanpa smoothing, {result['label_changes_smoothed']} dengan smoothing {args.smoothing}")
+    if stats["source_error"]:
+        print(f"Error sumber        : {stats['source_error']}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
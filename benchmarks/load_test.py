@@ -0,0 +1,66 @@
+import argparse
+import asyncio
+import time
+
+import numpy as np
+from tornado.httpclient import AsyncHTTPClient, HTTPClientError
+
+from preprocessing import iter_image_files
+
+
+# --- Load Test: server.py ---
+# python -m benchmarks.load_test --url http://localhost:8080 --images data/uji --concurrency 16 --requests 500
+async def run(url, payloads, concurrency, total):
+    client = AsyncHTTPClient(max_clients=concurrency)
+    latencies, errors = [], 0
+    counter = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            body = payloads[i % len(payloads)]
+            start = time.perf_counter()
+            try:
+                await client.fetch(
+                    f"{url}/v1/classify",
+                    method="POST",
+                    body=body,
+                    headers={"Content-Type": "application/octet-stream"},
+                    request_timeout=120,
+                )
+                latencies.append(time.perf_counter() - start)
+            except (HTTPClientError, OSError):
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return np.array(latencies) * 1000, errors, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test untuk server inferensi.")
+    parser.add_argument("--url", default="http://localhost:8080")
+    parser.add_argument("--images", required=True, help="Folder gambar yang dikirim bergantian")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+
+    payloads = []
+    for path in iter_image_files(args.images):
+        with open(path, "rb") as f:
+            payloads.append(f.read())
+    if not payloads:
+        raise SystemExit(f"Tidak ada gambar di {args.images}")
+
+    latencies, errors, wall = asyncio.run(run(args.url.rstrip("/"), payloads, args.concurrency, args.requests))
+    print(f"Request sukses : {len(latencies)} (gagal {errors})")
+    print(f"Throughput     : {len(latencies) / wall:.1f} req/s")
+    if len(latencies):
+        print(
+            f"Latency (ms)   : p50 {np.percentile(latencies, 50):.1f}  p95 {np.percentile(latencies, 95):.1f}"
+            f"  p99 {np.percentile(latencies, 99):.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+from PIL import Image
+
+import config
+from backends import KerasBackend
+from benchmarks.common import make_stand_in_model, sharpen_stand_in
+from model_loader import MODEL_PATH
+from multi_item import MultiItemScorer, grid_shape, iter_tiles, tile_probabilities
+from preprocessing import iter_image_files, open_image
+
+
+# --- Benchmark: multi-item sliding window ---
+# python -m benchmarks.multi_item --sizes 448,672 --batch-sizes 8,32
+# Grid probabilitas untuk satu foto dihitung dengan dua cara: satu forward pass model
+# konvolusional penuh (jalur app untuk backend keras) dan klasifikasi per jendela 224x224
+# yang di-batch lewat jalur compiled predict_uint8 (jalur backend lain). Ukuran grid keduanya
+# sama; nilainya berbeda karena padding "same" di tepi jendela (lihat multi_item.py). Yang
+# diukur latency, jumlah jendela, selisih probabilitas, dan top-1 agreement per sel.
+# Baris "kasar" memakai jendela tanpa tumpang-tindih (--coarse-stride) sebagai pembanding
+# grid yang jauh lebih jarang. Tanpa --model yang ada, model pengganti VGG16 (bobot acak)
+# dibuat dan dipertajam dengan helper di benchmarks.common; tanpa itu
+# probabilitasnya hampir seragam dan selisih float kecil sudah membalik top-1.
+def test_image(folder):
+    if folder:
+        path = next(iter_image_files(folder), None)
+        if path is None:
+            raise ValueError(f"Tidak ada gambar di {folder}")
+        return open_image(path).convert("RGB")
+    # Foto ponsel 4:3 sintetis: gradien + noise
+    rng = np.random.default_rng(0)
+    y, x = np.mgrid[0:3024:4, 0:4032:4]
+    base = np.stack([x * 255 // 4032, y * 255 // 3024, (x + y) * 255 // 7056], axis=-1)
+    return Image.fromarray(((base + rng.integers(0, 24, size=base.shape)) % 256).astype(np.uint8))
+
+
+def timed(fn, repeats):
+    fn()
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return result, float(np.percentile(timings, 50)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bandingkan grid multi-item konvolusional penuh dengan klasifikasi per jendela.")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--image-dir", help="Folder foto; gambar pertama dipakai (default: foto sintetis 4032x3024)")
+    parser.add_argument("--sizes", default=str(config.MULTI_ITEM_SIZE), help="Sisi terpanjang gambar, dipisah koma")
+    parser.add_argument("--stride", type=int, default=config.MULTI_ITEM_STRIDE)
+    parser.add_argument("--coarse-stride", type=int, default=224)
+    parser.add_argument("--batch-sizes", default="8,32", help="Ukuran batch jalur per jendela")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--stand-in-confidence", type=float, default=0.8, help="Rata-rata confidence top-1 model pengganti")
+    parser.add_argument("--output", help="Simpan hasil sebagai JSON")
+    args = parser.parse_args()
+
+    from tensorflow.keras.models import load_model
+
+    model_path = args.model
+    stand_in = not os.path.exists(model_path)
+    if stand_in:
+        model_path = os.path.join(tempfile.gettempdir(), "bench_multi_item_vgg16.keras")
+        if not os.path.exists(model_path):
+            make_stand_in_model(model_path, "vgg16")
+        print(f"{args.model} tidak ada, memakai model pengganti VGG16 (bobot acak): {model_path}")
+    model = load_model(model_path)
+    image = test_image(args.image_dir)
+    if stand_in:
+        sample = np.asarray(image.convert("RGB").resize((672, 504)))
+        sharpen_stand_in(model, np.concatenate(list(iter_tiles(sample, 224, 112, 16))), args.stand_in_confidence)
+    batch_sizes = [int(size) for size in args.batch_sizes.split(",")]
+    backend = KerasBackend(model, model_path, warmup_batch_sizes=batch_sizes)
+
+    results = []
+    for size in (int(size) for size in args.sizes.split(",")):
+        start = time.perf_counter()
+        scorer = MultiItemScorer(model=model, size=size, stride=args.stride)
+        build_ms = (time.perf_counter() - start) * 1000
+        img_array = np.asarray(scorer.prepare(image))
+        height, width = img_array.shape[:2]
+        rows, cols = grid_shape(height, width, scorer.window, scorer.stride)
+        dense, dense_ms = timed(lambda: scorer.probabilities(img_array), args.repeats)
+        results.append({
+            "size": f"{width}x{height}", "method": "konvolusional", "batch_size": 1, "windows": rows * cols,
+            "grid": f"{cols}x{rows}", "p50_ms": dense_ms, "build_ms": build_ms, "max_diff": 0.0, "top1_agreement": 1.0,
+        })
+        for batch_size in batch_sizes:
+            tiles, tiles_ms = timed(
+                lambda: tile_probabilities(backend.predict_uint8, img_array, scorer.window, scorer.stride, batch_size),
+                args.repeats,
+            )
+            results.append({
+                "size": f"{width}x{height}", "method": "per jendela", "batch_size": batch_size, "windows": rows * cols,
+                "grid": f"{cols}x{rows}", "p50_ms": tiles_ms,
+                "max_diff": float(np.abs(tiles - dense).max()),
+                "top1_agreement": float((tiles.argmax(axis=-1) == dense.argmax(axis=-1)).mean()),
+            })
+        coarse_rows, coarse_cols = grid_shape(height, width, scorer.window, args.coarse_stride)
+        _, coarse_ms = timed(
+            lambda: tile_probabilities(backend.predict_uint8, img_array, scorer.window, args.coarse_stride, max(batch_sizes)),
+            args.repeats,
+        )
+        results.append({
+            "size": f"{width}x{height}", "method": "per jendela kasar", "batch_size": max(batch_sizes),
+            "windows": coarse_rows * coarse_cols, "grid": f"{coarse_cols}x{coarse_rows}", "p50_ms": coarse_ms,
+        })
+
+    print(f"stride {args.stride} px, jendela 224 px; selisih = maks. |p_per_jendela - p_konvolusional|")
+    print(f"{'ukuran':<10}{'metode':<20}{'batch':>6}{'grid':>7}{'jendela':>9}{'p50 ms':>10}{'ms/jendela':>12}{'selisih':>10}{'agree':>7}")
+    for row in results:
+        diff = f"{row['max_diff']:.1e}" if "max_diff" in row else "-"
+        agree = f"{row['top1_agreement']:.3f}" if "top1_agreement" in row else "-"
+        print(
+            f"{row['size']:<10}{row['method']:<20}{row['batch_size']:>6}{row['grid']:>7}{row['windows']:>9}"
+            f"{row['p50_ms']:>10.0f}{row['p50_ms'] / row['windows']:>12.1f}{diff:>10}{agree:>7}"
+        )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
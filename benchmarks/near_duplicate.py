@@ -0,0 +1,68 @@
+import argparse
+import io
+import time
+
+import numpy as np
+from PIL import Image, ImageEnhance
+
+from near_duplicate import HASH_FUNCTIONS, NearDuplicateIndex, hamming
+from preprocessing import iter_image_files, preprocess_image_uint8
+
+
+# --- Benchmark: jarak hash foto ulang vs gambar berbeda ---
+# python -m benchmarks.near_duplicate --images data/uji
+# Foto ulang disimulasikan dengan geser/crop kecil, perubahan cahaya, dan re-encode JPEG.
+# Gunakan hasilnya untuk memilih ECOSORT_NEAR_DUP_DISTANCE: recall foto ulang tinggi
+# dengan false match antar gambar berbeda mendekati nol.
+def retake(img, rng):
+    width, height = img.size
+    dx, dy = rng.integers(0, max(1, width // 25), size=2)
+    img = img.crop((dx, dy, width - width // 25 + dx, height - height // 25 + dy)).resize((width, height))
+    img = ImageEnhance.Brightness(img).enhance(rng.uniform(0.9, 1.1))
+    buffer = io.BytesIO()
+    img.save(buffer, format="JPEG", quality=int(rng.integers(70, 95)))
+    buffer.seek(0)
+    return Image.open(buffer).convert("RGB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ukur jarak Hamming foto ulang vs gambar berbeda dan biaya lookup.")
+    parser.add_argument("--images", required=True)
+    parser.add_argument("--hash", default="phash", choices=sorted(HASH_FUNCTIONS))
+    parser.add_argument("--retakes", type=int, default=5)
+    parser.add_argument("--max-distance", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    hash_fn = HASH_FUNCTIONS[args.hash]
+    images = []
+    for path in iter_image_files(args.images):
+        try:
+            images.append(Image.fromarray(preprocess_image_uint8(path)))
+        except OSError:
+            continue
+    if len(images) < 2:
+        raise SystemExit(f"Butuh minimal 2 gambar di {args.images}")
+
+    start = time.perf_counter()
+    hashes = [hash_fn(img) for img in images]
+    hash_ms = (time.perf_counter() - start) * 1000 / len(images)
+    same = np.array([hamming(h, hash_fn(retake(img, rng))) for img, h in zip(images, hashes) for _ in range(args.retakes)])
+    different = np.array([hamming(a, b) for i, a in enumerate(hashes) for b in hashes[i + 1:]])
+
+    print(f"hash {args.hash}: {hash_ms:.2f} ms/gambar (224x224)")
+    print(f"{'jarak':>6}{'recall foto ulang':>19}{'false match':>13}")
+    for distance in range(args.max_distance + 1):
+        print(f"{distance:>6}{np.mean(same <= distance):>19.1%}{np.mean(different <= distance):>13.2%}")
+
+    index = NearDuplicateIndex(max_distance=6, max_entries=len(hashes), hash_name=args.hash)
+    for h in hashes:
+        index.put(h, None)
+    start = time.perf_counter()
+    for h in hashes:
+        index.get(h ^ 0b101)
+    print(f"lookup index ({len(hashes)} entri): {(time.perf_counter() - start) * 1e6 / len(hashes):.1f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+import config
+from backends import KerasBackend
+from benchmarks.common import make_stand_in_model, sharpen_stand_in
+from model_loader import MODEL_PATH
+from precision import PRECISIONS, calibration_images, check_parity, convert_model, predict_probabilities, unsupported_reason
+
+
+# --- Benchmark: presisi inferensi CPU ---
+# python -m benchmarks.precision --images data/kalibrasi --batch-sizes 1,8
+# Membandingkan float32, bfloat16, dan float16 (bobot fp16) untuk model yang sama: waktu
+# konversi saat load, parity terhadap float32 (top-1 agreement, drift confidence), ukuran
+# bobot, dan latency jalur compiled predict_uint8 seperti di app. Tanpa --model yang ada,
+# model pengganti VGG16 (bobot acak) dibuat dengan benchmarks.common.
+def weights_mb(model):
+    return sum(int(np.prod(v.shape)) * np.dtype(v.dtype).itemsize for v in model.weights) / 2**20
+
+
+def latency_ms(backend, images, batch_size, repeats):
+    batch = np.resize(images, (batch_size, *images.shape[1:]))
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        backend.predict_uint8(batch)
+        timings.append(time.perf_counter() - start)
+    return float(np.percentile(timings, 50)) * 1000, float(np.percentile(timings, 95)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bandingkan presisi float32/bfloat16/float16 pada CPU.")
+    parser.add_argument("--images", required=True, help="Folder gambar kalibrasi (boleh tanpa label)")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--samples", type=int, default=config.PRECISION_SAMPLES)
+    parser.add_argument("--precisions", default=",".join(PRECISIONS))
+    parser.add_argument("--batch-sizes", default="1,8")
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument("--min-agreement", type=float, default=config.PRECISION_MIN_AGREEMENT)
+    parser.add_argument("--max-drift", type=float, default=config.PRECISION_MAX_DRIFT)
+    parser.add_argument("--stand-in-confidence", type=float, default=0.8, help="Rata-rata confidence top-1 model pengganti")
+    parser.add_argument("--output", help="Simpan hasil sebagai JSON")
+    args = parser.parse_args()
+
+    from tensorflow.keras.models import load_model
+
+    model_path = args.model
+    stand_in = not os.path.exists(model_path)
+    if stand_in:
+        model_path = os.path.join(tempfile.gettempdir(), "bench_precision_vgg16.keras")
+        if not os.path.exists(model_path):
+            make_stand_in_model(model_path, "vgg16")
+        print(f"{args.model} tidak ada, memakai model pengganti VGG16 (bobot acak): {model_path}")
+    reference = load_model(model_path)
+    images = calibration_images(args.images, args.samples)
+    if stand_in:
+        sharpen_stand_in(reference, images, args.stand_in_confidence)
+    reference_probabilities = predict_probabilities(reference, images)
+    batch_sizes = [int(size) for size in args.batch_sizes.split(",")]
+
+    results = []
+    for precision in args.precisions.split(","):
+        row = {"precision": precision, "unsupported": unsupported_reason(precision)}
+        start = time.perf_counter()
+        model = reference if precision == "float32" else convert_model(reference, precision)
+        row["convert_ms"] = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        row.update(check_parity(reference_probabilities, predict_probabilities(model, images), args.min_agreement, args.max_drift))
+        row["parity_ms"] = (time.perf_counter() - start) * 1000
+        row["weights_mb"] = weights_mb(model)
+        backend = KerasBackend(model, model_path, warmup_batch_sizes=batch_sizes)
+        for size in batch_sizes:
+            row[f"b{size}_p50_ms"], row[f"b{size}_p95_ms"] = latency_ms(backend, images, size, args.repeats)
+        results.append(row)
+
+    print(
+        f"{len(images)} gambar kalibrasi, confidence top-1 float32 rata-rata {reference_probabilities.max(axis=1).mean():.3f}; "
+        f"batas agreement >= {args.min_agreement:g}, drift <= {args.max_drift:g}"
+    )
+    header = f"{'presisi':<10}{'agree':>7}{'drift':>8}{'drift max':>10}{'lolos':>7}{'bobot MB':>10}{'konversi':>10}{'parity':>9}"
+    header += "".join(f"{f'b{size} p50':>9}" for size in batch_sizes)
+    print(header)
+    for row in results:
+        line = (
+            f"{row['precision']:<10}{row['top1_agreement']:>7.3f}{row['confidence_drift']:>8.4f}{row['max_confidence_drift']:>10.4f}"
+            f"{'ya' if row['passed'] else 'tidak':>7}{row['weights_mb']:>10.1f}{row['convert_ms']:>10.0f}{row['parity_ms']:>9.0f}"
+        )
+        line += "".join(f"{row[f'b{size}_p50_ms']:>9.1f}" for size in batch_sizes)
+        print(line)
+        if row["unsupported"]:
+            print(f"  host: {row['unsupported']}")
+    print("waktu dalam ms")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
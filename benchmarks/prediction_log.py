@@ -0,0 +1,138 @@
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from labels import class_labels
+from prediction_log import FIELDS, PredictionLog, log_schema
+
+
+# --- Benchmark: log prediksi ---
+# python -m benchmarks.prediction_log --records 5000
+# Mengukur latency yang ditambahkan ke jalur request per record: PredictionLog.append
+# (ring buffer + writer thread) vs menulis langsung per record (JSONL dengan fsync dan
+# Parquet satu file per record). Lalu skenario overflow dengan buffer kecil untuk melihat
+# counter "dropped", dan membaca kembali semua file lewat pyarrow.dataset.
+def sample_records(count):
+    rng = np.random.default_rng(0)
+    labels = list(class_labels.values())
+    stages = {"intake": 0.0004, "cache_lookup": 0.0011, "decode": 0.021, "resize": 0.004, "predict": 0.085}
+    for i in range(count):
+        probabilities = rng.dirichlet(np.ones(len(labels))).astype(np.float32)
+        top = int(probabilities.argmax())
+        yield (f"{i:064x}", "upload", "model", labels[top], float(probabilities[top]), probabilities, "bench", stages)
+
+
+def percentiles_us(samples):
+    return {
+        "p50_us": float(np.percentile(samples, 50)) * 1e6,
+        "p99_us": float(np.percentile(samples, 99)) * 1e6,
+        "max_us": float(np.max(samples)) * 1e6,
+    }
+
+
+def bench_log(directory, records, capacity, flush_rows):
+    log = PredictionLog(directory, capacity=capacity, flush_rows=flush_rows, flush_interval=1.0)
+    samples = []
+    for record in records:
+        start = time.perf_counter()
+        log.append(*record)
+        samples.append(time.perf_counter() - start)
+    start = time.perf_counter()
+    log.close()
+    result = percentiles_us(samples)
+    result["close_ms"] = (time.perf_counter() - start) * 1000
+    result.update(log.stats())
+    return result
+
+
+def bench_jsonl(directory, records):
+    samples = []
+    with open(os.path.join(directory, "log.jsonl"), "a", encoding="utf-8") as f:
+        for record in records:
+            start = time.perf_counter()
+            row = dict(zip(FIELDS, (time.time(),) + record))
+            row["probabilities"] = [float(x) for x in row["probabilities"]]
+            f.write(json.dumps(row) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+            samples.append(time.perf_counter() - start)
+    return percentiles_us(samples)
+
+
+def bench_parquet_per_record(directory, records):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    samples = []
+    for i, record in enumerate(records):
+        start = time.perf_counter()
+        row = dict(zip(FIELDS, (int(time.time() * 1000),) + record))
+        row["probabilities"] = [float(x) for x in row["probabilities"]]
+        row["stage_ms"] = {k: v * 1000 for k, v in row["stage_ms"].items()}
+        table = pa.Table.from_pylist([row], schema=log_schema())
+        pq.write_table(table, os.path.join(directory, f"part-{i:06d}.parquet"), compression="zstd")
+        samples.append(time.perf_counter() - start)
+    return percentiles_us(samples)
+
+
+def read_back(directory):
+    import pyarrow.dataset as ds
+
+    dataset = ds.dataset(directory, format="parquet", partitioning="hive")
+    table = dataset.to_table()
+    return {"rows": table.num_rows, "files": len(dataset.files), "bytes": sum(os.path.getsize(f) for f in dataset.files)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency append log prediksi vs penulisan sinkron per record.")
+    parser.add_argument("--records", type=int, default=5000)
+    parser.add_argument("--sync-records", type=int, default=500, help="Jumlah record untuk mode sinkron (lebih lambat)")
+    parser.add_argument("--flush-rows", type=int, default=512)
+    parser.add_argument("--overflow-capacity", type=int, default=64, help="Ukuran buffer untuk skenario overflow")
+    parser.add_argument("--output", help="Simpan hasil sebagai JSON")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_prediction_log_")
+    try:
+        results = {}
+        for name in ("ring_buffer", "overflow", "jsonl_fsync", "parquet_per_record"):
+            os.makedirs(os.path.join(workdir, name))
+        records = list(sample_records(args.records))
+        sync_records = records[:args.sync_records]
+
+        results["ring_buffer"] = bench_log(os.path.join(workdir, "ring_buffer"), records, args.records * 2, args.flush_rows)
+        results["ring_buffer"]["read_back"] = read_back(os.path.join(workdir, "ring_buffer"))
+        results["jsonl_fsync"] = bench_jsonl(os.path.join(workdir, "jsonl_fsync"), sync_records)
+        results["parquet_per_record"] = bench_parquet_per_record(os.path.join(workdir, "parquet_per_record"), sync_records)
+        # Buffer kecil dan flush_rows > capacity: writer hanya bangun lewat flush_interval,
+        # sehingga burst melebihi kapasitas dan sisanya dibuang
+        results["overflow"] = bench_log(os.path.join(workdir, "overflow"), records, args.overflow_capacity, args.overflow_capacity * 2)
+        results["overflow"]["read_back"] = read_back(os.path.join(workdir, "overflow"))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"{args.records} record (mode sinkron: {args.sync_records})")
+    print(f"{'mode':<20}{'p50 µs':>10}{'p99 µs':>10}{'max µs':>10}")
+    for name in ("ring_buffer", "jsonl_fsync", "parquet_per_record", "overflow"):
+        row = results[name]
+        print(f"{name:<20}{row['p50_us']:>10.1f}{row['p99_us']:>10.1f}{row['max_us']:>10.0f}")
+    for name in ("ring_buffer", "overflow"):
+        row = results[name]
+        back = row["read_back"]
+        print(
+            f"{name}: appended {row['appended']}, dropped {row['dropped']}, written {row['written']}, "
+            f"flush {row['flushes']}, close {row['close_ms']:.0f} ms; dibaca kembali {back['rows']} baris "
+            f"dari {back['files']} file ({back['bytes'] / 1024:.0f} KB)"
+        )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
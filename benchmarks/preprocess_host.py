@@ -0,0 +1,75 @@
+import argparse
+import io
+import time
+import tracemalloc
+
+import numpy as np
+
+import config
+from model_loader import load_backend
+from preprocessing import iter_image_files, preprocess_image, preprocess_image_uint8
+
+
+# --- Benchmark: preprocessing di host vs di dalam graph ---
+# python -m benchmarks.preprocess_host --images data/uji --backend savedmodel
+# Membandingkan waktu CPU dan alokasi Python untuk menyiapkan input, plus latency total:
+#   float  decode + resize + /255.0 di numpy (jalur lama)
+#   uint8  decode + resize di PIL, rescale di graph
+#   bytes  bytes mentah, decode + resize + rescale di graph
+def host_cost(prepare, payloads):
+    # Hanya persiapan input yang diukur; tracemalloc melacak alokasi numpy/PIL di sisi Python
+    tracemalloc.start()
+    cpu_start = time.process_time()
+    batch = prepare(payloads)
+    cpu_ms = (time.process_time() - cpu_start) * 1000 / len(payloads)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return batch, cpu_ms, peak / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bandingkan biaya preprocessing host untuk input float, uint8, dan bytes.")
+    parser.add_argument("--images", required=True)
+    parser.add_argument("--backend", default=config.BACKEND)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--repeats", type=int, default=10)
+    args = parser.parse_args()
+
+    payloads = []
+    for path in list(iter_image_files(args.images))[:args.batch_size]:
+        with open(path, "rb") as f:
+            payloads.append(f.read())
+    if not payloads:
+        raise SystemExit(f"Tidak ada gambar di {args.images}")
+
+    backend = load_backend(args.backend)
+    modes = {
+        "float": (
+            lambda items: np.stack([preprocess_image(io.BytesIO(data)) for data in items]).astype(np.float32),
+            backend.predict,
+        ),
+        "uint8": (
+            lambda items: np.stack([preprocess_image_uint8(io.BytesIO(data)) for data in items]),
+            backend.predict_uint8,
+        ),
+        "bytes": (list, backend.predict_bytes),
+    }
+
+    print(f"backend {backend.name}, batch {len(payloads)}")
+    print(f"{'input':<8}{'host CPU ms/img':>17}{'py alloc MB':>13}{'input MB':>10}{'p50 ms/img':>12}")
+    for name, (prepare, predict_fn) in modes.items():
+        predict_fn(prepare(payloads))  # warmup
+        cpu, alloc, timings = [], [], []
+        for _ in range(args.repeats):
+            start = time.perf_counter()
+            batch, cpu_ms, peak_mb = host_cost(prepare, payloads)
+            predict_fn(batch)
+            timings.append((time.perf_counter() - start) * 1000 / len(payloads))
+            cpu.append(cpu_ms)
+            alloc.append(peak_mb)
+        input_mb = batch.nbytes / 1e6 if isinstance(batch, np.ndarray) else sum(map(len, batch)) / 1e6
+        print(f"{name:<8}{np.median(cpu):>17.2f}{np.median(alloc):>13.1f}{input_mb:>10.2f}{np.median(timings):>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+import argparse
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+from PIL import Image
+
+from benchmarks.common import make_stand_in_model
+
+
+# --- Benchmark Suite ---
+# python -m benchmarks.suite --output bench.json
+# python -m benchmarks.suite --output bench_baru.json --baseline bench.json
+# Sepenuhnya offline: model pengganti dengan arsitektur VGG16 (bobot acak, input 224x224x3,
+# output 4 kelas) dan gambar sintetis berbagai resolusi/format dibuat di --workdir.
+# Setiap pengukuran berjalan di subprocess sendiri agar cold start dan peak RSS bersih.
+RESOLUTIONS = ((640, 480), (1920, 1080), (4032, 3024))
+FORMATS = ("JPEG", "PNG", "WEBP")
+BATCH_SIZES = (1, 2, 4, 8, 16, 32, 64)
+STAGES = ("decode", "convert", "resize", "to_array", "predict")
+
+
+def make_images(workdir):
+    rng = np.random.default_rng(0)
+    paths = []
+    for width, height in RESOLUTIONS:
+        # Gradien + noise agar ukuran file terkompresi mendekati foto asli
+        y, x = np.mgrid[0:height, 0:width]
+        base = np.stack([x * 255 // width, y * 255 // height, (x + y) * 255 // (width + height)], axis=-1)
+        pixels = ((base + rng.integers(0, 24, size=base.shape)) % 256).astype(np.uint8)
+        for fmt in FORMATS:
+            path = os.path.join(workdir, f"{width}x{height}.{fmt.lower()}")
+            if not os.path.exists(path):
+                Image.fromarray(pixels).save(path, format=fmt, quality=90)
+            paths.append(path)
+    return paths
+
+
+def peak_rss_mb():
+    import resource
+
+    # ru_maxrss dalam KB di Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def percentiles(timings):
+    timings = np.array(timings) * 1000
+    return {
+        "mean_ms": float(timings.mean()),
+        "p50_ms": float(np.percentile(timings, 50)),
+        "p95_ms": float(np.percentile(timings, 95)),
+    }
+
+
+# --- Worker ---
+def cold_start_worker(args):
+    start = time.perf_counter()
+    import tensorflow as tf  # noqa: F401
+
+    from model_loader import load_keras_backend
+    imported = time.perf_counter()
+    load_keras_backend(args.model)
+    loaded = time.perf_counter()
+    return {"import_s": imported - start, "load_s": loaded - imported, "total_s": loaded - start, "rss_mb": peak_rss_mb()}
+
+
+def run_worker(args):
+    import tensorflow as tf
+
+    from model_loader import load_keras_backend
+    from preprocessing import decode_image, resize_image, to_rgb
+
+    backend = load_keras_backend(args.model)
+    result = {"tensorflow": tf.__version__, "stages": {}, "end_to_end": {}, "throughput": {}}
+
+    for path in args.images:
+        with open(path, "rb") as f:
+            data = f.read()
+        timings = {stage: [] for stage in STAGES}
+        totals = []
+        for _ in range(args.repeats):
+            start = time.perf_counter()
+            img = decode_image(io.BytesIO(data))
+            timings["decode"].append(time.perf_counter() - start)
+            t = time.perf_counter()
+            img = to_rgb(img)
+            timings["convert"].append(time.perf_counter() - t)
+            t = time.perf_counter()
+            img = resize_image(img)
+            timings["resize"].append(time.perf_counter() - t)
+            t = time.perf_counter()
+            img_array = np.expand_dims(np.asarray(img), axis=0)
+            timings["to_array"].append(time.perf_counter() - t)
+            t = time.perf_counter()
+            backend.predict_uint8(img_array)
+            timings["predict"].append(time.perf_counter() - t)
+            totals.append(time.perf_counter() - start)
+        name = os.path.basename(path)
+        result["stages"][name] = {stage: percentiles(values) for stage, values in timings.items()}
+        result["end_to_end"][name] = percentiles(totals)
+
+    rng = np.random.default_rng(0)
+    for batch_size in args.batch_sizes:
+        batch = rng.integers(0, 256, size=(batch_size, 224, 224, 3), dtype=np.uint8)
+        backend.predict_uint8(batch)  # trace/warmup untuk ukuran batch ini
+        repeats = max(2, args.repeats * 4 // batch_size)
+        start = time.perf_counter()
+        for _ in range(repeats):
+            backend.predict_uint8(batch)
+        result["throughput"][str(batch_size)] = {"images_per_s": batch_size * repeats / (time.perf_counter() - start)}
+
+    result["peak_rss_mb"] = peak_rss_mb()
+    return result
+
+
+def spawn_worker(mode, args, extra=()):
+    command = [sys.executable, "-m", "benchmarks.suite", "--worker", mode, "--model", args.model, "--repeats", str(args.repeats), *extra]
+    env = dict(os.environ, TF_CPP_MIN_LOG_LEVEL="2")
+    output = subprocess.run(command, env=env, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+# --- Baseline Comparison ---
+# Metrik *_ms, *_s, dan rss_mb: lebih kecil lebih baik; images_per_s: lebih besar lebih baik.
+# Latency yang berubah kurang dari min_delta_ms diabaikan agar tahap mikro (to_array,
+# convert) tidak memicu regresi palsu karena noise.
+def flatten(report, prefix=""):
+    values = {}
+    for key, value in report.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            values.update(flatten(value, f"{name}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            values[name] = value
+    return values
+
+
+def compare(current, baseline, tolerance, min_delta_ms=0.5):
+    regressions = []
+    current_values = flatten({k: v for k, v in current.items() if k != "meta"})
+    baseline_values = flatten({k: v for k, v in baseline.items() if k != "meta"})
+    for name, value in sorted(current_values.items()):
+        base = baseline_values.get(name)
+        if not base:
+            continue
+        change = (value - base) / base
+        higher_is_better = name.endswith("images_per_s")
+        delta_ms = abs(value - base) * (1000 if name.endswith("_s") else 1)
+        if not higher_is_better and name.endswith(("_ms", "_s")) and delta_ms < min_delta_ms:
+            continue
+        if (-change if higher_is_better else change) > tolerance:
+            regressions.append((name, base, value, change))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pipeline klasifikasi secara offline dan bandingkan dengan baseline.")
+    parser.add_argument("--workdir", default="bench_suite")
+    parser.add_argument("--model-size", choices=("vgg16", "tiny"), default="vgg16")
+    parser.add_argument("--model", help="Pakai model .keras ini alih-alih model pengganti")
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument("--cold-starts", type=int, default=3)
+    parser.add_argument("--batch-sizes", default=",".join(map(str, BATCH_SIZES)))
+    parser.add_argument("--output", default="bench.json")
+    parser.add_argument("--baseline", help="File hasil sebelumnya; regresi di atas --tolerance membuat exit code 1")
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    parser.add_argument("--min-delta-ms", type=float, default=0.5)
+    parser.add_argument("--worker", choices=("make-model", "cold", "run"), help=argparse.SUPPRESS)
+    parser.add_argument("--images", nargs="*", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    args.batch_sizes = [int(size) for size in args.batch_sizes.split(",")]
+
+    if args.worker == "make-model":
+        make_stand_in_model(args.model, args.model_size)
+        print(json.dumps({"model": args.model}))
+        return
+    if args.worker:
+        print(json.dumps(cold_start_worker(args) if args.worker == "cold" else run_worker(args)))
+        return
+
+    os.makedirs(args.workdir, exist_ok=True)
+    if not args.model:
+        args.model = os.path.join(args.workdir, f"stand_in_{args.model_size}.keras")
+        if not os.path.exists(args.model):
+            spawn_worker("make-model", args, ("--model-size", args.model_size))
+    images = make_images(args.workdir)
+
+    cold = [spawn_worker("cold", args) for _ in range(args.cold_starts)]
+    run = spawn_worker("run", args, ("--batch-sizes", ",".join(map(str, args.batch_sizes)), "--images", *images))
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "tensorflow": run.pop("tensorflow"),
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+            "model": os.path.basename(args.model),
+            "repeats": args.repeats,
+        },
+        # Median antar cold start agar satu outlier (cache disk dingin) tidak mendominasi
+        "cold_start": {key: float(np.median([row[key] for row in cold])) for key in cold[0]},
+        **run,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"Cold start        : import {report['cold_start']['import_s']:.2f} s + load {report['cold_start']['load_s']:.2f} s")
+    print(f"{'gambar':<18}{'decode':>8}{'resize':>8}{'predict':>9}{'total p50':>11}{'total p95':>11}")
+    for name, stages in report["stages"].items():
+        total = report["end_to_end"][name]
+        print(
+            f"{name:<18}{stages['decode']['p50_ms']:>8.1f}{stages['resize']['p50_ms']:>8.1f}"
+            f"{stages['predict']['p50_ms']:>9.1f}{total['p50_ms']:>11.1f}{total['p95_ms']:>11.1f}"
+        )
+    print("Throughput (img/s): " + "  ".join(f"b{size}={row['images_per_s']:.1f}" for size, row in report["throughput"].items()))
+    print(f"Peak RSS          : {report['peak_rss_mb']:.0f} MB (cold start {report['cold_start']['rss_mb']:.0f} MB)")
+    print(f"Hasil disimpan di {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("meta", {}).get("model") != report["meta"]["model"]:
+            print("Peringatan: baseline dibuat dengan model berbeda")
+        regressions = compare(report, baseline, args.tolerance, args.min_delta_ms)
+        if not regressions:
+            print(f"Tidak ada regresi di atas {args.tolerance:.0%} dibanding {args.baseline}")
+            return
+        print(f"\nRegresi di atas {args.tolerance:.0%} dibanding {args.baseline}:")
+        for name, base, value, change in regressions:
+            print(f"  {name:<50}{base:>10.2f} -> {value:>10.2f} ({change:+.0%})")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
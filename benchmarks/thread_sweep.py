@@ -0,0 +1,134 @@
+import argparse
+import itertools
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+
+# --- CPU Threading Sweep ---
+# python -m benchmarks.thread_sweep --model model_sampah_vgg16.keras --concurrency 4 --output cpu_profile.json
+# Setiap kombinasi dijalankan di subprocess terpisah karena pengaturan thread TensorFlow
+# dan oneDNN hanya bisa dipasang sekali sebelum runtime diinisialisasi.
+def run_worker(args):
+    import cpu_tuning
+
+    profile = cpu_tuning.load_profile()
+    cpu_tuning.apply_before_import(profile)
+
+    import numpy as np
+    import tensorflow as tf
+
+    tf.config.set_visible_devices([], "GPU")
+    cpu_tuning.apply_tf_threading(profile, tf)
+
+    from tensorflow.keras.models import load_model
+
+    from backends import INPUT_SHAPE, KerasBackend
+
+    backend = KerasBackend(load_model(args.model), artifact_path=args.model, warmup_batch_sizes=(args.batch_size,))
+    batch = np.random.rand(args.batch_size, *INPUT_SHAPE).astype(np.float32)
+    timings = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.duration
+
+    # Setiap thread mensimulasikan satu sesi yang terus mengirim gambar
+    def client():
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            backend.predict(batch)
+            elapsed = time.perf_counter() - start
+            with lock:
+                timings.append(elapsed)
+
+    started = time.perf_counter()
+    clients = [threading.Thread(target=client) for _ in range(args.concurrency)]
+    for thread in clients:
+        thread.start()
+    for thread in clients:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    timings = np.array(timings) * 1000
+    print(json.dumps({
+        "images_per_s": len(timings) * args.batch_size / wall,
+        "latency_p50_ms": float(np.percentile(timings, 50)),
+        "latency_p95_ms": float(np.percentile(timings, 95)),
+    }))
+
+
+def run_setting(args, intra, inter, onednn):
+    env = dict(
+        os.environ,
+        ECOSORT_INTRA_OP_THREADS=str(intra),
+        ECOSORT_INTER_OP_THREADS=str(inter),
+        ECOSORT_ONEDNN="1" if onednn else "0",
+        TF_CPP_MIN_LOG_LEVEL="2",
+    )
+    command = [
+        sys.executable, "-m", "benchmarks.thread_sweep", "--worker",
+        "--model", args.model,
+        "--concurrency", str(args.concurrency),
+        "--batch-size", str(args.batch_size),
+        "--duration", str(args.duration),
+    ]
+    result = subprocess.run(command, env=env, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    cpu_count = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count()
+    default_intra = sorted({1, 2, 4, cpu_count} & set(range(1, cpu_count + 1)))
+
+    parser = argparse.ArgumentParser(description="Sweep pengaturan thread CPU dan rekomendasikan profil.")
+    parser.add_argument("--model", default="model_sampah_vgg16.keras")
+    parser.add_argument("--intra", default=",".join(map(str, default_intra)))
+    parser.add_argument("--inter", default="1,2")
+    parser.add_argument("--onednn", default="1,0")
+    parser.add_argument("--concurrency", type=int, default=4, help="Jumlah sesi paralel yang disimulasikan")
+    parser.add_argument("--batch-size", type=int, default=1)
+    parser.add_argument("--duration", type=float, default=10.0, help="Durasi per pengaturan (detik)")
+    parser.add_argument("--output", help="Simpan profil rekomendasi sebagai JSON (untuk ECOSORT_CPU_PROFILE)")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args)
+        return
+
+    grid = itertools.product(
+        [int(v) for v in args.intra.split(",")],
+        [int(v) for v in args.inter.split(",")],
+        [v.strip() == "1" for v in args.onednn.split(",")],
+    )
+    results = []
+    print(f"{'intra':>6}{'inter':>6}{'onednn':>8}{'img/s':>9}{'p50 ms':>9}{'p95 ms':>9}")
+    for intra, inter, onednn in grid:
+        row = run_setting(args, intra, inter, onednn)
+        row.update(intra_op_threads=intra, inter_op_threads=inter, onednn=onednn)
+        results.append(row)
+        print(
+            f"{intra:>6}{inter:>6}{str(onednn):>8}{row['images_per_s']:>9.1f}"
+            f"{row['latency_p50_ms']:>9.1f}{row['latency_p95_ms']:>9.1f}"
+        )
+
+    # Throughput tertinggi di antara pengaturan yang p95-nya tidak lebih dari 1.5x p95 terbaik
+    best_p95 = min(row["latency_p95_ms"] for row in results)
+    candidates = [row for row in results if row["latency_p95_ms"] <= best_p95 * 1.5]
+    best = max(candidates, key=lambda row: row["images_per_s"])
+    profile = {
+        "intra_op_threads": best["intra_op_threads"],
+        "inter_op_threads": best["inter_op_threads"],
+        "onednn": best["onednn"],
+        "cpu_affinity": None,
+    }
+    print(f"\nRekomendasi profil: {json.dumps(profile)}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(profile, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+import argparse
+import io
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+from PIL import Image
+
+from benchmarks.decode import make_synthetic_corpus
+from preprocessing import IMAGE_SIZE, decode_image, iter_image_files, make_thumbnail, to_rgb
+
+# Batas lebar st.image (streamlit.elements.lib.image_utils.MAXIMUM_CONTENT_WIDTH * 2)
+ST_IMAGE_MAX_WIDTH = 1460
+
+
+# --- Benchmark: bytes gambar hasil ke browser ---
+# python -m benchmarks.thumbnails --images data/foto_asli --sizes 320,480,640
+# Membandingkan gambar yang dikirim ke panel hasil: file asli, payload efektif st.image
+# (foto lebih lebar dari 1460 px di-resize dan di-encode ulang JPEG q90), dan thumbnail
+# WebP/JPEG. Dilaporkan waktu server per gambar, bytes (base64 untuk data URI), waktu
+# decode gambar (proxy render browser), dan estimasi waktu transfer di jaringan seluler.
+def st_image_payload(data):
+    # Meniru st.image untuk file JPEG: gambar yang sudah cukup kecil dikirim apa adanya
+    img = Image.open(io.BytesIO(data))
+    if img.width <= ST_IMAGE_MAX_WIDTH:
+        return data
+    img = img.resize((ST_IMAGE_MAX_WIDTH, round(img.height * ST_IMAGE_MAX_WIDTH / img.width)))
+    buffer = io.BytesIO()
+    img.save(buffer, format="JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def thumbnail_payload(data, size, fmt, quality):
+    img = to_rgb(decode_image(io.BytesIO(data), fast=True, min_size=(max(IMAGE_SIZE[0], size),) * 2))
+    return make_thumbnail(img, size, fmt, quality)
+
+
+def measure(payload_fn, payloads, repeats):
+    encode_ms, decode_ms, sizes = [], [], []
+    for _ in range(repeats):
+        for data in payloads:
+            start = time.perf_counter()
+            output = payload_fn(data)
+            encode_ms.append((time.perf_counter() - start) * 1000)
+            start = time.perf_counter()
+            Image.open(io.BytesIO(output)).load()
+            decode_ms.append((time.perf_counter() - start) * 1000)
+            sizes.append(len(output))
+    return {
+        "server_ms": float(np.median(encode_ms)),
+        "client_decode_ms": float(np.median(decode_ms)),
+        "kb": float(np.mean(sizes)) / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bandingkan bytes dan latency gambar hasil: asli, st.image, thumbnail.")
+    parser.add_argument("--images", help="Folder foto berukuran asli; default foto sintetis 12 MP")
+    parser.add_argument("--sizes", default="320,480,640")
+    parser.add_argument("--formats", default="webp,jpeg")
+    parser.add_argument("--quality", type=int, default=80)
+    parser.add_argument("--links-mbps", default="1.5,5", help="Kecepatan downlink untuk estimasi transfer")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--output", help="Simpan hasil sebagai JSON")
+    args = parser.parse_args()
+
+    folder = args.images or make_synthetic_corpus(os.path.join(tempfile.gettempdir(), "bench_thumbnail_corpus"), count=4)
+    payloads = []
+    for path in iter_image_files(folder):
+        with open(path, "rb") as f:
+            payloads.append(f.read())
+    if not payloads:
+        raise SystemExit(f"Tidak ada gambar di {folder}")
+
+    # (nama, fungsi payload, dikirim inline sebagai base64)
+    variants = [("asli", lambda data: data, False), (f"st.image ({ST_IMAGE_MAX_WIDTH} px)", st_image_payload, False)]
+    for fmt in args.formats.split(","):
+        for size in [int(s) for s in args.sizes.split(",")]:
+            variants.append((f"{fmt} {size} px", lambda data, size=size, fmt=fmt: thumbnail_payload(data, size, fmt, args.quality), True))
+
+    links = [float(s) for s in args.links_mbps.split(",")]
+    header = "".join(f"{f'{mbps:g} Mbps':>11}" for mbps in links)
+    print(f"{len(payloads)} gambar, rata-rata {np.mean([len(d) for d in payloads]) / 1024:.0f} KB")
+    print(f"{'varian':<22}{'server ms':>10}{'KB':>9}{'base64 KB':>11}{'decode ms':>11}{header}")
+    results = []
+    for name, payload_fn, inline in variants:
+        row = {"variant": name, **measure(payload_fn, payloads, args.repeats)}
+        row["base64_kb"] = row["kb"] * 4 / 3
+        # Thumbnail dikirim sebagai data URI lewat websocket; st.image lewat endpoint media biner
+        wire_kb = row["base64_kb"] if inline else row["kb"]
+        row["transfer_ms"] = {f"{mbps:g}": wire_kb * 1024 * 8 / (mbps * 1e6) * 1000 for mbps in links}
+        results.append(row)
+        transfer = "".join(f"{row['transfer_ms'][f'{mbps:g}']:>11.0f}" for mbps in links)
+        print(
+            f"{name:<22}{row['server_ms']:>10.1f}{row['kb']:>9.1f}{row['base64_kb']:>11.1f}"
+            f"{row['client_decode_ms']:>11.1f}{transfer}"
+        )
+    print("transfer dalam ms; thumbnail dihitung dengan ukuran base64")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import uuid
+
+import numpy as np
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+from tornado.httpclient import AsyncHTTPClient, HTTPRequest
+from tornado.websocket import websocket_connect
+
+
+# --- Benchmark: biaya server per interaksi UI ---
+# python -m benchmarks.ui_interactions --image data/uji/botol.jpg --repeats 10
+# Menjalankan `streamlit run app.py` lalu berperan sebagai browser lewat websocket: klik
+# "Aktifkan Kamera", kirim foto kamera, dan upload dari galeri. Per interaksi diukur CPU
+# proses server (user + system) dan bytes yang dikirim ke browser (websocket + gambar media).
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def cpu_seconds(pid):
+    with open(f"/proc/{pid}/stat", encoding="utf-8") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    # utime dan stime (field 14 dan 15), dalam clock tick
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+class BrowserSession:
+    def __init__(self, base_url):
+        self.base_url = base_url
+        self.http = AsyncHTTPClient()
+        self.widgets = {}
+        self.fragments = {}
+        self.cached_hashes = set()
+        self.session_id = None
+        self.xsrf = None
+        self._ws = None
+
+    async def connect(self):
+        # Upload file dilindungi XSRF; cookie-nya juga dipasang oleh endpoint health
+        response = await self.http.fetch(self.base_url + "/_stcore/health")
+        for cookie in response.headers.get_list("Set-Cookie"):
+            if cookie.startswith("_streamlit_xsrf="):
+                self.xsrf = cookie.split(";", 1)[0].split("=", 1)[1]
+        self._ws = await websocket_connect(self.base_url.replace("http", "ws", 1) + "/_stcore/stream")
+
+    def find_widget(self, key):
+        return next(widget_id for widget_id in self.fragments if widget_id.endswith(f"-{key}"))
+
+    async def rerun(self, fragment_id="", triggers=()):
+        msg = BackMsg()
+        state = msg.rerun_script
+        state.page_script_hash = ""
+        state.fragment_id = fragment_id
+        state.cached_message_hashes.extend(self.cached_hashes)
+        state.widget_states.widgets.extend(self.widgets.values())
+        for widget_id in triggers:
+            trigger = state.widget_states.widgets.add()
+            trigger.id = widget_id
+            trigger.trigger_value = True
+        await self._ws.write_message(msg.SerializeToString(), binary=True)
+        return await self._receive(fragment_id)
+
+    async def click(self, key):
+        widget_id = self.find_widget(key)
+        return await self.rerun(self.fragments[widget_id], triggers=[widget_id])
+
+    async def upload(self, key, path):
+        widget_id = self.find_widget(key)
+        with open(path, "rb") as f:
+            data = f.read()
+        # Alur browser: minta URL upload, PUT file, lalu rerun dengan state widget baru
+        request = BackMsg()
+        request.file_urls_request.request_id = uuid.uuid4().hex
+        request.file_urls_request.file_names.append(os.path.basename(path))
+        request.file_urls_request.session_id = self.session_id
+        await self._ws.write_message(request.SerializeToString(), binary=True)
+        while True:
+            response = ForwardMsg()
+            response.ParseFromString(await self._ws.read_message())
+            if response.WhichOneof("type") == "file_urls_response":
+                file_urls = response.file_urls_response.file_urls[0]
+                break
+        boundary = uuid.uuid4().hex
+        body = (
+            f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"{os.path.basename(path)}\"\r\n"
+            f"Content-Type: image/jpeg\r\n\r\n"
+        ).encode() + data + f"\r\n--{boundary}--\r\n".encode()
+        await self.http.fetch(HTTPRequest(
+            self.base_url + file_urls.upload_url, method="PUT", body=body,
+            headers={
+                "Content-Type": f"multipart/form-data; boundary={boundary}",
+                "Cookie": f"_streamlit_xsrf={self.xsrf}",
+                "X-Xsrftoken": self.xsrf,
+            },
+        ))
+        state = WidgetState(id=widget_id)
+        info = state.file_uploader_state_value.uploaded_file_info.add()
+        info.file_id = file_urls.file_id
+        info.name = os.path.basename(path)
+        info.size = len(data)
+        info.file_urls.CopyFrom(file_urls)
+        self.widgets[widget_id] = state
+        return await self.rerun(self.fragments[widget_id])
+
+    async def _receive(self, fragment_id):
+        sent = 0
+        media = []
+        widgets = {}
+        while True:
+            raw = await self._ws.read_message()
+            sent += len(raw)
+            msg = ForwardMsg()
+            msg.ParseFromString(raw)
+            if msg.metadata.cacheable:
+                self.cached_hashes.add(msg.hash)
+            kind = msg.WhichOneof("type")
+            if kind == "new_session" and msg.new_session.initialize.session_id:
+                self.session_id = msg.new_session.initialize.session_id
+            elif kind == "delta" and msg.delta.WhichOneof("type") == "new_element":
+                element = msg.delta.new_element
+                element_type = element.WhichOneof("type")
+                if element_type in ("button", "file_uploader", "camera_input"):
+                    widgets[getattr(element, element_type).id] = msg.delta.fragment_id
+                elif element_type == "imgs":
+                    media.extend(img.url for img in element.imgs.imgs if img.url.startswith("/media"))
+            elif kind == "script_finished":
+                status = ForwardMsg.ScriptFinishedStatus.Name(msg.script_finished)
+                if status in ("FINISHED_SUCCESSFULLY", "FINISHED_FRAGMENT_RUN_SUCCESSFULLY"):
+                    break
+        # Seperti browser: state widget yang tidak digambar lagi pada run ini dibuang
+        for widget_id, widget_fragment in list(self.fragments.items()):
+            if widget_id not in widgets and (not fragment_id or widget_fragment == fragment_id):
+                self.fragments.pop(widget_id)
+                self.widgets.pop(widget_id, None)
+        self.fragments.update(widgets)
+        for url in media:
+            response = await self.http.fetch(self.base_url + url)
+            sent += len(response.body)
+        return sent
+
+
+async def drive(base_url, pid, image, repeats):
+    session = BrowserSession(base_url)
+    await session.connect()
+    results = {"load": [], "camera_on": [], "camera_capture": [], "upload": []}
+
+    async def measure(name, action):
+        start = cpu_seconds(pid)
+        sent = await action
+        results[name].append({"cpu_ms": (cpu_seconds(pid) - start) * 1000, "bytes": sent})
+
+    await measure("load", session.rerun())
+    for _ in range(repeats + 1):
+        await measure("camera_on", session.click("camera_btn"))
+        await measure("camera_capture", session.upload("camera_input", image))
+    for _ in range(repeats + 1):
+        await measure("upload", session.upload("file_uploader", image))
+    # Iterasi pertama kamera/upload menyertakan warmup (inferensi pertama, cache kosong)
+    return {
+        name: {
+            "runs": len(rows) if name == "load" else len(rows) - 1,
+            "cpu_ms": float(np.median([row["cpu_ms"] for row in (rows if name == "load" else rows[1:])])),
+            "bytes": float(np.median([row["bytes"] for row in (rows if name == "load" else rows[1:])])),
+        }
+        for name, rows in results.items()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ukur CPU server dan bytes terkirim per interaksi UI Streamlit.")
+    parser.add_argument("--app", default="app.py")
+    parser.add_argument("--image", required=True, help="Gambar yang dipakai untuk foto kamera dan upload")
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument("--output", help="Simpan hasil sebagai JSON")
+    args = parser.parse_args()
+
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", args.app, "--server.headless", "true", "--server.port", str(port),
+         "--browser.gatherUsageStats", "false"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        loop = asyncio.new_event_loop()
+        for _ in range(600):
+            try:
+                loop.run_until_complete(AsyncHTTPClient().fetch(base_url + "/_stcore/health"))
+                break
+            except Exception:
+                time.sleep(0.5)
+        results = loop.run_until_complete(drive(base_url, server.pid, args.image, args.repeats))
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(f"{'interaksi':<16}{'CPU server (ms)':>16}{'bytes terkirim':>16}")
+    for name, row in results.items():
+        print(f"{name:<16}{row['cpu_ms']:>16.1f}{row['bytes']:>16.0f}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
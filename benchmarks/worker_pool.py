@@ -0,0 +1,98 @@
+import argparse
+import io
+import json
+import threading
+import time
+
+import numpy as np
+from PIL import Image
+
+import config
+from preprocessing import iter_image_files
+from worker_pool import WorkerPool
+
+
+# --- Benchmark: throughput dan memori vs jumlah worker ---
+# python -m benchmarks.worker_pool --workers 1,2,4,8 --backend tflite-float
+# Bandingkan ECOSORT_TFLITE_XNNPACK=0/1 dan --backend keras dengan menjalankan ulang
+# perintah ini; pengaturan dibaca oleh forkserver sekali per proses benchmark.
+def synthetic_payloads(count=16, size=(1280, 960)):
+    rng = np.random.default_rng(0)
+    payloads = []
+    for _ in range(count):
+        buffer = io.BytesIO()
+        Image.fromarray(rng.integers(0, 256, size=(size[1], size[0], 3), dtype=np.uint8)).save(buffer, format="JPEG", quality=85)
+        payloads.append(buffer.getvalue())
+    return payloads
+
+
+def run(pool, payloads, requests, in_flight):
+    slots = threading.Semaphore(in_flight)
+    done = threading.Event()
+    remaining = [requests]
+    lock = threading.Lock()
+
+    def release(_):
+        slots.release()
+        with lock:
+            remaining[0] -= 1
+            if remaining[0] == 0:
+                done.set()
+
+    start = time.perf_counter()
+    for i in range(requests):
+        slots.acquire()
+        pool.submit(payloads[i % len(payloads)]).add_done_callback(release)
+    done.wait()
+    return requests / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ukur throughput dan RSS/PSS per worker untuk worker pool.")
+    parser.add_argument("--workers", default="1,2,4")
+    parser.add_argument("--backend", default=config.POOL_BACKEND)
+    parser.add_argument("--images", help="Folder gambar; default gambar JPEG sintetis 1280x960")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--output", help="Simpan hasil sebagai JSON")
+    args = parser.parse_args()
+
+    payloads = synthetic_payloads()
+    if args.images:
+        payloads = []
+        for path in iter_image_files(args.images):
+            with open(path, "rb") as f:
+                payloads.append(f.read())
+
+    results = []
+    print(f"backend {args.backend}, xnnpack {config.TFLITE_XNNPACK}")
+    print(f"{'workers':>8}{'img/s':>9}{'RSS/worker':>12}{'PSS/worker':>12}{'privat/worker':>15}{'PSS total':>11}")
+    for workers in [int(n) for n in args.workers.split(",")]:
+        pool = WorkerPool(args.backend, workers)
+        pool.wait_ready()
+        # Tunggu semua worker siap lalu warmup agar arena interpreter sudah dialokasikan
+        while pool.stats()["ready_workers"] < workers:
+            time.sleep(0.1)
+        run(pool, payloads, workers * 4, workers * 2)
+        throughput = run(pool, payloads, args.requests, workers * 2)
+        stats = pool.stats()
+        pool.close()
+        row = {
+            "workers": workers,
+            "images_per_s": throughput,
+            "rss_per_worker_mb": stats["rss_per_worker_mb"],
+            "pss_per_worker_mb": stats["pss_per_worker_mb"],
+            "private_per_worker_mb": stats["private_per_worker_mb"],
+            "pss_total_mb": stats["pss_per_worker_mb"] * workers,
+        }
+        results.append(row)
+        print(
+            f"{workers:>8}{throughput:>9.1f}{row['rss_per_worker_mb']:>12.0f}{row['pss_per_worker_mb']:>12.0f}"
+            f"{row['private_per_worker_mb']:>15.0f}{row['pss_total_mb']:>11.0f}"
+        )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"backend": args.backend, "xnnpack": config.TFLITE_XNNPACK, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+import argparse
+import json
+import time
+
+import numpy as np
+import tensorflow as tf
+
+import config
+from backends import INPUT_SHAPE, CascadeBackend
+from labels import class_labels
+from model_loader import MODEL_PATH, load_backend, load_keras_backend
+from preprocessing import iter_labeled_images, preprocess_image_uint8
+
+
+# --- Cascade Tools ---
+# python cascade.py train --data data/latih --output model_cascade_mobilenet.keras
+# python cascade.py tune --data data/uji --first-stage model_cascade_mobilenet.keras --target-accuracy 0.9
+# Model tahap pertama menerima input yang sama dengan model utama (float 0..1, 224x224)
+# sehingga bisa dimuat oleh load_ml_model dan backend keras tanpa perubahan.
+CASCADE_MODEL_PATH = "model_cascade_mobilenet.keras"
+
+
+def build_first_stage(weights="imagenet", dropout=0.2):
+    inputs = tf.keras.Input(INPUT_SHAPE)
+    # MobileNetV3 membawa preprocessing sendiri yang mengharapkan piksel 0..255
+    x = tf.keras.layers.Rescaling(255.0)(inputs)
+    base = tf.keras.applications.MobileNetV3Small(
+        input_shape=INPUT_SHAPE, include_top=False, weights=weights, pooling="avg", include_preprocessing=True
+    )
+    base.trainable = False
+    x = base(x, training=False)
+    x = tf.keras.layers.Dropout(dropout)(x)
+    outputs = tf.keras.layers.Dense(len(class_labels), activation="softmax")(x)
+    return tf.keras.Model(inputs, outputs, name="cascade_first_stage")
+
+
+def labeled_dataset(samples, batch_size, shuffle=False):
+    paths = [path for path, _ in samples]
+    labels = [class_idx for _, class_idx in samples]
+
+    def load(path):
+        return preprocess_image_uint8(path.decode()).astype(np.float32) / 255.0
+
+    dataset = tf.data.Dataset.from_tensor_slices((paths, labels))
+    if shuffle:
+        dataset = dataset.shuffle(len(paths), seed=0)
+    dataset = dataset.map(
+        lambda path, label: (tf.ensure_shape(tf.numpy_function(load, [path], tf.float32), INPUT_SHAPE), label),
+        num_parallel_calls=tf.data.AUTOTUNE,
+    )
+    return dataset.batch(batch_size).prefetch(tf.data.AUTOTUNE)
+
+
+def train(args):
+    samples = list(iter_labeled_images(args.data))
+    if not samples:
+        raise SystemExit(f"Tidak ada gambar berlabel di {args.data}")
+    rng = np.random.default_rng(0)
+    order = rng.permutation(len(samples))
+    split = max(1, int(len(samples) * args.validation_split))
+    validation = [samples[i] for i in order[:split]]
+    training = [samples[i] for i in order[split:]]
+
+    model = build_first_stage(weights=None if args.weights == "none" else args.weights)
+    model.compile(optimizer=tf.keras.optimizers.Adam(args.learning_rate), loss="sparse_categorical_crossentropy", metrics=["accuracy"])
+    model.fit(
+        labeled_dataset(training, args.batch_size, shuffle=True),
+        validation_data=labeled_dataset(validation, args.batch_size),
+        epochs=args.epochs,
+    )
+    model.save(args.output)
+    print(f"Model tahap pertama disimpan di {args.output}")
+
+
+# --- Threshold Tuning ---
+def predict_all(backend, images, batch_size):
+    return np.concatenate([backend.predict_uint8(images[i:i + batch_size]) for i in range(0, len(images), batch_size)])
+
+
+def cascade_accuracy(first, second, labels, threshold):
+    early = first.max(axis=1) >= threshold
+    predicted = np.where(early, first.argmax(axis=1), second.argmax(axis=1))
+    return float((predicted == labels).mean()), float(early.mean())
+
+
+def pick_threshold(first, second, labels, target_accuracy):
+    # Threshold terendah (early exit terbanyak) yang masih memenuhi target akurasi
+    for threshold in np.unique(np.concatenate([first.max(axis=1), [1.0 + 1e-6]])):
+        accuracy, early_exit = cascade_accuracy(first, second, labels, threshold)
+        if accuracy >= target_accuracy:
+            return float(threshold), accuracy, early_exit
+    return None, None, None
+
+
+def latency(predict_fn, images, repeats):
+    # Satu gambar per panggilan, seperti alur predict_image di app
+    predict_fn(images[:1])
+    timings = []
+    for _ in range(repeats):
+        for img in images:
+            start = time.perf_counter()
+            predict_fn(img[np.newaxis])
+            timings.append(time.perf_counter() - start)
+    timings = np.array(timings) * 1000
+    return {
+        "mean_ms": float(timings.mean()),
+        "p50_ms": float(np.percentile(timings, 50)),
+        "p95_ms": float(np.percentile(timings, 95)),
+        "p99_ms": float(np.percentile(timings, 99)),
+    }
+
+
+def tune(args):
+    samples = list(iter_labeled_images(args.data))
+    if not samples:
+        raise SystemExit(f"Tidak ada gambar berlabel di {args.data}")
+    labels = np.array([class_idx for _, class_idx in samples])
+    images = np.stack([preprocess_image_uint8(path) for path, _ in samples])
+
+    first_backend = load_keras_backend(args.first_stage)
+    second_backend = load_backend(args.backend, args.model, cascade_model_path="")
+    first = predict_all(first_backend, images, args.batch_size)
+    second = predict_all(second_backend, images, args.batch_size)
+
+    second_accuracy = float((second.argmax(axis=1) == labels).mean())
+    target = args.target_accuracy if args.target_accuracy is not None else second_accuracy - args.max_drop
+    threshold, accuracy, early_exit = pick_threshold(first, second, labels, target)
+    if threshold is None:
+        raise SystemExit(f"Target akurasi {target:.3f} tidak tercapai bahkan tanpa early exit")
+
+    print(f"Akurasi model utama      : {second_accuracy:.3f}")
+    print(f"Akurasi tahap pertama    : {float((first.argmax(axis=1) == labels).mean()):.3f}")
+    print(f"{'threshold':>10}{'akurasi':>9}{'early exit':>12}")
+    for candidate in (0.5, 0.6, 0.7, 0.8, 0.9, 0.95, 0.99):
+        candidate_accuracy, candidate_exit = cascade_accuracy(first, second, labels, candidate)
+        print(f"{candidate:>10.2f}{candidate_accuracy:>9.3f}{candidate_exit:>12.1%}")
+
+    cascade = CascadeBackend(first_backend, second_backend, threshold)
+    report = {
+        "images": len(samples),
+        "target_accuracy": target,
+        "threshold": threshold,
+        "accuracy": accuracy,
+        "early_exit_rate": early_exit,
+        "second_stage_accuracy": second_accuracy,
+        "latency_cascade": latency(cascade.predict_uint8, images, args.repeats),
+        "latency_second_stage": latency(second_backend.predict_uint8, images, args.repeats),
+    }
+    print(
+        f"Threshold terpilih {threshold:.4f}: akurasi {accuracy:.3f}, early exit {early_exit:.1%}\n"
+        f"Latency cascade    : mean {report['latency_cascade']['mean_ms']:.1f} ms, "
+        f"p95 {report['latency_cascade']['p95_ms']:.1f} ms, p99 {report['latency_cascade']['p99_ms']:.1f} ms\n"
+        f"Latency model utama: mean {report['latency_second_stage']['mean_ms']:.1f} ms, "
+        f"p95 {report['latency_second_stage']['p95_ms']:.1f} ms, p99 {report['latency_second_stage']['p99_ms']:.1f} ms"
+    )
+    print(f"Pakai dengan: ECOSORT_CASCADE_MODEL={args.first_stage} ECOSORT_CASCADE_THRESHOLD={threshold:.4f}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latih dan tuning cascade early-exit EcoSort AI.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("train", help="Latih model tahap pertama (MobileNetV3-Small + head)")
+    p.add_argument("--data", required=True, help="Folder gambar berlabel")
+    p.add_argument("--output", default=CASCADE_MODEL_PATH)
+    p.add_argument("--weights", default="imagenet", help="Bobot awal backbone, atau 'none'")
+    p.add_argument("--epochs", type=int, default=5)
+    p.add_argument("--batch-size", type=int, default=32)
+    p.add_argument("--learning-rate", type=float, default=1e-3)
+    p.add_argument("--validation-split", type=float, default=0.1)
+    p.set_defaults(func=train)
+
+    p = sub.add_parser("tune", help="Pilih threshold untuk target akurasi dan laporkan early exit serta latency")
+    p.add_argument("--data", required=True, help="Folder gambar berlabel (bukan data latih)")
+    p.add_argument("--first-stage", default=config.CASCADE_MODEL_PATH or CASCADE_MODEL_PATH)
+    p.add_argument("--model", default=MODEL_PATH)
+    p.add_argument("--backend", default=config.BACKEND)
+    p.add_argument("--target-accuracy", type=float, help="Default: akurasi model utama dikurangi --max-drop")
+    p.add_argument("--max-drop", type=float, default=0.01)
+    p.add_argument("--batch-size", type=int, default=32)
+    p.add_argument("--repeats", type=int, default=3)
+    p.add_argument("--output", help="Simpan laporan sebagai JSON")
+    p.set_defaults(func=tune)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+import argparse
+import csv
+import glob
+import itertools
+import json
+import multiprocessing
+import os
+import resource
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+import config
+from labels import class_labels
+from preprocessing import iter_image_files, preprocess_image_uint8
+
+
+# --- Headless Batch Classification ---
+# python classify.py data/arsip --output hasil.jsonl --batch-size 32 --workers 8
+# Output .jsonl, .csv, atau .parquet (direktori berisi part file). Checkpoint disimpan di
+# <output>.ckpt; jalankan ulang dengan --resume untuk melanjutkan setelah crash.
+def iter_inputs(inputs):
+    for item in inputs:
+        if os.path.isdir(item):
+            yield from iter_image_files(item)
+        else:
+            yield from iter_glob(item)
+
+
+def iter_glob(pattern):
+    # Seperti glob recursive=True, tetapi diekspansi per komponen path dengan glob stdlib dan
+    # setiap direktori diurutkan sendiri (seperti iter_image_files): urutan deterministik untuk
+    # checkpoint tanpa memuat seluruh hasil glob ke memori sebelum gambar pertama diproses
+    base, parts = pattern, []
+    while glob.has_magic(base):
+        base, part = os.path.split(base)
+        parts.insert(0, part)
+    if not parts:
+        if os.path.lexists(pattern):
+            yield pattern
+        return
+    yield from _expand(base, parts)
+
+
+def _expand(base, parts):
+    if not parts:
+        yield base
+        return
+    part, rest = parts[0], parts[1:]
+    if part == "**":
+        # Nol direktori atau lebih; "**" di akhir pola cocok dengan semua isi direktori
+        for directory in _walk_sorted(base):
+            yield from _expand(directory, rest or ["*"])
+        return
+    for path in sorted(glob.glob(os.path.join(glob.escape(base), part))):
+        if not rest or os.path.isdir(path):
+            yield from _expand(path, rest)
+
+
+def _walk_sorted(base):
+    # Seperti "**" di glob: direktori berawalan "." dilewati
+    for root, dirs, _ in os.walk(base or os.curdir):
+        dirs[:] = sorted(name for name in dirs if not name.startswith("."))
+        if base:
+            yield root
+        else:
+            yield "" if root == os.curdir else os.path.relpath(root)
+
+
+def load_for_model(path):
+    # Dijalankan di worker pool: decode + resize, hasil uint8 agar ringan dikirim antar proses
+    try:
+        return path, preprocess_image_uint8(path), None
+    except Exception as e:
+        return path, None, str(e)
+
+
+def prefetch(executor, paths, window):
+    # Seperti executor.map, tetapi hanya `window` tugas yang berjalan sekaligus sehingga
+    # daftar file tidak pernah dimuat seluruhnya ke memori
+    pending = deque()
+    for path in paths:
+        pending.append(executor.submit(load_for_model, path))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+# --- Output Writers ---
+# durable() mengembalikan state untuk checkpoint ketika semua baris sudah aman di disk,
+# atau None jika baris masih di buffer.
+class LineWriter:
+    def __init__(self, path, fmt, offset=0):
+        self.fmt = fmt
+        if offset and (not os.path.exists(path) or os.path.getsize(path) < offset):
+            # seek + truncate akan mengisi selisihnya dengan byte NUL
+            raise ValueError(f"Output {path} hilang atau lebih pendek dari checkpoint; jalankan ulang tanpa --resume")
+        self._file = open(path, "r+" if offset else "w", encoding="utf-8", newline="")
+        # Buang baris yang ditulis setelah checkpoint terakhir
+        self._file.seek(offset)
+        self._file.truncate()
+        self._csv = None
+        if fmt == "csv":
+            self._csv = csv.writer(self._file)
+            if offset == 0:
+                self._csv.writerow(["path", "label", "confidence", "error", *[f"prob_{i}" for i in sorted(class_labels)]])
+
+    def write(self, rows):
+        for row in rows:
+            if self._csv is not None:
+                self._csv.writerow([row["path"], row["label"], row["confidence"], row["error"], *row["probabilities"]])
+            else:
+                self._file.write(json.dumps(row) + "\n")
+
+    def durable(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return {"offset": self._file.tell()}
+
+    def close(self):
+        state = self.durable()
+        self._file.close()
+        return state
+
+
+class ParquetPartWriter:
+    def __init__(self, path, parts=0, rows_per_part=10000):
+        self.path = path
+        self.parts = parts
+        self.rows_per_part = rows_per_part
+        self._rows = []
+        os.makedirs(path, exist_ok=True)
+
+    def write(self, rows):
+        self._rows.extend(rows)
+
+    def durable(self):
+        if len(self._rows) < self.rows_per_part:
+            return None
+        self._flush()
+        return {"parts": self.parts}
+
+    def close(self):
+        if self._rows:
+            self._flush()
+        return {"parts": self.parts}
+
+    def _flush(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        part_path = os.path.join(self.path, f"part-{self.parts:05d}.parquet")
+        pq.write_table(pa.Table.from_pylist(self._rows), f"{part_path}.tmp")
+        os.replace(f"{part_path}.tmp", part_path)
+        self.parts += 1
+        self._rows = []
+
+
+def open_writer(path, fmt, state, rows_per_part):
+    if fmt == "parquet":
+        return ParquetPartWriter(path, parts=state.get("parts", 0), rows_per_part=rows_per_part)
+    return LineWriter(path, fmt, offset=state.get("offset", 0))
+
+
+# --- Checkpoint ---
+def load_checkpoint(path):
+    if not os.path.exists(path):
+        return {"processed": 0}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_checkpoint(path, state):
+    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(f"{path}.tmp", path)
+
+
+def to_row(path, probabilities, error):
+    if probabilities is None:
+        return {"path": path, "label": None, "confidence": None, "error": error, "probabilities": [None] * len(class_labels)}
+    idx = int(np.argmax(probabilities))
+    return {
+        "path": path,
+        "label": class_labels.get(idx, "Tidak Diketahui"),
+        "confidence": float(probabilities[idx] * 100),
+        "error": None,
+        "probabilities": [float(p) for p in probabilities],
+    }
+
+
+def classify_batch(backend, items, batch_size):
+    valid = [array for _, array, _ in items if array is not None]
+    probabilities = iter(())
+    if valid:
+        # Buffer uint8 dikirim langsung; rescale dilakukan di dalam graph
+        batch = np.stack(valid)
+        # Batch terakhir di-padding agar model selalu menerima ukuran batch yang sama
+        if len(batch) < batch_size:
+            batch = np.concatenate([batch, np.zeros((batch_size - len(batch), *batch.shape[1:]), dtype=batch.dtype)])
+        probabilities = iter(backend.predict_uint8(batch)[:len(valid)])
+    return [
+        to_row(path, next(probabilities) if array is not None else None, error)
+        for path, array, error in items
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Klasifikasi gambar sampah secara batch tanpa UI.")
+    parser.add_argument("inputs", nargs="+", help="Direktori atau pola glob gambar")
+    parser.add_argument("--output", required=True)
+    parser.add_argument("--format", choices=("jsonl", "csv", "parquet"), help="Default: dari ekstensi --output")
+    parser.add_argument("--backend", default=config.BACKEND)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--processes", action="store_true", help="Decode di process pool, bukan thread pool")
+    parser.add_argument("--rows-per-part", type=int, default=10000, help="Baris per part file Parquet")
+    parser.add_argument("--checkpoint", help="Default: <output>.ckpt")
+    parser.add_argument("--resume", action="store_true")
+    args = parser.parse_args()
+
+    fmt = args.format or os.path.splitext(args.output)[1].lstrip(".").lower()
+    if fmt not in ("jsonl", "csv", "parquet"):
+        parser.error("Format output tidak dikenal; gunakan --format jsonl/csv/parquet")
+    checkpoint_path = args.checkpoint or f"{args.output.rstrip(os.sep)}.ckpt"
+    state = load_checkpoint(checkpoint_path) if args.resume else {"processed": 0}
+
+    # Import di sini agar worker process pool tidak ikut memuat TensorFlow
+    from model_loader import load_backend
+
+    backend = load_backend(args.backend)
+    try:
+        writer = open_writer(args.output, fmt, state, args.rows_per_part)
+    except ValueError as e:
+        parser.error(str(e))
+
+    paths = itertools.islice(iter_inputs(args.inputs), state["processed"], None)
+    if args.processes:
+        # spawn: worker tidak mewarisi state TensorFlow dari proses induk
+        executor = ProcessPoolExecutor(max_workers=args.workers, mp_context=multiprocessing.get_context("spawn"))
+    else:
+        executor = ThreadPoolExecutor(max_workers=args.workers)
+    processed = state["processed"]
+    started_at = processed
+    start = time.perf_counter()
+
+    with executor:
+        loaded = prefetch(executor, paths, window=args.batch_size * 2)
+        while True:
+            items = list(itertools.islice(loaded, args.batch_size))
+            if not items:
+                break
+            writer.write(classify_batch(backend, items, args.batch_size))
+            processed += len(items)
+            durable_state = writer.durable()
+            if durable_state is not None:
+                save_checkpoint(checkpoint_path, {"processed": processed, **durable_state})
+
+    save_checkpoint(checkpoint_path, {"processed": processed, **writer.close()})
+    elapsed = time.perf_counter() - start
+
+    # ru_maxrss dalam KB di Linux
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    peak_rss_children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    count = processed - started_at
+    print(f"Gambar diproses : {count} (total {processed})")
+    print(f"Throughput      : {count / elapsed if elapsed else 0:.1f} gambar/s")
+    print(f"Peak RSS        : {peak_rss:.0f} MB (worker: {peak_rss_children:.0f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+import os
+
+
+# --- Helpers ---
+def _env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value not in (None, "") else default
+
+
+def _env_float(name, default):
+    value = os.environ.get(name)
+    return float(value) if value not in (None, "") else default
+
+
+def _env_bool(name, default):
+    value = os.environ.get(name)
+    if value in (None, ""):
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _env_optional_bool(name):
+    value = os.environ.get(name)
+    return None if value in (None, "") else _env_bool(name, False)
+
+
+def _env_int_list(name, default):
+    value = os.environ.get(name)
+    if value in (None, ""):
+        return default
+    return tuple(int(item) for item in value.split(",") if item.strip())
+
+
+# --- Model Artifact ---
+# Kosong = model_sampah_vgg16.keras (diunduh dari Google Drive jika belum ada); path lain,
+# mis. student hasil distill.py, dipakai apa adanya tanpa unduhan
+MODEL_PATH = os.environ.get("ECOSORT_MODEL_PATH", "")
+
+# --- Model Store ---
+# Store artefak terverifikasi (kosong = perilaku lama: unduh dari Google Drive).
+# Sumber berupa direktori lokal atau URL mirror; interval 0 menonaktifkan hot reload.
+MODEL_STORE_DIR = os.environ.get("ECOSORT_MODEL_STORE", "")
+MODEL_SOURCE = os.environ.get("ECOSORT_MODEL_SOURCE", "")
+MODEL_VERSION = os.environ.get("ECOSORT_MODEL_VERSION", "")
+MODEL_VERIFY_FULL = _env_bool("ECOSORT_MODEL_VERIFY_FULL", False)
+MODEL_RELOAD_INTERVAL = _env_float("ECOSORT_MODEL_RELOAD_INTERVAL", 30.0)
+
+# --- CPU Threading ---
+# File profil JSON (mis. hasil benchmarks.thread_sweep); env di bawah menimpa isinya
+CPU_PROFILE = os.environ.get("ECOSORT_CPU_PROFILE", "")
+INTRA_OP_THREADS = _env_int("ECOSORT_INTRA_OP_THREADS", None)
+INTER_OP_THREADS = _env_int("ECOSORT_INTER_OP_THREADS", None)
+ONEDNN = _env_optional_bool("ECOSORT_ONEDNN")
+CPU_AFFINITY = os.environ.get("ECOSORT_CPU_AFFINITY", "")
+
+# --- Decode ---
+# Decode JPEG langsung pada resolusi rendah (draft/DCT scaling) + orientasi EXIF;
+# PNG selalu memakai jalur decode biasa. Filter resize: nearest, bilinear, bicubic, lanczos, box, hamming
+FAST_DECODE = _env_bool("ECOSORT_FAST_DECODE", True)
+RESAMPLE_FILTER = os.environ.get("ECOSORT_RESAMPLE_FILTER", "bicubic")
+
+# --- Intake Budget ---
+# Diperiksa sebelum decode: ukuran file, dimensi di header, dan piksel yang benar-benar
+# di-decode ke memori (JPEG di atas budget diperkecil lewat DCT scaling, format lain ditolak)
+INTAKE_MAX_BYTES = _env_int("ECOSORT_INTAKE_MAX_BYTES", 20 * 1024 * 1024)
+INTAKE_MAX_PIXELS = _env_int("ECOSORT_INTAKE_MAX_PIXELS", 50_000_000)
+INTAKE_DECODE_PIXELS = _env_int("ECOSORT_INTAKE_DECODE_PIXELS", 16_000_000)
+INTAKE_FORMATS = os.environ.get("ECOSORT_INTAKE_FORMATS", "JPEG,MPO,PNG,WEBP").upper().split(",")
+
+# --- Inference Engine ---
+# Jumlah maksimum gambar per forward pass dan jendela tunggu (ms) sebelum batch dikirim
+BATCH_MAX_SIZE = _env_int("ECOSORT_BATCH_MAX_SIZE", 8)
+BATCH_WINDOW_MS = _env_float("ECOSORT_BATCH_WINDOW_MS", 5.0)
+
+# --- Admission Control ---
+# Klasifikasi (decode + inferensi) yang boleh berjalan bersamaan per proses app; sisanya
+# menunggu di antrean terbatas sampai deadline. Default = BATCH_MAX_SIZE agar batch engine
+# tetap bisa penuh; MAX_CONCURRENT 0 = tanpa batas
+ADMISSION_MAX_CONCURRENT = _env_int("ECOSORT_ADMISSION_MAX_CONCURRENT", BATCH_MAX_SIZE)
+ADMISSION_MAX_QUEUE = _env_int("ECOSORT_ADMISSION_MAX_QUEUE", 16)
+ADMISSION_TIMEOUT = _env_float("ECOSORT_ADMISSION_TIMEOUT", 15.0)
+
+# --- Backend ---
+# keras, savedmodel, tflite-float, tflite-dynamic, tflite-fp16, atau tflite-int8 (artefak dari convert_tflite.py)
+BACKEND = os.environ.get("ECOSORT_BACKEND", "keras")
+TFLITE_DIR = os.environ.get("ECOSORT_TFLITE_DIR", "tflite_models")
+TFLITE_THREADS = _env_int("ECOSORT_TFLITE_THREADS", 0) or None
+TFLITE_XNNPACK = _env_bool("ECOSORT_TFLITE_XNNPACK", True)
+# Backend savedmodel: hasil export_serving_model.py
+SERVING_MODEL_DIR = os.environ.get("ECOSORT_SERVING_MODEL_DIR", "serving_model")
+
+# --- Cascade ---
+# Model kecil (hasil cascade.py train) dijalankan lebih dulu; model utama hanya dipanggil
+# jika confidence tahap pertama di bawah threshold. Kosong = nonaktif.
+CASCADE_MODEL_PATH = os.environ.get("ECOSORT_CASCADE_MODEL", "")
+CASCADE_THRESHOLD = _env_float("ECOSORT_CASCADE_THRESHOLD", 0.9)
+
+# --- Inference Path ---
+# "compiled" (tf.function + warmup) atau "predict" (model.predict biasa)
+INFERENCE_PATH = os.environ.get("ECOSORT_INFERENCE_PATH", "compiled")
+XLA_JIT = _env_bool("ECOSORT_XLA_JIT", False)
+WARMUP_BATCH_SIZES = _env_int_list("ECOSORT_WARMUP_BATCH_SIZES", (1, 2, 4, 8))
+
+# --- Precision ---
+# float32, bfloat16 (komputasi bf16, butuh AVX512-BF16/AMX), atau float16 (bobot fp16,
+# komputasi float32); hanya backend keras. Presisi selain float32 dicek terhadap model
+# float32 pada folder kalibrasi dan kembali ke float32 jika host tidak mendukung atau
+# agreement/drift di luar batas
+PRECISION = os.environ.get("ECOSORT_PRECISION", "float32")
+PRECISION_CALIBRATION_DIR = os.environ.get("ECOSORT_PRECISION_CALIBRATION_DIR", "")
+PRECISION_SAMPLES = _env_int("ECOSORT_PRECISION_SAMPLES", 64)
+PRECISION_MIN_AGREEMENT = _env_float("ECOSORT_PRECISION_MIN_AGREEMENT", 0.98)
+PRECISION_MAX_DRIFT = _env_float("ECOSORT_PRECISION_MAX_DRIFT", 0.02)
+
+# --- Prediction Cache ---
+# Ukuran LRU, TTL (detik), dan direktori tier disk (kosong = nonaktif)
+PREDICTION_CACHE_SIZE = _env_int("ECOSORT_PREDICTION_CACHE_SIZE", 256)
+PREDICTION_CACHE_TTL = _env_float("ECOSORT_PREDICTION_CACHE_TTL", 3600.0)
+PREDICTION_CACHE_DIR = os.environ.get("ECOSORT_PREDICTION_CACHE_DIR", "")
+
+# --- Near-duplicate Index ---
+NEAR_DUP = _env_bool("ECOSORT_NEAR_DUP", True)
+NEAR_DUP_DISTANCE = _env_int("ECOSORT_NEAR_DUP_DISTANCE", 6)
+NEAR_DUP_SIZE = _env_int("ECOSORT_NEAR_DUP_SIZE", 1024)
+NEAR_DUP_HASH = os.environ.get("ECOSORT_NEAR_DUP_HASH", "phash")
+
+# --- Prediction Log ---
+# Direktori log audit Parquet (kosong = nonaktif); kapasitas buffer, ukuran/umur batch flush,
+# dan batas rotasi file
+PREDICTION_LOG_DIR = os.environ.get("ECOSORT_PREDICTION_LOG_DIR", "")
+PREDICTION_LOG_BUFFER = _env_int("ECOSORT_PREDICTION_LOG_BUFFER", 10000)
+PREDICTION_LOG_FLUSH_ROWS = _env_int("ECOSORT_PREDICTION_LOG_FLUSH_ROWS", 512)
+PREDICTION_LOG_FLUSH_SECONDS = _env_float("ECOSORT_PREDICTION_LOG_FLUSH_SECONDS", 5.0)
+PREDICTION_LOG_ROTATE_MB = _env_int("ECOSORT_PREDICTION_LOG_ROTATE_MB", 64)
+PREDICTION_LOG_ROTATE_SECONDS = _env_float("ECOSORT_PREDICTION_LOG_ROTATE_SECONDS", 3600.0)
+
+# --- Result Thumbnail ---
+# Gambar di panel hasil: thumbnail sisi terpanjang THUMBNAIL_SIZE px; 0 = kirim gambar asli
+THUMBNAIL_SIZE = _env_int("ECOSORT_THUMBNAIL_SIZE", 480)
+THUMBNAIL_FORMAT = os.environ.get("ECOSORT_THUMBNAIL_FORMAT", "webp")
+THUMBNAIL_QUALITY = _env_int("ECOSORT_THUMBNAIL_QUALITY", 80)
+
+# --- Live Camera ---
+# Kosong = nonaktif; "synthetic", folder urutan gambar, atau URL stream MJPEG kamera kiosk
+LIVE_SOURCE = os.environ.get("ECOSORT_LIVE_SOURCE", "")
+LIVE_MAX_FPS = _env_float("ECOSORT_LIVE_MAX_FPS", 10.0)
+# Porsi waktu maksimum thread inferensi live untuk model; sisanya untuk sesi lain
+LIVE_DUTY_CYCLE = _env_float("ECOSORT_LIVE_DUTY_CYCLE", 0.8)
+LIVE_SMOOTHING = _env_int("ECOSORT_LIVE_SMOOTHING", 5)
+LIVE_REFRESH_MS = _env_int("ECOSORT_LIVE_REFRESH_MS", 500)
+
+# --- Multi-item ---
+# Toggle mode beberapa sampah dalam satu foto; sisi terpanjang gambar (px) dan jarak antar
+# jendela 224x224 (px) menentukan ukuran grid; sel di bawah confidence minimum diabaikan dan
+# region dengan sel lebih sedikit dari MIN_CELLS dibuang
+MULTI_ITEM = _env_bool("ECOSORT_MULTI_ITEM", True)
+MULTI_ITEM_SIZE = _env_int("ECOSORT_MULTI_ITEM_SIZE", 448)
+MULTI_ITEM_STRIDE = _env_int("ECOSORT_MULTI_ITEM_STRIDE", 32)
+MULTI_ITEM_MIN_CONFIDENCE = _env_float("ECOSORT_MULTI_ITEM_MIN_CONFIDENCE", 0.6)
+MULTI_ITEM_MIN_CELLS = _env_int("ECOSORT_MULTI_ITEM_MIN_CELLS", 2)
+
+# --- Metrics ---
+# Panel admin di sidebar (opt-in), file dump Prometheus, port endpoint /metrics (0 = nonaktif)
+ADMIN_PANEL = _env_bool("ECOSORT_ADMIN_PANEL", False)
+METRICS_FILE = os.environ.get("ECOSORT_METRICS_FILE", "")
+METRICS_PORT = _env_int("ECOSORT_METRICS_PORT", 0)
+METRICS_INTERVAL = _env_float("ECOSORT_METRICS_INTERVAL", 10.0)
+
+# --- Inference Server ---
+# server.py: port, thread decode, batas ukuran body dan jumlah gambar per request batch
+SERVER_PORT = _env_int("ECOSORT_SERVER_PORT", 8080)
+SERVER_PREPROCESS_WORKERS = _env_int("ECOSORT_SERVER_PREPROCESS_WORKERS", os.cpu_count() or 1)
+SERVER_MAX_BODY_MB = _env_int("ECOSORT_SERVER_MAX_BODY_MB", 64)
+SERVER_MAX_IMAGES = _env_int("ECOSORT_SERVER_MAX_IMAGES", 32)
+# True: bytes request dikirim apa adanya dan di-decode di dalam graph (predict_bytes)
+SERVER_GRAPH_DECODE = _env_bool("ECOSORT_SERVER_GRAPH_DECODE", False)
+# Worker pool (0 = nonaktif): proses worker yang berbagi bobot model lewat file mmap
+POOL_WORKERS = _env_int("ECOSORT_POOL_WORKERS", 0)
+POOL_BACKEND = os.environ.get("ECOSORT_POOL_BACKEND", "tflite-float")
+POOL_HEARTBEAT_TIMEOUT = _env_float("ECOSORT_POOL_HEARTBEAT_TIMEOUT", 60.0)
+# Batas tunggu hasil engine/pool per gambar (detik); lewat batas -> 504
+SERVER_INFERENCE_TIMEOUT = _env_float("ECOSORT_SERVER_INFERENCE_TIMEOUT", 20.0)
+# Jika diisi, app.py memakai server.py di URL ini sebagai backend remote
+INFERENCE_URL = os.environ.get("ECOSORT_INFERENCE_URL", "")
+INFERENCE_TIMEOUT = _env_float("ECOSORT_INFERENCE_TIMEOUT", 30.0)
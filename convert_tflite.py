@@ -0,0 +1,75 @@
+import argparse
+import itertools
+import os
+
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras.models import load_model
+
+import config
+from backends import tflite_path
+from preprocessing import iter_image_files, preprocess_image
+
+
+# --- TFLite Conversion ---
+# python convert_tflite.py --model model_sampah_vgg16.keras --calibration-dir data/kalibrasi
+# Menghasilkan artefak float32, dynamic-range, fp16, dan full-int8 di ECOSORT_TFLITE_DIR.
+VARIANTS = ("float", "dynamic", "fp16", "int8")
+
+
+def representative_dataset(calibration_dir, num_samples):
+    paths = list(itertools.islice(iter_image_files(calibration_dir), num_samples))
+    if not paths:
+        raise ValueError(f"Tidak ada gambar kalibrasi di {calibration_dir}")
+
+    def generator():
+        for path in paths:
+            yield [np.expand_dims(preprocess_image(path), axis=0).astype(np.float32)]
+
+    return generator
+
+
+def convert(model, variant, calibration_dir=None, num_samples=100):
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    if variant == "float":
+        # Tanpa kuantisasi: bobot float32 dipakai langsung dari file yang di-mmap, sehingga
+        # bisa dibagi antar proses worker pool lewat page cache
+        return converter.convert()
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if variant == "fp16":
+        converter.target_spec.supported_types = [tf.float16]
+    elif variant == "int8":
+        if not calibration_dir:
+            raise ValueError("Varian int8 membutuhkan --calibration-dir")
+        converter.representative_dataset = representative_dataset(calibration_dir, num_samples)
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        converter.inference_input_type = tf.int8
+        converter.inference_output_type = tf.int8
+    elif variant != "dynamic":
+        raise ValueError(f"Varian tidak dikenal: {variant!r}")
+    return converter.convert()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Konversi model Keras ke artefak TFLite terkuantisasi.")
+    parser.add_argument("--model", default="model_sampah_vgg16.keras")
+    parser.add_argument("--output-dir", default=config.TFLITE_DIR)
+    parser.add_argument("--calibration-dir", help="Folder gambar contoh untuk kalibrasi int8")
+    parser.add_argument("--num-calibration", type=int, default=100)
+    parser.add_argument("--variants", default=",".join(VARIANTS))
+    args = parser.parse_args()
+
+    model = load_model(args.model)
+    os.makedirs(args.output_dir, exist_ok=True)
+    for variant in args.variants.split(","):
+        output_path = tflite_path(f"tflite-{variant}", args.output_dir, args.model)
+        data = convert(model, variant, args.calibration_dir, args.num_calibration)
+        tmp_path = f"{output_path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, output_path)
+        print(f"{variant:<8} {len(data) / 1e6:8.1f} MB -> {output_path}")
+
+
+if __name__ == "__main__":
+    main()
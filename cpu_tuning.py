@@ -0,0 +1,68 @@
+import json
+import os
+
+import config
+
+
+# --- CPU Threading Profile ---
+# Profil: intra_op_threads, inter_op_threads (0 = default TF), onednn (True/False/None),
+# cpu_affinity (list core). Dibaca dari file JSON (ECOSORT_CPU_PROFILE) lalu ditimpa env.
+DEFAULT_PROFILE = {
+    "intra_op_threads": 0,
+    "inter_op_threads": 0,
+    "onednn": None,
+    "cpu_affinity": None,
+}
+
+
+def parse_cpu_list(value):
+    # "0-3,6" -> [0, 1, 2, 3, 6]
+    cores = []
+    for part in value.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            start, end = part.split("-", 1)
+            cores.extend(range(int(start), int(end) + 1))
+        else:
+            cores.append(int(part))
+    return cores
+
+
+def load_profile(path=None):
+    profile = dict(DEFAULT_PROFILE)
+    path = path or config.CPU_PROFILE
+    if path:
+        with open(path, encoding="utf-8") as f:
+            profile.update(json.load(f))
+
+    if config.INTRA_OP_THREADS is not None:
+        profile["intra_op_threads"] = config.INTRA_OP_THREADS
+    if config.INTER_OP_THREADS is not None:
+        profile["inter_op_threads"] = config.INTER_OP_THREADS
+    if config.ONEDNN is not None:
+        profile["onednn"] = config.ONEDNN
+    if config.CPU_AFFINITY:
+        profile["cpu_affinity"] = parse_cpu_list(config.CPU_AFFINITY)
+    return profile
+
+
+def apply_before_import(profile):
+    # Harus dipanggil sebelum `import tensorflow`: oneDNN dibaca saat import
+    if profile["onednn"] is not None:
+        os.environ["TF_ENABLE_ONEDNN_OPTS"] = "1" if profile["onednn"] else "0"
+    if profile["intra_op_threads"]:
+        os.environ.setdefault("OMP_NUM_THREADS", str(profile["intra_op_threads"]))
+    if profile["cpu_affinity"] and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, profile["cpu_affinity"])
+
+
+def apply_tf_threading(profile, tf):
+    # Harus dipanggil setelah import tetapi sebelum op TensorFlow pertama dijalankan.
+    # Rerun Streamlit memanggil ulang fungsi ini; nilai yang sudah terpasang dilewati.
+    threading = tf.config.threading
+    if profile["intra_op_threads"] and threading.get_intra_op_parallelism_threads() != profile["intra_op_threads"]:
+        threading.set_intra_op_parallelism_threads(profile["intra_op_threads"])
+    if profile["inter_op_threads"] and threading.get_inter_op_parallelism_threads() != profile["inter_op_threads"]:
+        threading.set_inter_op_parallelism_threads(profile["inter_op_threads"])
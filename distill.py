@@ -0,0 +1,374 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import tensorflow as tf
+
+from backends import INPUT_SHAPE
+from cascade import latency
+from classify import prefetch
+from labels import class_labels, label_index
+from model_loader import DEFAULT_MODEL_PATH, load_keras_backend, resolve_model_file
+from prediction_cache import model_version
+from preprocessing import iter_image_files
+
+
+# --- Distillation Tools ---
+# python distill.py targets --data data/foto --targets distill_targets
+# python distill.py train --targets distill_targets --output model_sampah_student.keras
+# python distill.py report --targets distill_uji --student model_sampah_student.keras
+# Teacher (VGG16) dijalankan sekali; soft target dan gambar yang sudah di-resize disimpan
+# di disk sehingga setiap epoch student hanya membaca cache. Student menerima input yang
+# sama dengan VGG16 (float 0..1, 224x224) dan berakhir dengan softmax, jadi bisa dipakai
+# lewat ECOSORT_MODEL_PATH atau dipublikasikan ke store model.
+STUDENT_MODEL_PATH = "model_sampah_student.keras"
+
+
+# --- Soft Target Cache ---
+# Layout:
+#   <root>/meta.json     {"teacher", "teacher_version", "count", "files", "files_sha256"}
+#   <root>/images.npy    uint8 (N, 224, 224, 3), dibuka dengan mmap
+#   <root>/logits.npy    float32 (N, kelas): log-probabilitas teacher
+#   <root>/index.jsonl   satu baris per gambar: {"id", "path", "label"}
+# meta.json ditulis terakhir, jadi cache dari proses yang terhenti tidak pernah terbaca.
+class SoftTargets:
+    def __init__(self, root):
+        self.root = root
+        try:
+            with open(os.path.join(root, "meta.json"), encoding="utf-8") as f:
+                self.meta = json.load(f)
+        except FileNotFoundError:
+            self.meta = None
+        self._images = None
+        self._logits = None
+
+    def __len__(self):
+        return self.meta["count"] if self.meta else 0
+
+    def images(self):
+        if self._images is None:
+            self._images = np.load(os.path.join(self.root, "images.npy"), mmap_mode="r")[:len(self)]
+        return self._images
+
+    def logits(self):
+        if self._logits is None:
+            self._logits = np.load(os.path.join(self.root, "logits.npy"))[:len(self)]
+        return self._logits
+
+    def labels(self):
+        # -1 untuk gambar tanpa label folder
+        with open(os.path.join(self.root, "index.jsonl"), encoding="utf-8") as f:
+            labels = [json.loads(line)["label"] for line in f]
+        return np.array([-1 if label is None else label for label in labels[:len(self)]])
+
+    def matches(self, teacher_version, files):
+        return self.meta is not None and self.meta["teacher_version"] == teacher_version and self.meta["files_sha256"] == _files_digest(files)
+
+    def write(self, teacher, teacher_version, files, predict, batch_size, workers):
+        os.makedirs(self.root, exist_ok=True)
+        self.meta = None
+        labels = dict(files)
+        images = np.lib.format.open_memmap(
+            os.path.join(self.root, "images.npy"), mode="w+", dtype=np.uint8, shape=(len(files), *INPUT_SHAPE)
+        )
+        logits = np.zeros((len(files), len(class_labels)), dtype=np.float32)
+        count = 0
+        with open(os.path.join(self.root, "index.jsonl"), "w", encoding="utf-8") as index, \
+                ThreadPoolExecutor(max_workers=workers) as executor:
+            batch = []
+            for path, img, error in prefetch(executor, [path for path, _ in files], window=batch_size * 2):
+                # Gambar yang gagal di-decode dilewati
+                if error is None:
+                    batch.append((path, img))
+                if len(batch) == batch_size:
+                    count = self._write_batch(batch, images, logits, count, predict, index, labels)
+                    batch = []
+            if batch:
+                count = self._write_batch(batch, images, logits, count, predict, index, labels)
+        images.flush()
+        del images
+        np.save(os.path.join(self.root, "logits.npy"), logits[:count])
+
+        meta = {
+            "teacher": teacher,
+            "teacher_version": teacher_version,
+            "count": count,
+            "files": len(files),
+            "files_sha256": _files_digest(files),
+        }
+        tmp_path = os.path.join(self.root, "meta.json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+        os.replace(tmp_path, os.path.join(self.root, "meta.json"))
+        self.meta = meta
+        self._images = self._logits = None
+
+    def _write_batch(self, batch, images, logits, count, predict, index, labels):
+        end = count + len(batch)
+        images[count:end] = np.stack([img for _, img in batch])
+        probabilities = predict(images[count:end])
+        # Log-probabilitas = logit teacher sampai konstanta, cukup untuk softmax bertemperatur
+        logits[count:end] = np.log(np.clip(probabilities, 1e-7, 1.0))
+        for offset, (path, _) in enumerate(batch):
+            index.write(json.dumps({"id": count + offset, "path": path, "label": labels[path]}) + "\n")
+        return end
+
+
+def _files_digest(files):
+    return hashlib.sha256("\n".join(path for path, _ in files).encode()).hexdigest()
+
+
+def labeled_files(folder):
+    # <folder>/<kelas>/<gambar> mendapat label kelas; gambar lain tetap dipakai tanpa label
+    files = []
+    for path in iter_image_files(folder):
+        parts = os.path.relpath(path, folder).split(os.sep)
+        files.append((path, label_index(parts[0]) if len(parts) > 1 else None))
+    return files
+
+
+def targets_command(args):
+    files = labeled_files(args.data)
+    if not files:
+        raise SystemExit(f"Tidak ada gambar di {args.data}")
+    teacher_path = resolve_model_file(args.teacher)
+    teacher_version = model_version(teacher_path)
+    targets = SoftTargets(args.targets)
+    if targets.matches(teacher_version, files) and not args.force:
+        print(f"Soft target untuk {len(targets)} gambar sudah ada di {args.targets} (teacher {teacher_version})")
+        return
+
+    teacher = load_keras_backend(teacher_path)
+    start = time.perf_counter()
+    targets.write(teacher_path, teacher_version, files, teacher.predict_uint8, args.batch_size, args.workers)
+    elapsed = time.perf_counter() - start
+    size_mb = sum(os.path.getsize(os.path.join(args.targets, name)) for name in os.listdir(args.targets)) / 2**20
+    print(f"{len(targets)} soft target (dari {len(files)} file) ditulis ke {args.targets} dalam {elapsed:.1f} s, {size_mb:.0f} MB")
+
+
+# --- Student ---
+def build_student(arch="narrow", weights="imagenet", width=1.0, dropout=0.2):
+    # Keluaran logit (tanpa softmax) untuk training; export_student menambahkan softmax
+    inputs = tf.keras.Input(INPUT_SHAPE)
+    if arch == "mobilenet":
+        # MobileNetV3 membawa preprocessing sendiri yang mengharapkan piksel 0..255
+        x = tf.keras.layers.Rescaling(255.0)(inputs)
+        base = tf.keras.applications.MobileNetV3Small(
+            input_shape=INPUT_SHAPE, alpha=width, include_top=False, weights=weights, pooling="avg", include_preprocessing=True
+        )
+        x = base(x)
+    elif arch == "narrow":
+        # CNN sempit: blok stride-2 + depthwise separable, ~0.5M parameter pada width 1.0.
+        # Momentum BatchNorm 0.9: folder distilasi biasanya kecil (puluhan step per epoch),
+        # dengan default 0.99 statistik inferensi belum konvergen saat training selesai
+        x = inputs
+        for filters in (16, 32, 64, 128, 256):
+            filters = max(8, int(filters * width))
+            x = tf.keras.layers.Conv2D(filters, 3, strides=2, padding="same", use_bias=False)(x)
+            x = tf.keras.layers.BatchNormalization(momentum=0.9)(x)
+            x = tf.keras.layers.ReLU()(x)
+            x = tf.keras.layers.SeparableConv2D(filters, 3, padding="same", use_bias=False)(x)
+            x = tf.keras.layers.BatchNormalization(momentum=0.9)(x)
+            x = tf.keras.layers.ReLU()(x)
+        x = tf.keras.layers.GlobalAveragePooling2D()(x)
+    else:
+        raise ValueError(f"Arsitektur student tidak dikenal: {arch!r} (pilih 'narrow' atau 'mobilenet')")
+    x = tf.keras.layers.Dropout(dropout)(x)
+    logits = tf.keras.layers.Dense(len(class_labels), name="logits")(x)
+    return tf.keras.Model(inputs, logits, name=f"student_{arch}")
+
+
+def export_student(student):
+    probabilities = tf.keras.layers.Softmax(name="probabilities", dtype="float32")(student.output)
+    return tf.keras.Model(student.input, probabilities, name=student.name)
+
+
+def distillation_loss(temperature):
+    # KL(teacher || student) pada softmax bertemperatur, dikali T^2 agar skala gradien
+    # tidak bergantung pada temperatur (Hinton dkk.)
+    def loss(teacher_logits, student_logits):
+        teacher = tf.nn.softmax(teacher_logits / temperature)
+        kl = tf.reduce_sum(
+            teacher * (tf.nn.log_softmax(teacher_logits / temperature) - tf.nn.log_softmax(student_logits / temperature)),
+            axis=-1,
+        )
+        return kl * temperature ** 2
+
+    return loss
+
+
+def teacher_agreement(teacher_logits, student_logits):
+    return tf.cast(tf.equal(tf.argmax(teacher_logits, axis=-1), tf.argmax(student_logits, axis=-1)), tf.float32)
+
+
+def cached_dataset(targets, rows, batch_size, shuffle=False):
+    images = targets.images()
+    logits = tf.constant(targets.logits())
+
+    def load(batch_rows):
+        # Baris diurutkan agar pembacaan mmap berurutan; urutan logit mengikuti
+        return images[np.sort(batch_rows)].astype(np.float32) / 255.0
+
+    dataset = tf.data.Dataset.from_tensor_slices(np.asarray(rows, dtype=np.int64))
+    if shuffle:
+        dataset = dataset.shuffle(len(rows), seed=0, reshuffle_each_iteration=True)
+    dataset = dataset.batch(batch_size).map(
+        lambda batch_rows: (
+            tf.ensure_shape(tf.numpy_function(load, [batch_rows], tf.float32), (None, *INPUT_SHAPE)),
+            tf.gather(logits, tf.sort(batch_rows)),
+        ),
+        num_parallel_calls=tf.data.AUTOTUNE,
+    )
+    return dataset.prefetch(tf.data.AUTOTUNE)
+
+
+def split_rows(count, validation_split):
+    order = np.random.default_rng(0).permutation(count)
+    split = max(1, int(count * validation_split)) if validation_split > 0 else 0
+    return np.sort(order[split:]), np.sort(order[:split])
+
+
+def train_command(args):
+    targets = SoftTargets(args.targets)
+    if not len(targets):
+        raise SystemExit(f"Cache soft target kosong: jalankan dulu `python distill.py targets --targets {args.targets}`")
+    training, validation = split_rows(len(targets), args.validation_split)
+
+    student = build_student(args.arch, weights=None if args.weights == "none" else args.weights, width=args.width)
+    student.compile(
+        optimizer=tf.keras.optimizers.Adam(args.learning_rate),
+        loss=distillation_loss(args.temperature),
+        metrics=[teacher_agreement],
+    )
+    start = time.perf_counter()
+    student.fit(
+        cached_dataset(targets, training, args.batch_size, shuffle=True),
+        validation_data=cached_dataset(targets, validation, args.batch_size) if len(validation) else None,
+        epochs=args.epochs,
+    )
+    print(f"Training {args.epochs} epoch selesai dalam {time.perf_counter() - start:.0f} s")
+    export_student(student).save(args.output)
+    print(f"Student disimpan di {args.output}")
+
+    if len(validation):
+        write_report(distill_report(targets, validation, args.output, targets.meta["teacher"], args.repeats), args.report)
+
+
+# --- Report ---
+def predict_all(backend, images, rows, batch_size=32):
+    # Dibaca per batch dari mmap agar folder uji yang besar tidak dimuat sekaligus
+    return np.concatenate([backend.predict_uint8(np.asarray(images[rows[i:i + batch_size]])) for i in range(0, len(rows), batch_size)])
+
+
+def model_summary(path, backend):
+    return {"path": path, "params": int(backend.model.count_params()), "size_mb": os.path.getsize(path) / 2**20}
+
+
+def distill_report(targets, rows, student_path, teacher_path, repeats):
+    # Agreement dihitung terhadap soft target di cache, jadi teacher hanya dimuat untuk
+    # mengukur ukuran dan latency
+    images = targets.images()
+    teacher_probabilities = np.exp(targets.logits()[rows])
+    labels = targets.labels()[rows]
+    student = load_keras_backend(student_path)
+    student_probabilities = predict_all(student, images, rows)
+
+    teacher_top1 = teacher_probabilities.argmax(axis=1)
+    student_top1 = student_probabilities.argmax(axis=1)
+    indices = np.arange(len(rows))
+    report = {
+        "images": len(rows),
+        "top1_agreement": float((student_top1 == teacher_top1).mean()),
+        # Selisih confidence pada kelas top-1 teacher, seperti benchmarks.backend_parity
+        "confidence_drift": float(np.abs(student_probabilities[indices, teacher_top1] - teacher_probabilities[indices, teacher_top1]).mean()),
+        "per_class_agreement": {
+            class_labels[idx]: float((student_top1[teacher_top1 == idx] == idx).mean())
+            for idx in range(len(class_labels)) if (teacher_top1 == idx).any()
+        },
+    }
+    labeled = labels >= 0
+    if labeled.any():
+        report["labeled_images"] = int(labeled.sum())
+        report["teacher_accuracy"] = float((teacher_top1[labeled] == labels[labeled]).mean())
+        report["student_accuracy"] = float((student_top1[labeled] == labels[labeled]).mean())
+
+    sample = np.asarray(images[rows[:16]])
+    report["student"] = model_summary(student_path, student)
+    report["student"]["latency"] = latency(student.predict_uint8, sample, repeats)
+    del student
+    teacher_path = resolve_model_file(teacher_path)
+    teacher = load_keras_backend(teacher_path)
+    report["teacher"] = model_summary(teacher_path, teacher)
+    report["teacher"]["latency"] = latency(teacher.predict_uint8, sample, repeats)
+    return report
+
+
+def write_report(report, output=None):
+    student, teacher = report["student"], report["teacher"]
+    print(f"Gambar evaluasi      : {report['images']}")
+    print(f"Top-1 agreement      : {report['top1_agreement']:.3f}")
+    print(f"Drift confidence     : {report['confidence_drift']:.4f}")
+    if "student_accuracy" in report:
+        print(f"Akurasi (berlabel)   : student {report['student_accuracy']:.3f}, teacher {report['teacher_accuracy']:.3f}")
+    print(f"{'':<10}{'parameter':>12}{'MB':>8}{'p50 ms':>9}{'p95 ms':>9}")
+    for name, row in (("teacher", teacher), ("student", student)):
+        print(f"{name:<10}{row['params']:>12,}{row['size_mb']:>8.1f}{row['latency']['p50_ms']:>9.1f}{row['latency']['p95_ms']:>9.1f}")
+    print(f"Pakai dengan: ECOSORT_MODEL_PATH={student['path']} streamlit run app.py")
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+def report_command(args):
+    targets = SoftTargets(args.targets)
+    if not len(targets):
+        raise SystemExit(f"Cache soft target kosong: jalankan dulu `python distill.py targets --targets {args.targets}`")
+    write_report(distill_report(targets, np.arange(len(targets)), args.student, args.teacher, args.repeats), args.output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Distilasi VGG16 EcoSort AI ke model student yang kecil.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("targets", help="Jalankan teacher sekali dan simpan soft target ke cache")
+    p.add_argument("--data", required=True, help="Folder gambar (subfolder kelas opsional)")
+    p.add_argument("--targets", default="distill_targets", help="Direktori cache soft target")
+    p.add_argument("--teacher", default=DEFAULT_MODEL_PATH)
+    p.add_argument("--batch-size", type=int, default=16)
+    p.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    p.add_argument("--force", action="store_true", help="Tulis ulang walaupun cache sudah cocok")
+    p.set_defaults(func=targets_command)
+
+    p = sub.add_parser("train", help="Latih student dari cache soft target")
+    p.add_argument("--targets", default="distill_targets")
+    p.add_argument("--output", default=STUDENT_MODEL_PATH)
+    p.add_argument("--arch", default="narrow", choices=("narrow", "mobilenet"))
+    p.add_argument("--width", type=float, default=1.0, help="Pengali jumlah filter (alpha untuk MobileNetV3)")
+    p.add_argument("--weights", default="imagenet", help="Bobot awal MobileNetV3 ('imagenet' atau 'none')")
+    p.add_argument("--temperature", type=float, default=4.0)
+    p.add_argument("--epochs", type=int, default=20)
+    p.add_argument("--batch-size", type=int, default=32)
+    p.add_argument("--learning-rate", type=float, default=1e-3)
+    p.add_argument("--validation-split", type=float, default=0.1)
+    p.add_argument("--repeats", type=int, default=3)
+    p.add_argument("--report", help="Simpan laporan validasi sebagai JSON")
+    p.set_defaults(func=train_command)
+
+    p = sub.add_parser("report", help="Bandingkan student dengan teacher pada cache soft target lain")
+    p.add_argument("--targets", required=True, help="Cache soft target dari folder yang tidak dipakai training")
+    p.add_argument("--student", default=STUDENT_MODEL_PATH)
+    p.add_argument("--teacher", default=DEFAULT_MODEL_PATH)
+    p.add_argument("--repeats", type=int, default=3)
+    p.add_argument("--output", help="Simpan laporan sebagai JSON")
+    p.set_defaults(func=report_command)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
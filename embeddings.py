@@ -0,0 +1,408 @@
+import argparse
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import config
+from classify import iter_inputs, prefetch
+from labels import class_labels, label_index
+from preprocessing import iter_image_files
+
+
+# --- Embedding Store ---
+# Layout:
+#   <root>/meta.json          {"dim", "layer", "model_version", "segments": [{"name", "count"}]}
+#   <root>/part-00000.npy     float16 (count, dim), dibuka dengan mmap
+#   <root>/part-00000.jsonl   satu baris per embedding: {"id", "path", "label"}
+#   <root>/ivf.npz            index IVF opsional (build-ivf)
+# Segmen baru hanya tercatat di meta.json setelah vektor dan index-nya selesai ditulis,
+# jadi proses yang terhenti tidak meninggalkan store setengah jadi.
+class EmbeddingStore:
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        try:
+            with open(os.path.join(root, "meta.json"), encoding="utf-8") as f:
+                self.meta = json.load(f)
+        except FileNotFoundError:
+            self.meta = {"dim": None, "layer": None, "model_version": None, "segments": []}
+        self._segments = None
+        self._records = None
+
+    def __len__(self):
+        return sum(segment["count"] for segment in self.meta["segments"])
+
+    def append(self, vectors, records, layer, model_version):
+        if self.meta["model_version"] not in (None, model_version):
+            raise ValueError(
+                f"Store berisi embedding model {self.meta['model_version']}, bukan {model_version}; gunakan store baru"
+            )
+        if self.meta["dim"] not in (None, vectors.shape[1]):
+            raise ValueError(f"Dimensi embedding {vectors.shape[1]} tidak cocok dengan store ({self.meta['dim']})")
+
+        name = f"part-{len(self.meta['segments']):05d}"
+        out = np.lib.format.open_memmap(os.path.join(self.root, f"{name}.npy"), mode="w+", dtype=np.float16, shape=vectors.shape)
+        out[:] = vectors
+        out.flush()
+        del out
+        start = len(self)
+        with open(os.path.join(self.root, f"{name}.jsonl"), "w", encoding="utf-8") as f:
+            for offset, record in enumerate(records):
+                f.write(json.dumps({"id": start + offset, **record}) + "\n")
+
+        self.meta.update(dim=int(vectors.shape[1]), layer=layer, model_version=model_version)
+        self.meta["segments"].append({"name": name, "count": len(records)})
+        tmp_path = os.path.join(self.root, "meta.json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.meta, f, indent=2)
+        os.replace(tmp_path, os.path.join(self.root, "meta.json"))
+        self._segments = self._records = None
+
+    def segments(self):
+        if self._segments is None:
+            self._segments = [
+                np.load(os.path.join(self.root, f"{segment['name']}.npy"), mmap_mode="r") for segment in self.meta["segments"]
+            ]
+        return self._segments
+
+    def records(self):
+        if self._records is None:
+            self._records = []
+            for segment in self.meta["segments"]:
+                with open(os.path.join(self.root, f"{segment['name']}.jsonl"), encoding="utf-8") as f:
+                    self._records.extend(json.loads(line) for line in itertools.islice(f, segment["count"]))
+        return self._records
+
+    def iter_chunks(self, chunk_size=65536):
+        # (baris awal, float32 (n, dim)) tanpa pernah memuat seluruh store ke memori
+        start = 0
+        for vectors in self.segments():
+            for offset in range(0, len(vectors), chunk_size):
+                yield start + offset, np.asarray(vectors[offset:offset + chunk_size], dtype=np.float32)
+            start += len(vectors)
+
+    def take(self, rows):
+        # rows: indeks global terurut
+        rows = np.asarray(rows)
+        parts, start = [], 0
+        for vectors in self.segments():
+            local = rows[(rows >= start) & (rows < start + len(vectors))] - start
+            if len(local):
+                parts.append(np.asarray(vectors[local], dtype=np.float32))
+            start += len(vectors)
+        return np.concatenate(parts) if parts else np.empty((0, self.meta["dim"]), dtype=np.float32)
+
+
+def _normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+# --- IVF Index ---
+# Spherical k-means atas sampel; setiap embedding masuk ke list centroid terdekat.
+# Query hanya membandingkan isi `nprobe` list terdekat, bukan seluruh store.
+class IVFIndex:
+    def __init__(self, centroids, order, offsets, size):
+        self.centroids = centroids
+        self.order = order
+        self.offsets = offsets
+        self.size = size
+
+    @classmethod
+    def build(cls, store, n_lists=256, sample_size=50000, iterations=10, seed=0):
+        rng = np.random.default_rng(seed)
+        sample_rows = np.sort(rng.choice(len(store), size=min(sample_size, len(store)), replace=False))
+        sample = _normalize(store.take(sample_rows))
+        n_lists = min(n_lists, len(sample))
+        centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)]
+        for _ in range(iterations):
+            assignment = (sample @ centroids.T).argmax(axis=1)
+            for i in range(n_lists):
+                members = sample[assignment == i]
+                if len(members):
+                    centroids[i] = members.mean(axis=0)
+            centroids = _normalize(centroids)
+
+        assignment = np.concatenate([
+            (_normalize(chunk) @ centroids.T).argmax(axis=1) for _, chunk in store.iter_chunks()
+        ])
+        order = np.argsort(assignment, kind="stable")
+        offsets = np.searchsorted(assignment[order], np.arange(n_lists + 1))
+        index = cls(centroids.astype(np.float32), order, offsets, len(store))
+        np.savez(os.path.join(store.root, "ivf.npz"), centroids=index.centroids, order=order, offsets=offsets, size=len(store))
+        return index
+
+    @classmethod
+    def load(cls, store):
+        data = np.load(os.path.join(store.root, "ivf.npz"))
+        index = cls(data["centroids"], data["order"], data["offsets"], int(data["size"]))
+        if index.size != len(store):
+            raise ValueError(f"Index IVF dibangun untuk {index.size} embedding, store berisi {len(store)}; jalankan build-ivf ulang")
+        return index
+
+    def candidates(self, query, nprobe=8):
+        nearest = np.argsort(self.centroids @ query)[::-1][:nprobe]
+        return np.sort(np.concatenate([self.order[self.offsets[i]:self.offsets[i + 1]] for i in nearest]))
+
+
+# --- kNN Classifier ---
+# Cosine similarity, vote berbobot similarity dari k tetangga terdekat. Kelas baru cukup
+# ditambahkan sebagai embedding berlabel baru; VGG16 tidak perlu dilatih ulang.
+class KNNClassifier:
+    def __init__(self, store, k=10, ivf=None, nprobe=8, chunk_size=65536):
+        self.store = store
+        self.k = k
+        self.ivf = ivf
+        self.nprobe = nprobe
+        self.chunk_size = chunk_size
+        labels = [record.get("label") for record in store.records()]
+        known = [name for _, name in sorted(class_labels.items())]
+        self.classes = known + sorted({label for label in labels if label is not None and label not in known})
+        class_ids = {name: i for i, name in enumerate(self.classes)}
+        self.labels = np.array([class_ids.get(label, -1) for label in labels])
+
+    def kneighbors(self, queries, exclude=None):
+        # exclude: baris store yang dilewati per query (mis. dirinya sendiri saat evaluasi)
+        queries = _normalize(np.asarray(queries, dtype=np.float32))
+        if self.ivf is not None:
+            return self._kneighbors_ivf(queries, exclude)
+        best_sims = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+        best_rows = np.zeros((len(queries), 0), dtype=np.int64)
+        for start, chunk in self.store.iter_chunks(self.chunk_size):
+            sims = queries @ _normalize(chunk).T
+            if exclude is not None:
+                local = exclude - start
+                mask = (local >= 0) & (local < len(chunk))
+                sims[np.flatnonzero(mask), local[mask]] = -np.inf
+            rows = np.broadcast_to(np.arange(start, start + len(chunk)), sims.shape)
+            best_sims, best_rows = _top_k(np.hstack([best_sims, sims]), np.hstack([best_rows, rows]), self.k)
+        return best_sims, best_rows
+
+    def _kneighbors_ivf(self, queries, exclude):
+        all_sims, all_rows = [], []
+        for i, query in enumerate(queries):
+            rows = self.ivf.candidates(query, self.nprobe)
+            if exclude is not None:
+                rows = rows[rows != exclude[i]]
+            sims = _normalize(self.store.take(rows)) @ query
+            sims, rows = _top_k(sims[np.newaxis], rows[np.newaxis], self.k)
+            all_sims.append(np.pad(sims[0], (0, self.k - sims.shape[1]), constant_values=-np.inf))
+            all_rows.append(np.pad(rows[0], (0, self.k - rows.shape[1])))
+        return np.array(all_sims), np.array(all_rows)
+
+    def predict_proba(self, queries, exclude=None):
+        sims, rows = self.kneighbors(queries, exclude)
+        labels = self.labels[rows]
+        weights = np.where((labels >= 0) & np.isfinite(sims), np.maximum(sims, 0.0) + 1e-6, 0.0)
+        votes = np.zeros((len(sims), len(self.classes)), dtype=np.float32)
+        np.add.at(votes, (np.repeat(np.arange(len(sims)), sims.shape[1]), np.clip(labels, 0, None).ravel()), weights.ravel())
+        return votes / np.maximum(votes.sum(axis=1, keepdims=True), 1e-12)
+
+
+def _top_k(sims, rows, k):
+    if sims.shape[1] > k:
+        top = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+        sims, rows = np.take_along_axis(sims, top, axis=1), np.take_along_axis(rows, top, axis=1)
+    order = np.argsort(-sims, axis=1)
+    return np.take_along_axis(sims, order, axis=1), np.take_along_axis(rows, order, axis=1)
+
+
+# --- Feature Extraction ---
+# Model dipotong pada layer sebelum output (atau --layer). Head (layer setelah titik potong)
+# disimpan terpisah agar prediksi bisa dihitung ulang langsung dari embedding.
+def split_model(model, layer=None):
+    import tensorflow as tf
+
+    names = [l.name for l in model.layers]
+    cut = names.index(layer) if layer else len(names) - 2
+    features = tf.keras.Model(model.inputs, model.layers[cut].output)
+    head_input = tf.keras.Input(model.layers[cut].output.shape[1:])
+    x = head_input
+    # Head diasumsikan berurutan (Flatten/Dense/Dropout), seperti head klasifikasi VGG16
+    for head_layer in model.layers[cut + 1:]:
+        x = head_layer(x)
+    head = tf.keras.Model(head_input, x)
+
+    @tf.function(input_signature=[tf.TensorSpec((None, 224, 224, 3), tf.uint8)], reduce_retracing=True)
+    def extract(batch):
+        return tf.reshape(features(tf.cast(batch, tf.float32) / 255.0, training=False), (tf.shape(batch)[0], -1))
+
+    return model.layers[cut].name, lambda batch: extract(batch).numpy(), head
+
+
+def load_keras_model(model_path):
+    from tensorflow.keras.models import load_model
+
+    from model_loader import resolve_model_file
+    from model_store import open_store
+    from prediction_cache import model_version
+
+    store = open_store()
+    if store is not None:
+        model_path = store.model_path(store.ensure(config.MODEL_VERSION or None))
+    else:
+        resolve_model_file(model_path)
+    return load_model(model_path), model_version(model_path)
+
+
+def corpus_label(path, folder, label=None):
+    # <folder>/<kelas>/<gambar>: folder kelas bawaan dipetakan ke nama kelas, folder lain
+    # menjadi kelas baru; gambar langsung di <folder> tidak berlabel
+    if label:
+        return label
+    parts = os.path.relpath(path, folder).split(os.sep)
+    if len(parts) < 2:
+        return None
+    idx = label_index(parts[0])
+    return class_labels[idx] if idx is not None else parts[0]
+
+
+def embed_paths(extract, paths, batch_size, workers):
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        loaded = prefetch(executor, paths, window=batch_size * 2)
+        while True:
+            chunk = list(itertools.islice(loaded, batch_size))
+            if not chunk:
+                return
+            # Gambar yang gagal di-decode dilewati
+            items = [(path, img) for path, img, error in chunk if error is None]
+            if items:
+                yield [path for path, _ in items], extract(np.stack([img for _, img in items]))
+
+
+def extract_command(args):
+    model, version = load_keras_model(args.model)
+    layer, extract, _ = split_model(model, args.layer)
+    store = EmbeddingStore(args.store)
+
+    start, count = time.perf_counter(), 0
+    vectors, records = [], []
+    for folder in args.data:
+        for paths, batch in embed_paths(extract, iter_image_files(folder), args.batch_size, args.workers):
+            vectors.append(batch.astype(np.float16))
+            records.extend({"path": path, "label": corpus_label(path, folder, args.label)} for path in paths)
+            if len(records) >= args.segment_size:
+                store.append(np.concatenate(vectors), records, layer, version)
+                count += len(records)
+                vectors, records = [], []
+    if records:
+        store.append(np.concatenate(vectors), records, layer, version)
+        count += len(records)
+    elapsed = time.perf_counter() - start
+    print(f"{count} embedding ({store.meta['dim']} dim, layer {layer}) ditambahkan ke {args.store} dalam {elapsed:.1f} s")
+    print(f"Total store: {len(store)} embedding, {len(store) * store.meta['dim'] * 2 / 1e6:.1f} MB")
+
+
+def build_ivf_command(args):
+    store = EmbeddingStore(args.store)
+    start = time.perf_counter()
+    index = IVFIndex.build(store, n_lists=args.lists, sample_size=args.sample)
+    print(f"Index IVF {len(index.centroids)} list untuk {len(store)} embedding dalam {time.perf_counter() - start:.1f} s")
+
+
+def knn_command(args):
+    store = EmbeddingStore(args.store)
+    ivf = IVFIndex.load(store) if args.ivf else None
+    knn = KNNClassifier(store, k=args.k, ivf=ivf, nprobe=args.nprobe)
+
+    if not args.inputs:
+        # Evaluasi leave-one-out atas embedding berlabel di store, tanpa menjalankan VGG16
+        rows = np.flatnonzero(knn.labels >= 0)
+        start = time.perf_counter()
+        predicted = np.concatenate([
+            knn.predict_proba(store.take(batch), exclude=batch).argmax(axis=1)
+            for batch in np.array_split(rows, max(1, len(rows) // args.batch_size))
+        ])
+        elapsed = time.perf_counter() - start
+        print(f"Akurasi kNN (leave-one-out, k={args.k}): {(predicted == knn.labels[rows]).mean():.3f}")
+        print(f"{len(rows)} query dalam {elapsed:.2f} s ({len(rows) / elapsed:.0f} query/s)")
+        return
+
+    model, version = load_keras_model(args.model)
+    if version != store.meta["model_version"]:
+        raise SystemExit(f"Store dibuat dengan model {store.meta['model_version']}, model saat ini {version}")
+    _, extract, _ = split_model(model, store.meta["layer"])
+    out = open(args.output, "w", encoding="utf-8") if args.output else None
+    for paths, batch in embed_paths(extract, iter_inputs(args.inputs), args.batch_size, args.workers):
+        for path, probabilities in zip(paths, knn.predict_proba(batch)):
+            idx = int(probabilities.argmax())
+            row = {"path": path, "label": knn.classes[idx], "confidence": float(probabilities[idx] * 100)}
+            if out is not None:
+                out.write(json.dumps(row) + "\n")
+            else:
+                print(f"{row['label']:<35}{row['confidence']:>7.1f}%  {path}")
+    if out is not None:
+        out.close()
+
+
+def rescore_command(args):
+    # Hitung ulang prediksi head model atas embedding tersimpan, tanpa convolutional stack
+    store = EmbeddingStore(args.store)
+    model, version = load_keras_model(args.model)
+    if version != store.meta["model_version"]:
+        raise SystemExit(f"Store dibuat dengan model {store.meta['model_version']}, model saat ini {version}")
+    _, _, head = split_model(model, store.meta["layer"])
+    records = store.records()
+    start = time.perf_counter()
+    with open(args.output, "w", encoding="utf-8") as out:
+        for row_start, chunk in store.iter_chunks(args.chunk_size):
+            # Embedding disimpan flat; layer konvolusi/pooling memakai bentuk aslinya, mis. (7, 7, 512)
+            chunk = np.asarray(chunk).reshape(-1, *head.input_shape[1:])
+            for record, probabilities in zip(records[row_start:row_start + len(chunk)], head.predict(chunk, verbose=0)):
+                idx = int(probabilities.argmax())
+                out.write(json.dumps({
+                    "path": record["path"],
+                    "label": class_labels.get(idx, "Tidak Diketahui"),
+                    "confidence": float(probabilities[idx] * 100),
+                    "stored_label": record.get("label"),
+                }) + "\n")
+    print(f"{len(store)} embedding di-rescore dalam {time.perf_counter() - start:.1f} s -> {args.output}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Store embedding VGG16 (float16, mmap) dan klasifikasi kNN.")
+    parser.add_argument("--store", default="embeddings")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("extract", help="Ekstrak embedding folder gambar ke store")
+    p.add_argument("data", nargs="+", help="Folder gambar; subfolder = label (nama/indeks kelas atau kelas baru)")
+    p.add_argument("--label", help="Label untuk semua gambar, mis. contoh kelas baru")
+    p.add_argument("--model", default="model_sampah_vgg16.keras")
+    p.add_argument("--layer", help="Nama layer titik potong (default: layer sebelum output)")
+    p.add_argument("--batch-size", type=int, default=32)
+    p.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    p.add_argument("--segment-size", type=int, default=8192)
+    p.set_defaults(func=extract_command)
+
+    p = sub.add_parser("build-ivf", help="Bangun index IVF untuk kNN pada store besar")
+    p.add_argument("--lists", type=int, default=256)
+    p.add_argument("--sample", type=int, default=50000)
+    p.set_defaults(func=build_ivf_command)
+
+    p = sub.add_parser("knn", help="Klasifikasi gambar dengan kNN; tanpa input: evaluasi leave-one-out")
+    p.add_argument("inputs", nargs="*", help="Folder, file, atau glob")
+    p.add_argument("--k", type=int, default=10)
+    p.add_argument("--ivf", action="store_true")
+    p.add_argument("--nprobe", type=int, default=8)
+    p.add_argument("--model", default="model_sampah_vgg16.keras")
+    p.add_argument("--batch-size", type=int, default=256)
+    p.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    p.add_argument("--output", help="Tulis hasil sebagai .jsonl")
+    p.set_defaults(func=knn_command)
+
+    p = sub.add_parser("rescore", help="Hitung ulang prediksi head model dari embedding tersimpan")
+    p.add_argument("--model", default="model_sampah_vgg16.keras")
+    p.add_argument("--output", required=True)
+    p.add_argument("--chunk-size", type=int, default=65536)
+    p.set_defaults(func=rescore_command)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+import argparse
+
+import keras
+from tensorflow.keras.models import load_model
+
+import config
+from backends import serving_functions
+from model_loader import MODEL_PATH
+
+
+# --- Export Serving Model ---
+# python export_serving_model.py --model model_sampah_vgg16.keras --output serving_model
+# SavedModel dengan endpoint serve_float, serve_uint8 (N,224,224,3), dan serve_bytes
+# (JPEG/PNG mentah); rescale, decode, dan resize menjadi bagian dari graph.
+def export(model, output_dir):
+    archive = keras.export.ExportArchive()
+    archive.track(model)
+    for name, fn in serving_functions(model).items():
+        archive.add_endpoint(name=f"serve_{name}", fn=fn)
+    archive.write_out(output_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export model dengan preprocessing di dalam graph.")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--output", default=config.SERVING_MODEL_DIR)
+    args = parser.parse_args()
+    export(load_model(args.model), args.output)
+    print(f"Serving model disimpan di {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+import numpy as np
+
+
+# --- Micro-batching Inference Engine ---
+# Satu engine dipakai bersama oleh semua sesi Streamlit. Setiap permintaan masuk ke
+# antrean, lalu worker menggabungkannya menjadi satu forward pass ketika batch penuh
+# atau jendela waktu habis.
+class InferenceEngine:
+    def __init__(self, predict_fn, max_batch_size=8, max_wait_ms=5.0, collate=np.stack):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size harus >= 1")
+        self.predict_fn = predict_fn
+        # collate=list untuk sampel yang tidak bisa di-stack, mis. bytes gambar mentah
+        self.collate = collate
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._batch_sizes = Counter()
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, name="inference-engine", daemon=True)
+        self._worker.start()
+
+    def submit(self, sample):
+        # sample: satu gambar hasil preprocessing dengan shape (224, 224, 3), atau
+        # bytes JPEG/PNG jika predict_fn menerima input terenkode
+        if self._closed:
+            raise RuntimeError("InferenceEngine sudah ditutup")
+        future = Future()
+        self._queue.put((sample, future))
+        return future
+
+    def predict(self, batch, timeout=None):
+        # Antarmuka sama dengan model.predict: (N, 224, 224, 3) -> (N, num_classes)
+        futures = [self.submit(sample) for sample in batch]
+        deadline = None if timeout is None else time.monotonic() + timeout
+        try:
+            return np.stack([
+                future.result(timeout=None if deadline is None else max(0.0, deadline - time.monotonic()))
+                for future in futures
+            ])
+        except FutureTimeoutError:
+            # Sampel yang belum diproses dilewati worker (lihat _run)
+            for future in futures:
+                future.cancel()
+            raise
+
+    def swap(self, predict_fn):
+        # Hot reload: batch yang sedang berjalan selesai dengan fungsi lama, batch
+        # berikutnya memakai fungsi baru, sehingga tidak ada permintaan yang hilang
+        self.predict_fn = predict_fn
+
+    def stats(self):
+        with self._lock:
+            counts = dict(sorted(self._batch_sizes.items()))
+        batches = sum(counts.values())
+        requests = sum(size * n for size, n in counts.items())
+        return {
+            "requests": requests,
+            "batches": batches,
+            "mean_batch_size": requests / batches if batches else 0.0,
+            "max_batch_size": max(counts) if counts else 0,
+            "batch_size_counts": counts,
+        }
+
+    def close(self):
+        self._closed = True
+        self._queue.put(None)
+        self._worker.join()
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is None:
+            return None
+        items = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(items) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                # Selesaikan batch yang sedang dikumpulkan, lalu berhenti
+                self._queue.put(None)
+                break
+            items.append(item)
+        return items
+
+    def _run(self):
+        while True:
+            items = self._collect()
+            if items is None:
+                return
+
+            # Lewati permintaan yang sudah dibatalkan oleh pemanggil
+            items = [(sample, future) for sample, future in items if future.set_running_or_notify_cancel()]
+            if not items:
+                continue
+
+            predict_fn = self.predict_fn
+            try:
+                predictions = np.asarray(predict_fn(self.collate([sample for sample, _ in items])))
+            except Exception as e:
+                for _, future in items:
+                    future.set_exception(e)
+                continue
+
+            with self._lock:
+                self._batch_sizes[len(items)] += 1
+            for (_, future), row in zip(items, predictions):
+                future.set_result(row)
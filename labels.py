@@ -0,0 +1,15 @@
+# --- Define Class Label ---
+class_labels = {
+    0: 'Anorganik Daur Ulang',
+    1: 'Anorganik Tidak Daur Ulang',
+    2: 'B3 (Bahan Berbahaya dan Beracun)',
+    3: 'Organik'
+}
+
+
+def label_index(name):
+    # Nama folder dataset boleh berupa nama kelas atau indeksnya ("0".."3")
+    for idx, label in class_labels.items():
+        if name == label or name == str(idx):
+            return idx
+    return None
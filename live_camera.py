@@ -0,0 +1,306 @@
+import io
+import os
+import threading
+import time
+from collections import deque
+
+import numpy as np
+import requests
+from PIL import Image, ImageEnhance
+
+from labels import class_labels
+from preprocessing import decode_image, iter_image_files, resize_image, to_rgb
+
+
+# --- Frame Sources ---
+# Setiap sumber adalah iterable (captured_at, data) pada laju aslinya; captured_at
+# memakai time.perf_counter(). data berupa PIL Image atau bytes JPEG. Bytes baru
+# di-decode oleh loop inferensi, sehingga frame yang dibuang tidak pernah di-decode.
+def synthetic_frames(fps=30.0, size=(640, 480), images=None, scene_seconds=3.0, seed=0):
+    # Tanpa images: adegan gradien berwarna berganti setiap scene_seconds. Dengan folder
+    # images: setiap gambar ditahan scene_seconds dengan geser dan kecerahan acak kecil,
+    # seperti kamera kiosk yang mengarah ke barang yang sama.
+    rng = np.random.default_rng(seed)
+    scenes = [to_rgb(Image.open(path)).resize(size) for path in iter_image_files(images)] if images else None
+    frame_interval = 1.0 / fps
+    next_at = time.perf_counter()
+    index = 0
+    while True:
+        scene = int(index * frame_interval / scene_seconds)
+        if scenes:
+            base = scenes[scene % len(scenes)]
+        else:
+            y, x = np.mgrid[0:size[1], 0:size[0]]
+            hue = np.array([(scene * 67) % 256, (scene * 131) % 256, (scene * 199) % 256])
+            base = Image.fromarray(((hue + (x[..., None] + y[..., None]) // 8) % 256).astype(np.uint8))
+        dx, dy = rng.integers(-8, 9, size=2)
+        frame = base.transform(size, Image.Transform.AFFINE, (1, 0, int(dx), 0, 1, int(dy)))
+        frame = ImageEnhance.Brightness(frame).enhance(rng.uniform(0.9, 1.1))
+        next_at += frame_interval
+        delay = next_at - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        yield time.perf_counter(), frame
+        index += 1
+
+
+def folder_frames(folder, fps=10.0):
+    # Rekaman lokal yang diekspor sebagai urutan gambar, diputar berulang
+    paths = list(iter_image_files(folder))
+    if not paths:
+        raise ValueError(f"Tidak ada gambar di {folder}")
+    next_at = time.perf_counter()
+    while True:
+        for path in paths:
+            with open(path, "rb") as f:
+                data = f.read()
+            next_at += 1.0 / fps
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            yield time.perf_counter(), data
+
+
+class MjpegFrames:
+    # Stream MJPEG (multipart/x-mixed-replace) dari kamera IP, mjpg-streamer, atau ustreamer;
+    # frame dipotong dari marker JPEG SOI/EOI tanpa bergantung pada header multipart.
+    # interrupt() menutup koneksi dari thread lain sehingga read yang sedang memblokir selesai.
+    def __init__(self, url, timeout=10.0, chunk_size=65536, max_frame_bytes=8 * 1024 * 1024):
+        self.url = url
+        self.timeout = timeout
+        self.chunk_size = chunk_size
+        self.max_frame_bytes = max_frame_bytes
+        self._response = None
+        self._interrupted = False
+
+    def __iter__(self):
+        with requests.get(self.url, stream=True, timeout=self.timeout) as response:
+            self._response = response
+            if self._interrupted:
+                return
+            response.raise_for_status()
+            buffer = b""
+            for chunk in response.iter_content(self.chunk_size):
+                buffer += chunk
+                while True:
+                    start = buffer.find(b"\xff\xd8")
+                    if start < 0:
+                        # Sisakan byte terakhir: bisa jadi awal marker SOI yang terpotong
+                        buffer = buffer[-1:]
+                        break
+                    buffer = buffer[start:]
+                    end = buffer.find(b"\xff\xd9", 2)
+                    if end < 0:
+                        break
+                    yield time.perf_counter(), buffer[:end + 2]
+                    buffer = buffer[end + 2:]
+                if len(buffer) > self.max_frame_bytes:
+                    raise ValueError(f"Frame MJPEG melebihi {self.max_frame_bytes} byte tanpa marker EOI")
+
+    def interrupt(self):
+        self._interrupted = True
+        if self._response is not None:
+            self._response.close()
+
+
+def frame_source(source, fps=30.0):
+    # Factory untuk LiveClassifier; dipanggil ulang setiap kali live mode dimulai
+    if source == "synthetic":
+        return lambda: synthetic_frames(fps)
+    if source.startswith(("http://", "https://")):
+        return lambda: MjpegFrames(source)
+    if os.path.isdir(source):
+        return lambda: folder_frames(source, fps)
+    raise ValueError(f"Sumber live tidak dikenal: {source!r} (pakai 'synthetic', folder gambar, atau URL MJPEG)")
+
+
+# --- Latest-frame Buffer ---
+# Hanya satu slot: frame baru menimpa frame yang belum diambil (dihitung sebagai dropped),
+# jadi inferensi selalu memproses frame terbaru dan tidak ada antrean yang menumpuk.
+class LatestFrameBuffer:
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._frame = None
+        self.received = 0
+        self.dropped = 0
+
+    def put(self, frame):
+        with self._cond:
+            if self._frame is not None:
+                self.dropped += 1
+            self._frame = frame
+            self.received += 1
+            self._cond.notify()
+
+    def take(self, timeout=None):
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._frame is not None, timeout):
+                return None
+            frame, self._frame = self._frame, None
+            return frame
+
+
+# --- Temporal Smoothing ---
+# Rata-rata probabilitas beberapa prediksi terakhir, agar label di layar tidak berkedip
+# ketika satu frame (blur, tangan lewat) diklasifikasi berbeda
+class PredictionSmoother:
+    def __init__(self, window=5):
+        self._history = deque(maxlen=max(1, window))
+
+    def update(self, probabilities):
+        self._history.append(np.asarray(probabilities, dtype=np.float32))
+        return np.mean(self._history, axis=0)
+
+    def reset(self):
+        self._history.clear()
+
+
+# --- Live Classifier ---
+# Thread capture mengisi buffer pada laju kamera; thread inferensi mengambil frame
+# terbaru dengan interval adaptif max(1 / max_fps, latency model / duty_cycle), sehingga
+# inferensi tidak pernah memakai lebih dari duty_cycle waktu CPU meskipun model melambat.
+# open_frames: callable yang mengembalikan iterable frame baru setiap kali start().
+class LiveClassifier:
+    def __init__(self, open_frames, predict_fn, smoothing_window=5, max_fps=10.0, duty_cycle=0.8, window=256):
+        if not 0 < duty_cycle <= 1:
+            raise ValueError("duty_cycle harus di antara 0 dan 1")
+        self.open_frames = open_frames
+        self.predict_fn = predict_fn
+        self.min_interval = 1.0 / max_fps
+        self.duty_cycle = duty_cycle
+        self.buffer = LatestFrameBuffer()
+        self.smoother = PredictionSmoother(smoothing_window)
+
+        self._lock = threading.Lock()
+        self._latest = None
+        self._model_latency = None
+        self._label_times = deque(maxlen=window)
+        self._frame_to_label = deque(maxlen=window)
+        self._counters = {"inferred": 0, "errors": 0}
+        self._source_error = None
+        self._running = threading.Event()
+        self._threads = []
+        self._frames = None
+
+    @property
+    def running(self):
+        return self._running.is_set()
+
+    def interval(self):
+        with self._lock:
+            latency = self._model_latency
+        return max(self.min_interval, latency / self.duty_cycle) if latency else self.min_interval
+
+    def start(self):
+        if self.running:
+            return
+        # Thread dari sesi sebelumnya harus benar-benar berhenti agar tidak ada dua capture
+        for thread in self._threads:
+            thread.join(timeout=5.0)
+            if thread.is_alive():
+                raise RuntimeError(f"Thread {thread.name} sebelumnya belum berhenti")
+        self.smoother.reset()
+        self._running.set()
+        self._threads = [
+            threading.Thread(target=self._capture, name="live-capture", daemon=True),
+            threading.Thread(target=self._infer, name="live-inference", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        self._running.clear()
+        # Sumber jaringan bisa memblokir di read; tutup koneksinya agar thread capture selesai
+        interrupt = getattr(self._frames, "interrupt", None)
+        if interrupt is not None:
+            interrupt()
+        for thread in self._threads:
+            thread.join(timeout=5.0)
+        self._threads = [thread for thread in self._threads if thread.is_alive()]
+
+    def latest(self):
+        # dict label, confidence, probabilities (smoothed), raw_label, frame, age_s; None sebelum frame pertama
+        with self._lock:
+            latest = dict(self._latest) if self._latest else None
+        if latest:
+            latest["age_s"] = time.perf_counter() - latest.pop("labeled_at")
+        return latest
+
+    def stats(self):
+        with self._lock:
+            label_times = list(self._label_times)
+            latencies = list(self._frame_to_label)
+            stats = dict(self._counters)
+            model_latency = self._model_latency
+        span = label_times[-1] - label_times[0] if len(label_times) > 1 else 0.0
+        received = self.buffer.received
+        return {
+            **stats,
+            "received": received,
+            "dropped": self.buffer.dropped,
+            "drop_rate": self.buffer.dropped / received if received else 0.0,
+            "fps": (len(label_times) - 1) / span if span else 0.0,
+            "model_latency_ms": model_latency * 1000 if model_latency else 0.0,
+            "interval_ms": self.interval() * 1000,
+            "frame_to_label_p50_ms": float(np.percentile(latencies, 50)) * 1000 if latencies else 0.0,
+            "frame_to_label_p95_ms": float(np.percentile(latencies, 95)) * 1000 if latencies else 0.0,
+            "source_error": self._source_error,
+        }
+
+    def _capture(self):
+        self._source_error = None
+        frames = None
+        try:
+            self._frames = self.open_frames()
+            frames = iter(self._frames)
+            for frame in frames:
+                if not self.running:
+                    break
+                self.buffer.put(frame)
+        except Exception as e:
+            # Error karena koneksi ditutup oleh stop() bukan error sumber
+            if self.running:
+                self._source_error = f"{type(e).__name__}: {e}"
+        finally:
+            if frames is not None:
+                frames.close()
+
+    def _infer(self):
+        next_start = time.perf_counter()
+        while self.running:
+            delay = next_start - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            # Frame diambil setelah jeda, jadi yang diproses adalah frame paling baru
+            frame = self.buffer.take(timeout=0.5)
+            if frame is None:
+                continue
+            captured_at, data = frame
+            start = time.perf_counter()
+            try:
+                img = decode_image(io.BytesIO(data)) if isinstance(data, bytes) else data
+                img = resize_image(to_rgb(img))
+                probabilities = self.predict_fn(np.asarray(img)[np.newaxis])[0]
+            except Exception:
+                with self._lock:
+                    self._counters["errors"] += 1
+                next_start = start + self.min_interval
+                continue
+            done = time.perf_counter()
+            smoothed = self.smoother.update(probabilities)
+            class_idx = int(np.argmax(smoothed))
+            with self._lock:
+                latency = done - start
+                self._model_latency = latency if self._model_latency is None else 0.8 * self._model_latency + 0.2 * latency
+                self._label_times.append(done)
+                self._frame_to_label.append(done - captured_at)
+                self._counters["inferred"] += 1
+                self._latest = {
+                    "label": class_labels.get(class_idx, "Tidak Diketahui"),
+                    "confidence": float(smoothed[class_idx]) * 100,
+                    "probabilities": smoothed,
+                    "raw_label": class_labels.get(int(np.argmax(probabilities)), "Tidak Diketahui"),
+                    "frame": img,
+                    "labeled_at": done,
+                }
+            next_start = start + self.interval()
@@ -0,0 +1,168 @@
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+# --- Latency Recorder ---
+# Histogram bergulir per (stage, source): window berisi N durasi terakhir untuk persentil,
+# ditambah count/sum kumulatif untuk format Prometheus.
+class LatencyRecorder:
+    def __init__(self, window=1024):
+        self.window = window
+        self._series = {}
+        self._gauges = {}
+        # Kegagalan stats_fn dan penulisan file dump; tampil sebagai gauge ecosort_metrics_*
+        self._errors = {"gauge_errors": 0, "export_errors": 0}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def observe(self, stage, source, seconds):
+        key = (stage, source)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {"samples": deque(maxlen=self.window), "count": 0, "sum": 0.0}
+            series["samples"].append(seconds)
+            series["count"] += 1
+            series["sum"] += seconds
+        stages = getattr(self._local, "stages", None)
+        if stages is not None:
+            stages[stage] = stages.get(stage, 0.0) + seconds
+
+    @contextmanager
+    def timer(self, stage, source="unknown"):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, source, time.perf_counter() - start)
+
+    @contextmanager
+    def collect(self):
+        # Durasi per tahap yang diamati di thread ini selama blok with (satu sesi Streamlit
+        # menjalankan skripnya di satu thread), untuk log per permintaan
+        stages = {}
+        previous = getattr(self._local, "stages", None)
+        self._local.stages = stages
+        try:
+            yield stages
+        finally:
+            self._local.stages = previous
+
+    def register_gauges(self, name, stats_fn):
+        # stats_fn mengembalikan dict angka, mis. engine.stats atau cache.stats
+        with self._lock:
+            self._gauges[name] = stats_fn
+
+    def snapshot(self):
+        with self._lock:
+            series = {key: (sorted(s["samples"]), s["count"], s["sum"]) for key, s in self._series.items()}
+        rows = []
+        for (stage, source), (samples, count, total) in sorted(series.items()):
+            row = {"stage": stage, "source": source, "count": count, "sum": total}
+            for q in QUANTILES:
+                row[f"p{int(q * 100)}"] = _quantile(samples, q)
+            rows.append(row)
+        return rows
+
+    def gauges(self):
+        with self._lock:
+            gauges = dict(self._gauges)
+        values = {}
+        for name, stats_fn in gauges.items():
+            try:
+                stats = stats_fn()
+            except Exception:
+                # Satu komponen yang gagal (mis. saat hot swap) tidak boleh menghentikan export
+                self.count_error("gauge_errors")
+                continue
+            for key, value in stats.items():
+                if isinstance(value, (int, float)):
+                    values[f"{name}_{key}"] = value
+        with self._lock:
+            values.update({f"metrics_{key}": value for key, value in self._errors.items()})
+        return values
+
+    def count_error(self, kind):
+        with self._lock:
+            self._errors[kind] += 1
+
+    def prometheus_text(self):
+        lines = [
+            "# HELP ecosort_stage_latency_seconds Latency per tahap pipeline klasifikasi.",
+            "# TYPE ecosort_stage_latency_seconds summary",
+        ]
+        for row in self.snapshot():
+            labels = f'stage="{row["stage"]}",source="{row["source"]}"'
+            for q in QUANTILES:
+                value = row[f"p{int(q * 100)}"]
+                if value is not None:
+                    lines.append(f'ecosort_stage_latency_seconds{{{labels},quantile="{q}"}} {value:.6f}')
+            lines.append(f"ecosort_stage_latency_seconds_sum{{{labels}}} {row['sum']:.6f}")
+            lines.append(f"ecosort_stage_latency_seconds_count{{{labels}}} {row['count']}")
+        for name, value in sorted(self.gauges().items()):
+            lines.append(f"# TYPE ecosort_{name} gauge")
+            lines.append(f"ecosort_{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _quantile(samples, q):
+    if not samples:
+        return None
+    index = min(len(samples) - 1, max(0, math.ceil(q * len(samples)) - 1))
+    return samples[index]
+
+
+# Recorder bersama untuk seluruh proses
+stage_metrics = LatencyRecorder()
+
+
+# --- Exporter ---
+# Menulis dump Prometheus ke file secara berkala dan/atau menyajikannya di /metrics.
+def write_prometheus_file(recorder, path):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(recorder.prometheus_text())
+    os.replace(tmp_path, path)
+
+
+def start_exporter(recorder, file_path=None, port=0, interval=10.0):
+    if file_path:
+        def _write_loop():
+            while True:
+                try:
+                    write_prometheus_file(recorder, file_path)
+                except Exception:
+                    # Thread exporter harus tetap hidup; kegagalan dihitung dan dicoba lagi
+                    recorder.count_error("export_errors")
+                time.sleep(interval)
+
+        threading.Thread(target=_write_loop, name="metrics-file", daemon=True).start()
+
+    server = None
+    if port:
+        class _MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = recorder.prometheus_text().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer(("0.0.0.0", port), _MetricsHandler)
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
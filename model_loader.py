@@ -0,0 +1,130 @@
+import os
+import threading
+import time
+
+import gdown
+from tensorflow.keras.models import load_model
+
+import config
+from backends import CascadeBackend, KerasBackend, SavedModelBackend, TFLiteBackend, tflite_path
+from model_store import open_store
+from precision import select_precision
+
+
+# --- Model Artifact ---
+# Artefak bawaan diunduh dari Google Drive; ECOSORT_MODEL_PATH boleh menunjuk model lain
+# dengan input/output yang sama (mis. student hasil distill.py) yang dipakai apa adanya
+DEFAULT_MODEL_PATH = 'model_sampah_vgg16.keras'
+MODEL_PATH = config.MODEL_PATH or DEFAULT_MODEL_PATH
+GDRIVE_FILE_ID = "1lWx7TBcjxxFO3MOUWKEW7oUPVepWxgqN"
+# File yang lebih kecil dari ini dianggap unduhan yang terpotong
+MIN_MODEL_SIZE = 100000000
+
+
+def ensure_model_file(model_path=MODEL_PATH, gdrive_file_id=GDRIVE_FILE_ID, on_warning=print):
+    if os.path.exists(model_path) and os.path.getsize(model_path) < MIN_MODEL_SIZE:
+        on_warning(f"File '{model_path}' ditemukan tetapi ukurannya terlalu kecil ({os.path.getsize(model_path)} bytes). Mengunduh ulang...")
+        os.remove(model_path)
+
+    if not os.path.exists(model_path):
+        gdown.download(id=gdrive_file_id, output=model_path, quiet=False, fuzzy=True)
+    return model_path
+
+
+def resolve_model_file(model_path, on_warning=print):
+    if model_path == DEFAULT_MODEL_PATH:
+        return ensure_model_file(model_path, on_warning=on_warning)
+    if not os.path.exists(model_path):
+        raise FileNotFoundError(f"Model tidak ditemukan: {model_path}")
+    return model_path
+
+
+# --- Load Backend ---
+# Dipakai bersama oleh app.py (lewat load_ml_model) dan tool command-line. Jika
+# ECOSORT_MODEL_STORE diisi, artefak diambil dari store terverifikasi (versi aktif atau
+# `version`) dan artefak TFLite dicari di direktori versi yang sama.
+def load_backend(backend=config.BACKEND, model_path=MODEL_PATH, tflite_dir=config.TFLITE_DIR, on_warning=print, version=None,
+                 cascade_model_path=config.CASCADE_MODEL_PATH, precision=config.PRECISION):
+    serving_dir = config.SERVING_MODEL_DIR
+    store = open_store()
+    if store is not None:
+        version = store.ensure(version or config.MODEL_VERSION or None)
+        model_path = store.model_path(version)
+        tflite_dir = store.version_dir(version)
+        serving_dir = os.path.join(store.version_dir(version), "serving_model")
+        # Model tahap pertama boleh dipublikasikan bersama versi model utama
+        if cascade_model_path:
+            published = os.path.join(store.version_dir(version), os.path.basename(cascade_model_path))
+            if os.path.exists(published):
+                cascade_model_path = published
+
+    loaded = _load_single_backend(backend, model_path, tflite_dir, serving_dir, store, on_warning, precision)
+    if cascade_model_path:
+        loaded = CascadeBackend(load_keras_backend(cascade_model_path), loaded, threshold=config.CASCADE_THRESHOLD)
+    loaded.version = version
+    return loaded
+
+
+def load_keras_backend(model_path, precision="float32", on_warning=print):
+    # Presisi dipilih sebelum tf.function di-trace dan di-warmup
+    model, precision_report = select_precision(load_model(model_path), precision, on_warning=on_warning)
+    loaded = KerasBackend(
+        model,
+        artifact_path=model_path,
+        path=config.INFERENCE_PATH,
+        jit_compile=config.XLA_JIT,
+        warmup_batch_sizes=config.WARMUP_BATCH_SIZES,
+    )
+    loaded.precision_report = precision_report
+    return loaded
+
+
+def _load_single_backend(backend, model_path, tflite_dir, serving_dir, store, on_warning, precision):
+    if backend == "savedmodel":
+        # Serving model dibuat sebelumnya dengan export_serving_model.py
+        return SavedModelBackend(serving_dir)
+
+    if backend != "keras":
+        # Artefak TFLite dibuat sebelumnya dengan convert_tflite.py
+        artifact_path = tflite_path(backend, tflite_dir, model_path)
+        return TFLiteBackend(artifact_path, name=backend, num_threads=config.TFLITE_THREADS, use_xnnpack=config.TFLITE_XNNPACK)
+
+    if store is None:
+        resolve_model_file(model_path, on_warning)
+    return load_keras_backend(model_path, precision, on_warning)
+
+
+# --- Hot Reload ---
+# Memantau versi aktif di store; ketika berubah (python model_store.py activate <versi>)
+# model baru dimuat di background lalu di-swap ke engine tanpa menghentikan proses.
+class ModelReloader:
+    def __init__(self, store, engine, backend_name, version, interval=30.0, on_swap=None, predict_method="predict_uint8"):
+        self.store = store
+        self.engine = engine
+        # Method backend yang dipasang ke engine, harus sama dengan input engine
+        self.predict_method = predict_method
+        self.backend_name = backend_name
+        self.version = version
+        self.interval = interval
+        self.on_swap = on_swap
+        self.last_error = None
+        self._thread = threading.Thread(target=self._run, name="model-reloader", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            version = self.store.current_version()
+            if not version or version == self.version:
+                continue
+            try:
+                backend = load_backend(self.backend_name, version=version)
+            except Exception as e:
+                # Versi baru gagal dimuat/diverifikasi: tetap layani dengan versi lama
+                self.last_error = f"{version}: {e}"
+                continue
+            self.engine.swap(getattr(backend, self.predict_method))
+            self.version = version
+            self.last_error = None
+            if self.on_swap is not None:
+                self.on_swap(backend)
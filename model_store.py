@@ -0,0 +1,300 @@
+import argparse
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+
+import requests
+
+import config
+
+
+CHUNK_SIZE = 8 * 1024 * 1024
+
+
+class ModelIntegrityError(Exception):
+    pass
+
+
+# --- Model Artifact Store ---
+# Layout:
+#   <root>/<versi>/manifest.json   {"version", "model", "files": {nama: {"sha256", "size"}}}
+#   <root>/<versi>/<file model>
+#   <root>/CURRENT                 versi yang aktif
+#   <root>/.staging/<versi>/       unduhan yang belum selesai (.partial dilanjutkan)
+# Sumber (mirror) memakai layout yang sama plus file LATEST, dan bisa berupa direktori
+# lokal (sepenuhnya offline) atau URL HTTP(S).
+class ModelStore:
+    def __init__(self, root, source=None, chunk_size=CHUNK_SIZE):
+        self.root = root
+        self.source = source
+        self.chunk_size = chunk_size
+        os.makedirs(root, exist_ok=True)
+
+    # --- Versi lokal ---
+    def version_dir(self, version):
+        return os.path.join(self.root, _safe_name(version, "versi"))
+
+    def has_version(self, version):
+        return os.path.exists(os.path.join(self.version_dir(version), "manifest.json"))
+
+    def manifest(self, version):
+        with open(os.path.join(self.version_dir(version), "manifest.json"), encoding="utf-8") as f:
+            return json.load(f)
+
+    def model_path(self, version):
+        return os.path.join(self.version_dir(version), _safe_name(self.manifest(version)["model"], "model"))
+
+    def versions(self):
+        return sorted(name for name in os.listdir(self.root) if not name.startswith(".") and self.has_version(name))
+
+    def current_version(self):
+        try:
+            with open(os.path.join(self.root, "CURRENT"), encoding="utf-8") as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def activate(self, version):
+        if not self.has_version(version):
+            raise ValueError(f"Versi model {version!r} belum ada di store")
+        _write_atomic(os.path.join(self.root, "CURRENT"), version)
+
+    def verify(self, version, full=False):
+        # Default hanya memeriksa ukuran (cepat saat startup); full=True menghitung ulang sha256
+        manifest = self.manifest(version)
+        for name, meta in manifest["files"].items():
+            path = os.path.join(self.version_dir(version), _safe_name(name, "file"))
+            _verify_file(path, meta, full)
+
+    # --- Fetch dari sumber ---
+    def latest_version(self):
+        return self._read_source_text("LATEST").strip()
+
+    def fetch(self, version):
+        if self.has_version(version):
+            return self.version_dir(version)
+        if not self.source:
+            raise ValueError("Sumber model (ECOSORT_MODEL_SOURCE) belum dikonfigurasi")
+
+        # Worker pool, app, dan replika server bisa memanggil ensure() bersamaan; satu proses
+        # mengunduh, yang lain menunggu lalu memakai hasilnya
+        os.makedirs(os.path.join(self.root, ".staging"), exist_ok=True)
+        with _file_lock(os.path.join(self.root, ".staging", f"{_safe_name(version, 'versi')}.lock")):
+            if self.has_version(version):
+                return self.version_dir(version)
+            return self._fetch_locked(version)
+
+    def _fetch_locked(self, version):
+        manifest = json.loads(self._read_source_text(f"{version}/manifest.json"))
+        # Manifest dari mirror tidak dipercaya: semua nama harus satu komponen path biasa
+        _safe_name(manifest["model"], "model")
+        for name in manifest["files"]:
+            _safe_name(name, "file")
+        staging = os.path.join(self.root, ".staging", version)
+        os.makedirs(staging, exist_ok=True)
+        for name, meta in manifest["files"].items():
+            target = os.path.join(staging, name)
+            if os.path.exists(target):
+                try:
+                    _verify_file(target, meta, full=True)
+                    continue
+                except ModelIntegrityError:
+                    os.remove(target)
+            self._fetch_file(f"{version}/{name}", target, meta)
+        _write_atomic(os.path.join(staging, "manifest.json"), json.dumps(manifest, indent=2))
+
+        # Direktori versi muncul secara atomik dan hanya setelah semua file terverifikasi
+        if os.path.exists(self.version_dir(version)):
+            shutil.rmtree(self.version_dir(version))
+        os.replace(staging, self.version_dir(version))
+        return self.version_dir(version)
+
+    def ensure(self, version=None):
+        version = version or self.current_version() or self.latest_version()
+        self.fetch(version)
+        self.verify(version, full=config.MODEL_VERIFY_FULL)
+        if self.current_version() is None:
+            self.activate(version)
+        return version
+
+    def _fetch_file(self, relpath, target, meta):
+        partial = f"{target}.partial"
+        offset = os.path.getsize(partial) if os.path.exists(partial) else 0
+        if offset > meta["size"]:
+            os.remove(partial)
+            offset = 0
+
+        # Lanjutkan dari byte terakhir yang sudah tersimpan; jika mirror mengabaikan Range,
+        # unduhan diulang dari awal dan .partial ditimpa
+        offset, chunks = self._open_source(relpath, offset)
+        with open(partial, "ab" if offset else "wb") as out:
+            for chunk in chunks:
+                out.write(chunk)
+            out.flush()
+            os.fsync(out.fileno())
+
+        try:
+            _verify_file(partial, meta, full=True)
+        except ModelIntegrityError:
+            os.remove(partial)
+            raise
+        os.replace(partial, target)
+
+    def _is_remote(self):
+        return self.source.startswith(("http://", "https://"))
+
+    def _open_source(self, relpath, offset):
+        # Mengembalikan (offset sebenarnya, iterator chunk)
+        if self._is_remote():
+            headers = {"Range": f"bytes={offset}-"} if offset else {}
+            response = requests.get(f"{self.source.rstrip('/')}/{relpath}", headers=headers, stream=True, timeout=60)
+            response.raise_for_status()
+            if offset and response.status_code != 206:
+                # Mirror tidak mendukung Range request: body 200 berisi file utuh
+                offset = 0
+            return offset, response.iter_content(self.chunk_size)
+        return offset, _read_chunks(os.path.join(self.source, relpath), offset, self.chunk_size)
+
+    def _read_source_text(self, relpath):
+        if self._is_remote():
+            response = requests.get(f"{self.source.rstrip('/')}/{relpath}", timeout=60)
+            response.raise_for_status()
+            return response.text
+        with open(os.path.join(self.source, relpath), encoding="utf-8") as f:
+            return f.read()
+
+
+def open_store():
+    if not config.MODEL_STORE_DIR:
+        return None
+    return ModelStore(config.MODEL_STORE_DIR, config.MODEL_SOURCE or None)
+
+
+# --- Helpers ---
+def file_sha256(path, chunk_size=CHUNK_SIZE):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _safe_name(name, kind):
+    # Versi dan nama file dipakai sebagai satu komponen path di dalam store; tolak nama
+    # absolut, "..", atau yang mengandung pemisah direktori agar tidak menulis di luar store
+    if (
+        not isinstance(name, str)
+        or not name
+        or name in (".", "..")
+        or os.path.isabs(name)
+        or ".." in name.replace("\\", "/").split("/")
+        or name != os.path.basename(name)
+        or (os.path.altsep and os.path.altsep in name)
+    ):
+        raise ModelIntegrityError(f"Nama {kind} tidak valid: {name!r}")
+    return name
+
+
+def _verify_file(path, meta, full):
+    if not os.path.exists(path):
+        raise ModelIntegrityError(f"File model hilang: {path}")
+    size = os.path.getsize(path)
+    if size != meta["size"]:
+        raise ModelIntegrityError(f"Ukuran {path} tidak cocok ({size} != {meta['size']} bytes)")
+    if full and file_sha256(path) != meta["sha256"]:
+        raise ModelIntegrityError(f"Checksum {path} tidak cocok dengan manifest")
+
+
+@contextmanager
+def _file_lock(path):
+    # Lock antarproses (Linux/macOS); dilepas otomatis jika proses mati
+    with open(path, "a") as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def _read_chunks(path, offset, chunk_size):
+    with open(path, "rb") as f:
+        f.seek(offset)
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+
+def _write_atomic(path, text):
+    # Nama tmp unik per proses/thread: ensure() paralel bisa menulis CURRENT bersamaan
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def publish(files, version, dest):
+    # Salin artefak ke mirror/direktori sumber beserta manifest dan tandai sebagai LATEST.
+    # File pertama dianggap model utama.
+    version_dir = os.path.join(dest, _safe_name(version, "versi"))
+    os.makedirs(version_dir, exist_ok=True)
+    manifest = {"version": version, "model": os.path.basename(files[0]), "files": {}}
+    for path in files:
+        name = os.path.basename(path)
+        shutil.copyfile(path, os.path.join(version_dir, name))
+        manifest["files"][name] = {"sha256": file_sha256(path), "size": os.path.getsize(path)}
+    _write_atomic(os.path.join(version_dir, "manifest.json"), json.dumps(manifest, indent=2))
+    _write_atomic(os.path.join(dest, "LATEST"), version)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Kelola store artefak model EcoSort AI.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("publish", help="Publikasikan artefak ke direktori sumber/mirror")
+    p.add_argument("files", nargs="+", help="File model (file pertama = model utama), mis. .keras dan .tflite")
+    p.add_argument("--version", required=True)
+    p.add_argument("--dest", default=config.MODEL_SOURCE)
+
+    p = sub.add_parser("fetch", help="Unduh (dapat dilanjutkan) dan verifikasi versi ke store lokal")
+    p.add_argument("--version", help="Default: LATEST dari sumber")
+    p.add_argument("--activate", action="store_true")
+
+    p = sub.add_parser("activate", help="Jadikan versi aktif; proses yang berjalan akan hot-swap")
+    p.add_argument("version")
+
+    sub.add_parser("list", help="Tampilkan versi di store lokal")
+    args = parser.parse_args()
+
+    if args.command == "publish":
+        manifest = publish(args.files, args.version, args.dest)
+        print(json.dumps(manifest, indent=2))
+        return
+
+    store = open_store()
+    if store is None:
+        parser.error("ECOSORT_MODEL_STORE belum diisi")
+    if args.command == "fetch":
+        version = args.version or store.latest_version()
+        store.fetch(version)
+        store.verify(version, full=True)
+        if args.activate:
+            store.activate(version)
+        print(f"Versi {version} tersedia di {store.version_dir(version)}")
+    elif args.command == "activate":
+        store.activate(args.version)
+        print(f"Versi aktif: {args.version}")
+    elif args.command == "list":
+        current = store.current_version()
+        for version in store.versions():
+            print(f"{'*' if version == current else ' '} {version}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+import threading
+from collections import deque
+
+import keras
+import numpy as np
+import tensorflow as tf
+from PIL import Image, ImageDraw, ImageFont
+
+from inference import InferenceEngine
+from preprocessing import RESAMPLE_FILTERS
+
+
+# --- Fully Convolutional Head ---
+# Classifier 224x224 diubah menjadi model konvolusional penuh: bagian konvolusi dipakai apa
+# adanya pada input yang lebih besar, Flatten + Dense pertama menjadi Conv2D dengan kernel
+# seukuran grid fitur (7x7 untuk VGG16), dan GlobalAveragePooling2D menjadi AveragePooling2D
+# dengan jendela yang sama. Dense/Dropout/Softmax setelahnya bekerja pada sumbu terakhir
+# sehingga dipakai ulang langsung. Satu forward pass menghasilkan grid probabilitas, satu sel
+# per jendela 224x224 yang digeser `stride` piksel, dengan fitur konvolusi yang dihitung
+# sekali untuk semua jendela yang saling tumpang-tindih.
+HEAD_LAYERS = (
+    keras.layers.Dense,
+    keras.layers.Dropout,
+    keras.layers.Activation,
+    keras.layers.Softmax,
+    keras.layers.BatchNormalization,
+)
+
+
+def split_head(model):
+    # Titik potong: Flatten/GlobalAveragePooling2D terakhir di level atas model. Head
+    # diasumsikan berurutan, seperti split_model di embeddings.py
+    layers = model.layers
+    cut = next(
+        (i for i in range(len(layers) - 1, -1, -1) if isinstance(layers[i], (keras.layers.Flatten, keras.layers.GlobalAveragePooling2D))),
+        None,
+    )
+    if cut is None:
+        raise ValueError("Model tidak punya layer Flatten/GlobalAveragePooling2D sebelum head")
+    for layer in layers[cut + 1:]:
+        if not isinstance(layer, HEAD_LAYERS):
+            raise ValueError(f"Layer head {layer.name} ({type(layer).__name__}) tidak bisa dibuat konvolusional")
+    return layers[cut], layers[cut + 1:]
+
+
+def fully_convolutional(model, stride=32):
+    # Mengembalikan (model, window, stride); stride dibulatkan ke kelipatan stride fitur
+    pool, head = split_head(model)
+    features = keras.Model(model.inputs, pool.input)
+    window = model.input_shape[1]
+    grid_h, grid_w = features.output_shape[1:3]
+    feature_stride = window // grid_w
+    step = max(1, round(stride / feature_stride))
+
+    inputs = keras.Input((None, None, 3))
+    x = features(inputs)
+    if isinstance(pool, keras.layers.Flatten):
+        dense, head = head[0], head[1:]
+        if not isinstance(dense, keras.layers.Dense):
+            raise ValueError(f"Layer setelah Flatten harus Dense, bukan {type(dense).__name__}")
+        conv = keras.layers.Conv2D(
+            dense.units,
+            (grid_h, grid_w),
+            strides=step,
+            activation=dense.activation,
+            use_bias=dense.use_bias,
+            dtype=dense.dtype_policy,
+            name=f"{dense.name}_conv",
+        )
+        x = conv(x)
+        # Flatten channels_last berurutan (baris, kolom, channel), sama dengan urutan kernel Conv2D
+        kernel, *bias = dense.get_weights()
+        conv.set_weights([kernel.reshape(grid_h, grid_w, -1, dense.units), *bias])
+    else:
+        x = keras.layers.AveragePooling2D((grid_h, grid_w), strides=step, dtype=pool.dtype_policy, name=f"{pool.name}_window")(x)
+    for layer in head:
+        x = layer(x)
+    return keras.Model(inputs, x), window, step * feature_stride
+
+
+def dense_predict_fn(model):
+    # Input uint8 dengan tinggi/lebar bebas; di-trace sekali untuk semua ukuran gambar
+    @tf.function(input_signature=[tf.TensorSpec((None, None, None, 3), tf.uint8)], reduce_retracing=True)
+    def predict(batch):
+        return model(tf.cast(batch, tf.float32) / 255.0, training=False)
+
+    return lambda batch: predict(np.asarray(batch, dtype=np.uint8)).numpy()
+
+
+# --- Per-tile Scoring ---
+# Jalur tanpa model Keras (TFLite, SavedModel): setiap jendela dipotong dan diklasifikasi
+# sebagai gambar 224x224 sendiri lewat predict_fn biasa. Ukuran grid-nya sama dengan jalur
+# konvolusional, tetapi konvolusi di area yang tumpang-tindih dihitung berulang kali. Nilainya
+# tidak identik jika model memakai padding "same" (VGG16): di jalur konvolusional tepi jendela
+# melihat piksel tetangga yang sebenarnya, bukan nol.
+def grid_shape(height, width, window, stride):
+    return (height - window) // stride + 1, (width - window) // stride + 1
+
+
+def iter_tiles(img_array, window, stride, batch_size):
+    rows, cols = grid_shape(*img_array.shape[:2], window, stride)
+    views = np.lib.stride_tricks.sliding_window_view(img_array, (window, window, 3))[::stride, ::stride, 0]
+    tiles = views[:rows, :cols].reshape(-1, window, window, 3)
+    for start in range(0, len(tiles), batch_size):
+        yield np.ascontiguousarray(tiles[start:start + batch_size])
+
+
+def tile_probabilities(predict_fn, img_array, window, stride, batch_size=16):
+    rows, cols = grid_shape(*img_array.shape[:2], window, stride)
+    probabilities = np.concatenate([np.asarray(predict_fn(batch)) for batch in iter_tiles(img_array, window, stride, batch_size)])
+    return probabilities.reshape(rows, cols, -1)
+
+
+# --- Region Merging ---
+# Sel dengan confidence >= min_confidence digabung dengan tetangganya (4 arah) yang berlabel
+# sama. Setiap sel mewakili area di sekitar pusat jendelanya: batas antar sel ada di tengah
+# antara dua pusat dan sel di tepi diperpanjang sampai tepi gambar, sehingga sel-sel
+# menutup gambar tanpa tumpang-tindih. Kotak region dalam pecahan 0..1 dari lebar/tinggi.
+def cell_edges(size, cells, window, stride):
+    centers = window / 2 + stride * np.arange(cells)
+    return np.concatenate([[0.0], (centers[:-1] + centers[1:]) / 2, [float(size)]]) / size
+
+
+def merge_regions(probabilities, size, window, stride, min_confidence=0.6, min_cells=2):
+    rows, cols, _ = probabilities.shape
+    width, height = size
+    x_edges = cell_edges(width, cols, window, stride)
+    y_edges = cell_edges(height, rows, window, stride)
+    labels = probabilities.argmax(axis=-1)
+    confident = probabilities.max(axis=-1) >= min_confidence
+    seen = np.zeros((rows, cols), dtype=bool)
+
+    regions = []
+    for start in zip(*np.nonzero(confident)):
+        if seen[start]:
+            continue
+        label = labels[start]
+        seen[start] = True
+        cells, queue = [], deque([start])
+        while queue:
+            r, c = queue.popleft()
+            cells.append((r, c))
+            for nr, nc in ((r - 1, c), (r + 1, c), (r, c - 1), (r, c + 1)):
+                if 0 <= nr < rows and 0 <= nc < cols and not seen[nr, nc] and confident[nr, nc] and labels[nr, nc] == label:
+                    seen[nr, nc] = True
+                    queue.append((nr, nc))
+        if len(cells) < min_cells:
+            continue
+        r_idx, c_idx = np.array(cells).T
+        regions.append({
+            "label_idx": int(label),
+            "confidence": float(probabilities[r_idx, c_idx, label].mean()),
+            "cells": len(cells),
+            "share": len(cells) / (rows * cols),
+            "box": [
+                float(x_edges[c_idx.min()]),
+                float(y_edges[r_idx.min()]),
+                float(x_edges[c_idx.max() + 1]),
+                float(y_edges[r_idx.max() + 1]),
+            ],
+        })
+    return sorted(regions, key=lambda region: -region["cells"])
+
+
+# --- Multi-item Scorer ---
+# Satu per proses. Gambar di-resize (rasio aspek dipertahankan) agar sisi terpanjang sekitar
+# `size` px, lalu tiap sisi dibulatkan agar jendela tepat menutup gambar sampai tepi.
+# Model konvolusional penuh baru dibangun saat mode multi-item pertama kali dipakai, dan
+# dijalankan lewat InferenceEngine sendiri (satu gambar per batch) agar timeout admission
+# berlaku sama seperti jalur per jendela.
+class MultiItemScorer:
+    def __init__(self, model=None, predict_fn=None, size=448, stride=32, min_confidence=0.6, min_cells=2,
+                 window=224, batch_size=16, resample="bilinear"):
+        self.size = size
+        self.requested_stride = stride
+        self.min_confidence = min_confidence
+        self.min_cells = min_cells
+        self.batch_size = batch_size
+        self.resample = resample
+        self.mode = "unloaded"
+        self.fallback_reason = None
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._dense_engine = None
+        self._counters = {"images": 0, "windows": 0, "regions": 0}
+        self.load(model, predict_fn, window)
+
+    def load(self, model=None, predict_fn=None, window=224):
+        # Dipanggil ulang saat hot reload; model baru dibangun pada request berikutnya.
+        # Diganti sekaligus agar request yang sedang berjalan tidak mencampur model lama dan baru
+        self._source = (model, predict_fn, window)
+        self._state = None
+
+    def _build(self):
+        # Tanpa model Keras, atau jika head-nya tidak bisa dikonversi, setiap jendela
+        # diklasifikasi terpisah lewat predict_fn
+        with self._build_lock:
+            if self._state is not None:
+                return self._state
+            model, predict_fn, window = self._source
+            fallback_reason = None if model is not None else "backend tanpa model Keras"
+            if model is not None:
+                try:
+                    dense, window, stride = fully_convolutional(model, self.requested_stride)
+                    predict = dense_predict_fn(dense)
+                    # Trace sekali sebelum request pertama
+                    predict(np.zeros((1, window, window, 3), dtype=np.uint8))
+                except ValueError as e:
+                    fallback_reason = str(e)
+            if fallback_reason is not None:
+                if predict_fn is None:
+                    raise ValueError(f"Mode multi-item tidak tersedia: {fallback_reason}")
+                stride = self.requested_stride
+                predict = None
+            elif self._dense_engine is None:
+                self._dense_engine = InferenceEngine(predict, max_batch_size=1, max_wait_ms=0.0)
+            else:
+                self._dense_engine.swap(predict)
+            self._state = (predict is not None, predict_fn, window, stride)
+            self.mode = "dense" if predict is not None else "tiles"
+            self.fallback_reason = fallback_reason
+            return self._state
+
+    @property
+    def window(self):
+        return (self._state or self._build())[2]
+
+    @property
+    def stride(self):
+        return (self._state or self._build())[3]
+
+    def input_size(self, width, height):
+        window, stride = self.window, self.stride
+        scale = self.size / max(width, height)
+
+        def snap(side):
+            return window + stride * max(0, round((side * scale - window) / stride))
+
+        return snap(width), snap(height)
+
+    def prepare(self, img):
+        return img.resize(self.input_size(*img.size), RESAMPLE_FILTERS[self.resample])
+
+    def probabilities(self, img_array, timeout=None):
+        dense, predict_fn, window, stride = self._state or self._build()
+        if dense:
+            grid = self._dense_engine.predict(img_array[np.newaxis], timeout=timeout)[0]
+        else:
+            grid = tile_probabilities(
+                predict_fn if timeout is None else lambda batch: predict_fn(batch, timeout=timeout),
+                img_array, window, stride, self.batch_size,
+            )
+        with self._lock:
+            self._counters["images"] += 1
+            self._counters["windows"] += grid.shape[0] * grid.shape[1]
+        return grid
+
+    def regions(self, grid, size):
+        regions = merge_regions(grid, size, self.window, self.stride, self.min_confidence, self.min_cells)
+        with self._lock:
+            self._counters["regions"] += len(regions)
+        return regions
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self._counters)
+        window, stride = (self._state or (None, None, None, None))[2:]
+        return dict(counters, mode=self.mode, dense=int(self.mode == "dense"), window=window, stride=stride,
+                    fallback_reason=self.fallback_reason)
+
+
+def backend_model(backend):
+    # Model Keras di balik backend; cascade memakai model utama (tahap kedua)
+    backend = getattr(backend, "second", backend)
+    return getattr(backend, "model", None)
+
+
+# --- Overlay ---
+def draw_overlay(img, regions, colors, default_color="#6366f1"):
+    # regions: hasil merge_regions dengan key "label"; nomor di kotak sesuai urutan daftar
+    overlay = img.convert("RGBA")
+    layer = Image.new("RGBA", overlay.size, (0, 0, 0, 0))
+    draw = ImageDraw.Draw(layer)
+    width, height = overlay.size
+    line = max(2, round(min(width, height) / 150))
+    font = ImageFont.load_default(size=max(12, round(min(width, height) / 18)))
+    for number, region in enumerate(regions, 1):
+        color = Image.new("RGB", (1, 1), colors.get(region["label"], default_color)).getpixel((0, 0))
+        x0, y0, x1, y1 = region["box"]
+        box = (round(x0 * width), round(y0 * height), round(x1 * width) - 1, round(y1 * height) - 1)
+        draw.rectangle(box, fill=(*color, 56), outline=(*color, 255), width=line)
+        text = str(number)
+        left, top, right, bottom = draw.textbbox((0, 0), text, font=font)
+        pad = line * 2
+        tag = (box[0], box[1], box[0] + right - left + 2 * pad, box[1] + bottom - top + 2 * pad)
+        draw.rectangle(tag, fill=(*color, 255))
+        draw.text((tag[0] + pad - left, tag[1] + pad - top), text, fill=(255, 255, 255, 255), font=font)
+    return Image.alpha_composite(overlay, layer).convert("RGB")
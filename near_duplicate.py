@@ -0,0 +1,141 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from PIL import Image
+
+
+HASH_BITS = 64
+
+
+# --- Perceptual Hash ---
+# Dihitung dari gambar 224x224 yang sudah di-resize, jadi biayanya kecil dibanding
+# satu forward pass VGG16. Foto ulang dari kamera (geser sedikit, cahaya berubah)
+# menghasilkan hash dengan jarak Hamming kecil.
+def _dct_matrix(n):
+    k = np.arange(n)[:, None]
+    matrix = np.cos(np.pi * (2 * np.arange(n)[None, :] + 1) * k / (2 * n)) * np.sqrt(2.0 / n)
+    matrix[0] /= np.sqrt(2.0)
+    return matrix
+
+
+_DCT_32 = _dct_matrix(32)
+
+
+def _pack_bits(bits):
+    value = 0
+    for bit in bits.ravel():
+        value = (value << 1) | int(bit)
+    return value
+
+
+def phash(img):
+    gray = np.asarray(img.convert("L").resize((32, 32), Image.Resampling.BOX), dtype=np.float64)
+    coeffs = (_DCT_32 @ gray @ _DCT_32.T)[:8, :8]
+    # Koefisien DC tidak ikut menentukan median agar kecerahan global tidak mendominasi
+    return _pack_bits(coeffs > np.median(coeffs.ravel()[1:]))
+
+
+def dhash(img):
+    gray = np.asarray(img.convert("L").resize((9, 8), Image.Resampling.BOX), dtype=np.int16)
+    return _pack_bits(gray[:, 1:] > gray[:, :-1])
+
+
+HASH_FUNCTIONS = {"phash": phash, "dhash": dhash}
+
+
+def hamming(a, b):
+    return (a ^ b).bit_count()
+
+
+# --- Near-duplicate Index ---
+# Multi-index hashing: hash 64-bit dipecah menjadi max_distance + 1 segmen. Dua hash
+# dengan jarak <= max_distance pasti identik pada minimal satu segmen (pigeonhole), jadi
+# lookup cukup memeriksa kandidat yang berbagi segmen. Berbeda dengan BK-tree, entri
+# dapat dihapus dengan murah sehingga eviction LRU sederhana.
+class NearDuplicateIndex:
+    def __init__(self, max_distance=6, max_entries=1024, hash_name="phash"):
+        if hash_name not in HASH_FUNCTIONS:
+            raise ValueError(f"Hash tidak dikenal: {hash_name!r} (pilih {', '.join(HASH_FUNCTIONS)})")
+        if not 0 <= max_distance < HASH_BITS:
+            raise ValueError(f"max_distance harus di antara 0 dan {HASH_BITS - 1}")
+        self.max_distance = max_distance
+        self.max_entries = max_entries
+        self.hash_name = hash_name
+        self._hash_fn = HASH_FUNCTIONS[hash_name]
+
+        segments = max_distance + 1
+        base, extra = divmod(HASH_BITS, segments)
+        widths = [base + (1 if i < extra else 0) for i in range(segments)]
+        offsets = np.cumsum([0] + widths[:-1])
+        self._segments = [(int(offset), (1 << width) - 1) for offset, width in zip(offsets, widths)]
+
+        self._entries = OrderedDict()
+        self._tables = [{} for _ in self._segments]
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def hash(self, img):
+        return self._hash_fn(img)
+
+    def get(self, image_hash):
+        with self._lock:
+            best, best_distance = None, self.max_distance + 1
+            for candidate in self._candidates(image_hash):
+                distance = hamming(candidate, image_hash)
+                if distance < best_distance:
+                    best, best_distance = candidate, distance
+            if best is None:
+                self._counters["misses"] += 1
+                return None
+            self._entries.move_to_end(best)
+            self._counters["hits"] += 1
+            return self._entries[best]
+
+    def put(self, image_hash, value):
+        with self._lock:
+            if image_hash not in self._entries:
+                for table, key in zip(self._tables, self._keys(image_hash)):
+                    table.setdefault(key, set()).add(image_hash)
+            self._entries[image_hash] = value
+            self._entries.move_to_end(image_hash)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self._counters["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            for table in self._tables:
+                table.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self._counters["hits"] + self._counters["misses"]
+            return dict(
+                self._counters,
+                hit_rate=self._counters["hits"] / lookups if lookups else 0.0,
+                size=len(self._entries),
+                max_entries=self.max_entries,
+                max_distance=self.max_distance,
+                hash=self.hash_name,
+            )
+
+    def _keys(self, image_hash):
+        return [(image_hash >> offset) & mask for offset, mask in self._segments]
+
+    def _candidates(self, image_hash):
+        seen = set()
+        for table, key in zip(self._tables, self._keys(image_hash)):
+            for candidate in table.get(key, ()):
+                if candidate not in seen:
+                    seen.add(candidate)
+                    yield candidate
+
+    def _remove(self, image_hash):
+        del self._entries[image_hash]
+        for table, key in zip(self._tables, self._keys(image_hash)):
+            bucket = table[key]
+            bucket.discard(image_hash)
+            if not bucket:
+                del table[key]
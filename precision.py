@@ -0,0 +1,153 @@
+import os
+import platform
+
+import keras
+import numpy as np
+
+import config
+from preprocessing import iter_image_files, preprocess_image_uint8
+
+
+# --- Mixed Precision ---
+# Model Keras dibangun ulang saat load dengan dtype policy per layer:
+#   bfloat16  komputasi bfloat16 (AVX512-BF16/AMX lewat oneDNN), bobot tetap float32
+#   float16   bobot disimpan float16 (separuh memori), komputasi float32
+# Layer softmax selalu float32. Hasilnya dibandingkan dengan model float32 pada folder
+# kalibrasi; jika host tidak mendukung atau parity gagal, model float32 yang dipakai.
+PRECISIONS = ("float32", "bfloat16", "float16")
+
+
+class Float16Weights(keras.DTypePolicy):
+    # Variabel float16, di-autocast ke float32 saat dibaca di dalam call layer
+    def __init__(self, name="float16_weights"):
+        super().__init__(name)
+
+    def _parse_name(self, name):
+        return "float32", "float16"
+
+
+def cpu_flags():
+    try:
+        with open("/proc/cpuinfo", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith(("flags", "Features")):
+                    return set(line.split(":", 1)[1].split())
+    except OSError:
+        pass
+    return set()
+
+
+def unsupported_reason(precision):
+    # None jika host mendukung presisi tersebut, selain itu alasan untuk log/UI
+    if precision == "float32":
+        return None
+    if precision not in PRECISIONS:
+        raise ValueError(f"Presisi tidak dikenal: {precision!r} (pilih {', '.join(PRECISIONS)})")
+    flags = cpu_flags()
+    if precision == "bfloat16":
+        if not flags & {"avx512_bf16", "amx_bf16"}:
+            return "CPU tidak mendukung AVX512-BF16/AMX-BF16 (bfloat16 akan diemulasi dan lebih lambat)"
+        if os.environ.get("TF_ENABLE_ONEDNN_OPTS") == "0":
+            return "oneDNN dinonaktifkan (TF_ENABLE_ONEDNN_OPTS=0), kernel bfloat16 tidak tersedia"
+    if precision == "float16" and platform.machine().lower() in ("x86_64", "amd64") and "f16c" not in flags:
+        return "CPU tidak mendukung F16C untuk konversi bobot float16"
+    return None
+
+
+def _layer_policy(layer, precision):
+    if isinstance(layer, keras.layers.Softmax) or layer.get_config().get("activation") == "softmax":
+        return "float32"
+    if precision == "bfloat16":
+        return keras.DTypePolicy("mixed_bfloat16")
+    return Float16Weights()
+
+
+def convert_model(model, precision):
+    def clone(layer):
+        # Sub-model (mis. base VGG16) di-clone rekursif agar semua layer-nya ikut berganti policy
+        if isinstance(layer, keras.Model):
+            return keras.models.clone_model(layer, clone_function=clone)
+        layer_config = layer.get_config()
+        layer_config["dtype"] = _layer_policy(layer, precision)
+        return layer.__class__.from_config(layer_config)
+
+    converted = keras.models.clone_model(model, clone_function=clone)
+    converted.set_weights(model.get_weights())
+    return converted
+
+
+# --- Parity Check ---
+def calibration_images(calibration_dir, num_samples):
+    images = []
+    for path in iter_image_files(calibration_dir):
+        try:
+            images.append(preprocess_image_uint8(path))
+        except Exception:
+            # File rusak/ditolak intake tidak menggagalkan load model
+            continue
+        if len(images) >= num_samples:
+            break
+    if not images:
+        raise ValueError(f"Tidak ada gambar kalibrasi di {calibration_dir}")
+    return np.stack(images)
+
+
+def predict_probabilities(model, images, batch_size=8):
+    # Sama dengan serve_uint8 di backends.py: rescale ke 0..1 lalu forward pass
+    outputs = [
+        np.asarray(model(images[i:i + batch_size].astype(np.float32) / 255.0, training=False), dtype=np.float32)
+        for i in range(0, len(images), batch_size)
+    ]
+    return np.concatenate(outputs)
+
+
+def check_parity(reference, candidate, min_agreement, max_drift):
+    # Drift = selisih confidence pada kelas top-1 model acuan (skala 0..1), seperti
+    # benchmarks.backend_parity
+    rows = np.arange(len(reference))
+    reference_top1 = reference.argmax(axis=1)
+    drift = np.abs(candidate[rows, reference_top1] - reference[rows, reference_top1])
+    report = {
+        "images": len(reference),
+        "top1_agreement": float((candidate.argmax(axis=1) == reference_top1).mean()),
+        "confidence_drift": float(drift.mean()),
+        "max_confidence_drift": float(drift.max()),
+    }
+    report["passed"] = report["top1_agreement"] >= min_agreement and report["confidence_drift"] <= max_drift
+    return report
+
+
+def select_precision(model, precision, calibration_dir=None, num_samples=None, min_agreement=None, max_drift=None, on_warning=print):
+    # Mengembalikan (model, laporan); laporan["precision"] adalah presisi yang benar-benar dipakai
+    calibration_dir = config.PRECISION_CALIBRATION_DIR if calibration_dir is None else calibration_dir
+    num_samples = num_samples or config.PRECISION_SAMPLES
+    min_agreement = config.PRECISION_MIN_AGREEMENT if min_agreement is None else min_agreement
+    max_drift = config.PRECISION_MAX_DRIFT if max_drift is None else max_drift
+
+    report = {"requested": precision, "precision": "float32", "fallback": False}
+    if precision == "float32":
+        return model, report
+
+    reason = unsupported_reason(precision)
+    if reason is None and not calibration_dir:
+        reason = "ECOSORT_PRECISION_CALIBRATION_DIR kosong, parity tidak bisa dicek"
+    if reason is None:
+        try:
+            images = calibration_images(calibration_dir, num_samples)
+        except ValueError as e:
+            reason = str(e)
+    if reason is None:
+        candidate = convert_model(model, precision)
+        report.update(check_parity(predict_probabilities(model, images), predict_probabilities(candidate, images), min_agreement, max_drift))
+        if report["passed"]:
+            report["precision"] = precision
+            return candidate, report
+        reason = (
+            f"parity gagal: top-1 agreement {report['top1_agreement']:.3f} (min. {min_agreement:.3f}), "
+            f"drift confidence {report['confidence_drift']:.4f} (maks. {max_drift:.4f})"
+        )
+
+    report["fallback"] = True
+    report["fallback_reason"] = reason
+    on_warning(f"Presisi {precision} tidak dipakai, kembali ke float32: {reason}")
+    return model, report
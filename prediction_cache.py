@@ -0,0 +1,136 @@
+import base64
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+# --- Model Version ---
+# Versi model diturunkan dari nama, ukuran, dan waktu modifikasi file sehingga cache
+# otomatis tidak valid ketika file model diganti (tanpa harus meng-hash file 500 MB).
+def model_version(model_path):
+    stat = os.stat(model_path)
+    raw = f"{os.path.basename(model_path)}:{stat.st_size}:{int(stat.st_mtime)}"
+    return hashlib.sha256(raw.encode()).hexdigest()[:16]
+
+
+# --- Prediction Cache ---
+# LRU in-process dengan batas ukuran dan TTL, ditambah tier disk opsional (satu file JSON
+# per entri) yang tetap ada setelah restart.
+class PredictionCache:
+    def __init__(self, model_version, max_entries=256, ttl_seconds=3600.0, disk_dir=None):
+        self.model_version = model_version
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self.disk_dir = disk_dir
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "expired": 0}
+
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+
+    def key(self, image_bytes):
+        return self.key_for_digest(hashlib.sha256(image_bytes))
+
+    def key_for_digest(self, image_digest):
+        # image_digest: objek hashlib.sha256 dari bytes gambar, dipakai juga oleh log prediksi
+        digest = image_digest.copy()
+        digest.update(self.model_version.encode())
+        return digest.hexdigest()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._counters["hits"] += 1
+                    return value
+                del self._entries[key]
+                self._counters["expired"] += 1
+
+        value, expires_at = self._read_disk(key, now)
+        with self._lock:
+            if value is None:
+                self._counters["misses"] += 1
+                return None
+            self._counters["disk_hits"] += 1
+            self._store(key, value, expires_at)
+        return value
+
+    def put(self, key, value):
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._store(key, value, expires_at)
+        self._write_disk(key, value, expires_at)
+
+    def stats(self):
+        with self._lock:
+            return dict(self._counters, size=len(self._entries), max_entries=self.max_entries)
+
+    def _store(self, key, value, expires_at):
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._counters["evictions"] += 1
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, key[:2], f"{key}.json")
+
+    def _read_disk(self, key, now):
+        if not self.disk_dir:
+            return None, None
+        path = self._disk_path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                record = json.load(f)
+        except (OSError, ValueError):
+            return None, None
+        if record.get("expires_at", 0) <= now:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None, None
+        return tuple(_decode_item(item) for item in record["value"]), record["expires_at"]
+
+    def _write_disk(self, key, value, expires_at):
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"value": [_encode_item(item) for item in value], "expires_at": expires_at}, f)
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError):
+            # Tier disk bersifat best-effort; kegagalan tulis atau nilai yang tidak bisa
+            # di-encode ke JSON tidak boleh menggagalkan prediksi
+            pass
+        finally:
+            # Setelah os.replace berhasil file tmp sudah tidak ada
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+
+# Bytes (thumbnail hasil) tidak bisa langsung ditulis ke JSON
+def _encode_item(item):
+    if isinstance(item, bytes):
+        return {"b64": base64.b64encode(item).decode("ascii")}
+    return item
+
+
+def _decode_item(item):
+    if isinstance(item, dict) and "b64" in item:
+        return base64.b64decode(item["b64"])
+    return item
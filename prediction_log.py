@@ -0,0 +1,192 @@
+import atexit
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+
+# --- Prediction Log ---
+# Audit trail append-only untuk setiap klasifikasi. Jalur request hanya menaruh tuple kecil
+# ke ring buffer (O(1), tanpa IO); thread writer mengambil batch dan menulisnya sebagai row
+# group Parquet. File dipartisi per tanggal UTC (date=YYYY-MM-DD/) dan dirotasi menurut
+# ukuran atau umur. File yang masih ditulis diawali "." dan baru di-rename setelah footer
+# ditulis; pyarrow.dataset dan Spark mengabaikan file berawalan ".", jadi hanya file utuh yang
+# terbaca.
+# Jika buffer penuh, record baru dibuang dan dihitung di counter "dropped".
+FIELDS = ("timestamp", "image_sha256", "source", "outcome", "label", "confidence", "probabilities", "model_version", "stage_ms")
+
+
+def log_schema():
+    import pyarrow as pa
+
+    return pa.schema([
+        ("timestamp", pa.timestamp("ms", tz="UTC")),
+        ("image_sha256", pa.string()),
+        ("source", pa.string()),
+        # model, remote, cache, near_duplicate, multi_item, rejected, busy, atau error
+        ("outcome", pa.string()),
+        ("label", pa.string()),
+        ("confidence", pa.float32()),
+        ("probabilities", pa.list_(pa.float32())),
+        ("model_version", pa.string()),
+        ("stage_ms", pa.map_(pa.string(), pa.float32())),
+    ])
+
+
+class PredictionLog:
+    def __init__(self, directory, capacity=10000, flush_rows=512, flush_interval=5.0, rotate_mb=64, rotate_seconds=3600.0):
+        self.directory = directory
+        self.capacity = capacity
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.rotate_bytes = rotate_mb * 1024 * 1024
+        self.rotate_seconds = rotate_seconds
+
+        self._buffer = deque()
+        self._cond = threading.Condition()
+        self._counters = {"appended": 0, "dropped": 0, "written": 0, "write_errors": 0, "files": 0, "flushes": 0}
+        self._closed = False
+        self._writer = None
+        self._path = None
+        self._partition = None
+        self._opened_at = 0.0
+        self._sequence = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="prediction-log", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def append(self, image_sha256, source, outcome, label=None, confidence=None, probabilities=None, model_version=None, stage_ms=None):
+        # Dipanggil dari jalur request: tanpa IO dan tanpa konversi; probabilities boleh
+        # berupa array numpy, dikonversi oleh writer
+        record = (time.time(), image_sha256, source, outcome, label, confidence, probabilities, model_version, stage_ms)
+        with self._cond:
+            if self._closed or len(self._buffer) >= self.capacity:
+                self._counters["dropped"] += 1
+                return False
+            self._buffer.append(record)
+            self._counters["appended"] += 1
+            if len(self._buffer) >= self.flush_rows:
+                self._cond.notify()
+        return True
+
+    def stats(self):
+        with self._cond:
+            return dict(self._counters, buffered=len(self._buffer), capacity=self.capacity)
+
+    def close(self, timeout=10.0):
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify()
+        self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._closed and len(self._buffer) < self.flush_rows:
+                    self._cond.wait(self._time_to_deadline())
+                batch = [self._buffer.popleft() for _ in range(min(len(self._buffer), self.flush_rows))]
+                closed = self._closed and not self._buffer
+            if batch:
+                self._write(batch)
+            if self._writer is not None and (closed or self._should_rotate()):
+                self._rotate()
+            if closed:
+                return
+
+    def _time_to_deadline(self):
+        # Tunggu sampai flush berikutnya, tetapi bangun tepat waktu untuk rotasi berbasis umur
+        if self._writer is None:
+            return self.flush_interval
+        return max(0.01, min(self.flush_interval, self._opened_at + self.rotate_seconds - time.time()))
+
+    def _should_rotate(self):
+        if time.time() - self._opened_at >= self.rotate_seconds:
+            return True
+        if self._partition != _partition(time.time()):
+            return True
+        try:
+            return os.path.getsize(_in_progress(self._path)) >= self.rotate_bytes
+        except OSError:
+            return True
+
+    def _write(self, batch):
+        # Batch yang melewati tengah malam UTC dipecah agar setiap baris masuk partisi tanggalnya
+        for _, group in itertools.groupby(batch, key=lambda record: _partition(record[0])):
+            self._write_partition(list(group))
+
+    def _write_partition(self, batch):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        try:
+            columns = list(zip(*batch))
+            rows = dict(zip(FIELDS, columns))
+            rows["timestamp"] = [int(ts * 1000) for ts in rows["timestamp"]]
+            rows["confidence"] = [None if c is None else float(c) for c in rows["confidence"]]
+            rows["probabilities"] = [None if p is None else [float(x) for x in p] for p in rows["probabilities"]]
+            rows["stage_ms"] = [None if s is None else {k: v * 1000 for k, v in s.items()} for s in rows["stage_ms"]]
+            table = pa.Table.from_pydict(rows, schema=log_schema())
+            if self._writer is None or self._partition != _partition(batch[0][0]):
+                if self._writer is not None:
+                    self._rotate()
+                self._open(pq, batch[0][0])
+            self._writer.write_table(table)
+            with self._cond:
+                self._counters["written"] += len(batch)
+                self._counters["flushes"] += 1
+        except Exception:
+            # Log audit tidak boleh menggagalkan klasifikasi; batch yang gagal dihitung dan
+            # file yang sedang ditulis ditutup agar batch berikutnya memakai file baru
+            with self._cond:
+                self._counters["write_errors"] += 1
+                self._counters["dropped"] += len(batch)
+            if self._writer is not None:
+                self._rotate()
+
+    def _open(self, pq, timestamp):
+        self._partition = _partition(timestamp)
+        directory = os.path.join(self.directory, f"date={self._partition}")
+        os.makedirs(directory, exist_ok=True)
+        stamp = datetime.fromtimestamp(timestamp, timezone.utc).strftime("%H%M%S")
+        self._sequence += 1
+        self._path = os.path.join(directory, f"part-{stamp}-{os.getpid()}-{self._sequence:04d}.parquet")
+        self._writer = pq.ParquetWriter(_in_progress(self._path), log_schema(), compression="zstd")
+        self._opened_at = time.time()
+
+    def _rotate(self):
+        in_progress = _in_progress(self._path)
+        try:
+            self._writer.close()
+        except Exception:
+            # File tanpa footer tidak valid sebagai Parquet; jangan tinggalkan dot-file
+            with self._cond:
+                self._counters["write_errors"] += 1
+            try:
+                os.remove(in_progress)
+            except OSError:
+                pass
+        else:
+            try:
+                os.replace(in_progress, self._path)
+                with self._cond:
+                    self._counters["files"] += 1
+            except OSError:
+                with self._cond:
+                    self._counters["write_errors"] += 1
+        self._writer = None
+        self._path = None
+
+
+def _partition(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime("%Y-%m-%d")
+
+
+def _in_progress(path):
+    directory, name = os.path.split(path)
+    return os.path.join(directory, f".{name}")
@@ -0,0 +1,167 @@
+import io
+import os
+
+import numpy as np
+from PIL import Image, ImageOps
+
+import config
+from labels import label_index
+
+
+IMAGE_SIZE = (224, 224)
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+RESAMPLE_FILTERS = {
+    "nearest": Image.Resampling.NEAREST,
+    "bilinear": Image.Resampling.BILINEAR,
+    "bicubic": Image.Resampling.BICUBIC,
+    "lanczos": Image.Resampling.LANCZOS,
+    "box": Image.Resampling.BOX,
+    "hamming": Image.Resampling.HAMMING,
+}
+
+
+# PIL sendiri menolak gambar di atas 2x batas ini saat Image.open (decompression bomb)
+Image.MAX_IMAGE_PIXELS = config.INTAKE_MAX_PIXELS
+# MPO: JPEG multi-gambar dari kamera ponsel, decoder yang sama dengan JPEG
+JPEG_FORMATS = ("JPEG", "MPO")
+
+
+# --- Intake Budget ---
+# Semua decode lewat open_image: ukuran file dan dimensi header diperiksa sebelum satu
+# piksel pun di-decode, sehingga file kecil yang mengklaim 30000x30000 piksel (PNG zlib
+# bomb, header JPEG palsu) ditolak tanpa alokasi.
+class ImageRejected(ValueError):
+    pass
+
+
+def byte_size(image_file):
+    if isinstance(image_file, (str, os.PathLike)):
+        return os.path.getsize(image_file)
+    position = image_file.tell()
+    size = image_file.seek(0, os.SEEK_END)
+    image_file.seek(position)
+    return size
+
+
+def open_image(image_file):
+    size = byte_size(image_file)
+    if size > config.INTAKE_MAX_BYTES:
+        raise ImageRejected(f"ukuran file {size / 2**20:.1f} MB melebihi batas {config.INTAKE_MAX_BYTES / 2**20:.0f} MB")
+    try:
+        img = Image.open(image_file)
+    except Image.DecompressionBombError as e:
+        raise ImageRejected(f"dimensi jauh melebihi batas {config.INTAKE_MAX_PIXELS / 1e6:.0f} MP (decompression bomb)") from e
+    if img.format not in config.INTAKE_FORMATS:
+        raise ImageRejected(f"format {img.format} tidak didukung (hanya {', '.join(config.INTAKE_FORMATS)})")
+    width, height = img.size
+    if width * height > config.INTAKE_MAX_PIXELS:
+        raise ImageRejected(
+            f"dimensi {width}×{height} ({width * height / 1e6:.0f} MP) melebihi batas {config.INTAKE_MAX_PIXELS / 1e6:.0f} MP"
+        )
+    return img
+
+
+def fit_decode_budget(img, min_size=IMAGE_SIZE, fast=True):
+    # Mengatur skala decode sebelum load(); ImageRejected jika tetap di atas budget
+    if img.format in JPEG_FORMATS:
+        width, height = img.size
+        if fast:
+            # DCT scaling: libjpeg langsung men-decode pada skala 1/2, 1/4, atau 1/8 terkecil
+            # yang masih >= min_size, jadi piksel yang akan dibuang tidak pernah di-decode
+            img.draft("RGB", min_size)
+        elif width * height > config.INTAKE_DECODE_PIXELS:
+            # Tanpa mode fast tetap pakai skala DCT terkecil yang muat di budget
+            scale = next((s for s in (2, 4, 8) if (width // s) * (height // s) <= config.INTAKE_DECODE_PIXELS), 8)
+            img.draft("RGB", (width // scale, height // scale))
+    check_decode_budget(img)
+    return img
+
+
+def check_decode_budget(img):
+    width, height = img.size
+    if width * height > config.INTAKE_DECODE_PIXELS:
+        raise ImageRejected(
+            f"gambar {img.format} {width}×{height} melebihi budget decode {config.INTAKE_DECODE_PIXELS / 1e6:.0f} MP"
+        )
+
+
+# --- Preprocessing ---
+# Tahap-tahap yang sama dengan predict_image di app.py, dipisah agar bisa diukur per tahap
+def decode_image(image_file, fast=None, min_size=IMAGE_SIZE):
+    fast = config.FAST_DECODE if fast is None else fast
+    img = fit_decode_budget(open_image(image_file), min_size, fast)
+    img.load()
+    if fast:
+        # Foto kamera ponsel sering disimpan miring dengan tag orientasi EXIF
+        img = ImageOps.exif_transpose(img)
+    return img
+
+
+def to_rgb(img):
+    return img.convert("RGB")
+
+
+def resize_image(img, resample=None):
+    return img.resize(IMAGE_SIZE, RESAMPLE_FILTERS[resample or config.RESAMPLE_FILTER])
+
+
+def normalize_image(img):
+    img_array = np.array(img)
+    return img_array / 255.0
+
+
+def preprocess_image(image_file, fast=None):
+    return normalize_image(resize_image(to_rgb(decode_image(image_file, fast))))
+
+
+def preprocess_image_uint8(image_file, fast=None):
+    # Untuk backend dengan rescale di dalam graph: tanpa konversi float di Python
+    return np.asarray(resize_image(to_rgb(decode_image(image_file, fast))))
+
+
+# --- Display Thumbnail ---
+# Gambar hasil yang dikirim ke browser: sisi terpanjang max_size px (tidak diperbesar),
+# dibuat sekali dari gambar yang sudah di-decode dan disimpan bersama prediksi
+def make_thumbnail(img, max_size=None, fmt=None, quality=None):
+    max_size = max_size or config.THUMBNAIL_SIZE
+    fmt = (fmt or config.THUMBNAIL_FORMAT).lower()
+    quality = quality or config.THUMBNAIL_QUALITY
+    thumb = img.copy()
+    thumb.thumbnail((max_size, max_size))
+    buffer = io.BytesIO()
+    if fmt == "webp":
+        # method=2 sekitar 3x lebih cepat dari default (4) dengan ukuran file hampir sama
+        thumb.save(buffer, format="WEBP", quality=quality, method=2)
+    elif fmt == "jpeg":
+        thumb.save(buffer, format="JPEG", quality=quality, optimize=True)
+    else:
+        raise ValueError(f"Format thumbnail tidak dikenal: {fmt!r} (pilih webp atau jpeg)")
+    return buffer.getvalue()
+
+
+def thumbnail_mime(data):
+    if data[8:12] == b"WEBP":
+        return "image/webp"
+    if data[:8] == b"\x89PNG\r\n\x1a\n":
+        return "image/png"
+    return "image/jpeg"
+
+
+# --- Dataset Helpers ---
+def iter_image_files(folder):
+    for root, dirs, files in os.walk(folder):
+        # Urutan deterministik agar checkpoint batch bisa dilanjutkan
+        dirs.sort()
+        for name in sorted(files):
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                yield os.path.join(root, name)
+
+
+def iter_labeled_images(folder):
+    # Struktur folder: <folder>/<nama kelas atau indeks>/<gambar>
+    for class_dir in sorted(os.listdir(folder)):
+        class_idx = label_index(class_dir)
+        if class_idx is None:
+            continue
+        for path in iter_image_files(os.path.join(folder, class_dir)):
+            yield path, class_idx
@@ -0,0 +1,41 @@
+import threading
+
+import requests
+
+
+# --- Remote Inference Client ---
+# Dipakai app.py ketika ECOSORT_INFERENCE_URL diisi: gambar dikirim ke server.py dan
+# model tidak dimuat di proses Streamlit.
+class RemoteClient:
+    def __init__(self, base_url, timeout=30.0):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self._session = requests.Session()
+        self._lock = threading.Lock()
+        self._counters = {"requests": 0, "errors": 0}
+
+    def ready_info(self):
+        response = self._session.get(f"{self.base_url}/readyz", timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def classify(self, image_bytes):
+        with self._lock:
+            self._counters["requests"] += 1
+        try:
+            response = self._session.post(
+                f"{self.base_url}/v1/classify",
+                data=image_bytes,
+                headers={"Content-Type": "application/octet-stream"},
+                timeout=self.timeout,
+            )
+            response.raise_for_status()
+            return response.json()
+        except requests.RequestException:
+            with self._lock:
+                self._counters["errors"] += 1
+            raise
+
+    def stats(self):
+        with self._lock:
+            return dict(self._counters)
@@ -0,0 +1,244 @@
+import argparse
+import asyncio
+import io
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import cpu_tuning
+
+# Profil thread CPU harus diterapkan sebelum TensorFlow diimport
+cpu_profile = cpu_tuning.load_profile()
+cpu_tuning.apply_before_import(cpu_profile)
+
+import numpy as np
+import tensorflow as tf
+import tornado.ioloop
+import tornado.web
+
+import config
+from backends import CascadeBackend
+from inference import InferenceEngine
+from labels import class_labels
+from metrics import stage_metrics
+from model_loader import ModelReloader, load_backend
+from model_store import open_store
+from prediction_cache import model_version
+from worker_pool import WorkerPool
+from preprocessing import ImageRejected, check_decode_budget, open_image, preprocess_image_uint8
+
+
+# --- Inference Service ---
+# python server.py --port 8080
+# Model dimuat sekali; handler async menjalankan decode di thread pool dan inferensi di
+# InferenceEngine sehingga IO loop tidak pernah diblokir.
+def to_result(probabilities):
+    idx = int(probabilities.argmax())
+    return {
+        "label": class_labels.get(idx, "Tidak Diketahui"),
+        "class_index": idx,
+        "confidence": float(probabilities[idx] * 100),
+        "probabilities": {class_labels[i]: float(p) for i, p in enumerate(probabilities)},
+    }
+
+
+class InferenceApplication(tornado.web.Application):
+    def __init__(self, backend_name, preprocess_workers, pool_workers=0):
+        self.backend_name = backend_name
+        self.pool_workers = pool_workers
+        self.engine = None
+        self.model_version = None
+        # Presisi yang benar-benar dipakai backend keras (setelah parity check/fallback)
+        self.precision = None
+        self.load_error = None
+        self.executor = ThreadPoolExecutor(max_workers=preprocess_workers, thread_name_prefix="preprocess")
+        super().__init__([
+            (r"/healthz", HealthHandler),
+            (r"/readyz", ReadyHandler),
+            (r"/metrics", MetricsHandler),
+            (r"/v1/classify", ClassifyHandler),
+            (r"/v1/classify/batch", BatchClassifyHandler),
+        ])
+
+    @property
+    def ready(self):
+        return self.engine is not None
+
+    def load(self):
+        # Dijalankan di thread terpisah; /healthz sudah hidup selama model dimuat
+        try:
+            if self.pool_workers:
+                self.load_pool()
+                return
+            tf.config.set_visible_devices([], 'GPU')
+            cpu_tuning.apply_tf_threading(cpu_profile, tf)
+            backend = load_backend(self.backend_name)
+            self.model_version = model_version(backend.artifact_path)
+            predict_method = "predict_bytes" if config.SERVER_GRAPH_DECODE else "predict_uint8"
+            self.engine = InferenceEngine(
+                getattr(backend, predict_method),
+                max_batch_size=config.BATCH_MAX_SIZE,
+                max_wait_ms=config.BATCH_WINDOW_MS,
+                collate=list if config.SERVER_GRAPH_DECODE else np.stack,
+            )
+            stage_metrics.register_gauges("engine", self.engine.stats)
+            if isinstance(backend, CascadeBackend):
+                stage_metrics.register_gauges("cascade", backend.stats)
+            self.register_precision(backend)
+
+            store = open_store()
+            if store is not None and not config.MODEL_VERSION and config.MODEL_RELOAD_INTERVAL:
+                ModelReloader(
+                    store,
+                    self.engine,
+                    backend.name,
+                    backend.version,
+                    interval=config.MODEL_RELOAD_INTERVAL,
+                    on_swap=self.on_swap,
+                    predict_method=predict_method,
+                )
+        except Exception as e:
+            self.load_error = str(e)
+            raise
+
+    def load_pool(self):
+        # Model dimuat oleh worker, bukan proses ini; engine diganti pool yang menerima
+        # bytes gambar dan mengerjakan decode + predict di proses worker
+        pool = WorkerPool(self.backend_name, self.pool_workers, heartbeat_timeout=config.POOL_HEARTBEAT_TIMEOUT)
+        stage_metrics.register_gauges("pool", pool.stats)
+        pool.wait_ready()
+        self.model_version = model_version(pool.artifact_path)
+        self.engine = pool
+
+    def on_swap(self, backend):
+        self.model_version = model_version(backend.artifact_path)
+        if isinstance(backend, CascadeBackend):
+            stage_metrics.register_gauges("cascade", backend.stats)
+        self.register_precision(backend)
+
+    def register_precision(self, backend):
+        if hasattr(backend, "precision_report"):
+            self.precision = backend.precision_report["precision"]
+            stage_metrics.register_gauges("precision", lambda: backend.precision_report)
+
+    async def wait_result(self, future):
+        # Future engine/pool tidak pernah ditunggu tanpa batas; TimeoutError -> 504
+        return await asyncio.wait_for(asyncio.wrap_future(future), timeout=config.SERVER_INFERENCE_TIMEOUT)
+
+    async def classify(self, data):
+        if self.pool_workers:
+            with stage_metrics.timer("pool", "server"):
+                probabilities = await self.wait_result(self.engine.submit(data))
+            return to_result(probabilities)
+
+        if config.SERVER_GRAPH_DECODE:
+            # Hanya header yang dibaca agar file non-gambar ditolak sebelum masuk batch;
+            # decode + resize penuh (tanpa DCT scaling) terjadi di dalam graph
+            check_decode_budget(open_image(io.BytesIO(data)))
+            with stage_metrics.timer("predict", "server"):
+                probabilities = await self.wait_result(self.engine.submit(data))
+            return to_result(probabilities)
+
+        loop = asyncio.get_running_loop()
+        with stage_metrics.timer("preprocess", "server"):
+            img_array = await loop.run_in_executor(self.executor, preprocess_image_uint8, io.BytesIO(data))
+        with stage_metrics.timer("predict", "server"):
+            probabilities = await self.wait_result(self.engine.submit(img_array))
+        return to_result(probabilities)
+
+
+# --- Handlers ---
+class BaseHandler(tornado.web.RequestHandler):
+    def write_json(self, payload, status=200):
+        self.set_status(status)
+        self.set_header("Content-Type", "application/json")
+        self.finish(json.dumps(payload))
+
+    def write_error(self, status_code, **kwargs):
+        self.write_json({"error": self._reason}, status=status_code)
+
+    def image_payloads(self):
+        # multipart/form-data (field apa pun) atau body mentah berisi satu gambar
+        files = [f["body"] for field in self.request.files.values() for f in field]
+        if not files and self.request.body:
+            files = [self.request.body]
+        return files
+
+    async def classify_all(self, payloads):
+        if not self.application.ready:
+            raise tornado.web.HTTPError(503, reason="Model belum siap")
+        if not payloads:
+            raise tornado.web.HTTPError(400, reason="Tidak ada gambar pada request")
+        try:
+            return await asyncio.gather(*(self.application.classify(data) for data in payloads))
+        except ImageRejected as e:
+            raise tornado.web.HTTPError(413, reason=f"Gambar ditolak: {e}")
+        except (OSError, ValueError) as e:
+            # PIL menaikkan OSError/ValueError untuk file yang bukan gambar valid
+            raise tornado.web.HTTPError(400, reason=f"Gambar tidak valid: {e}")
+        except asyncio.TimeoutError:
+            raise tornado.web.HTTPError(504, reason="Inferensi melewati batas waktu")
+        except RuntimeError as e:
+            # Worker pool: worker mati/di-restart saat memproses gambar
+            raise tornado.web.HTTPError(503, reason=str(e))
+
+
+class HealthHandler(BaseHandler):
+    def get(self):
+        self.write_json({"status": "ok"})
+
+
+class ReadyHandler(BaseHandler):
+    def get(self):
+        app = self.application
+        if app.ready:
+            self.write_json({"status": "ready", "backend": app.backend_name, "model_version": app.model_version, "precision": app.precision})
+        else:
+            self.write_json({"status": "loading", "error": app.load_error}, status=503)
+
+
+class MetricsHandler(BaseHandler):
+    def get(self):
+        self.set_header("Content-Type", "text/plain; version=0.0.4")
+        self.finish(stage_metrics.prometheus_text())
+
+
+class ClassifyHandler(BaseHandler):
+    async def post(self):
+        payloads = self.image_payloads()
+        if len(payloads) > 1:
+            raise tornado.web.HTTPError(400, reason="Gunakan /v1/classify/batch untuk lebih dari satu gambar")
+        results = await self.classify_all(payloads)
+        self.write_json(results[0])
+
+
+class BatchClassifyHandler(BaseHandler):
+    async def post(self):
+        payloads = self.image_payloads()
+        if len(payloads) > config.SERVER_MAX_IMAGES:
+            raise tornado.web.HTTPError(413, reason=f"Maksimum {config.SERVER_MAX_IMAGES} gambar per request")
+        results = await self.classify_all(payloads)
+        self.write_json({"results": results})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Server HTTP inferensi EcoSort AI.")
+    parser.add_argument("--port", type=int, default=config.SERVER_PORT)
+    parser.add_argument("--backend", default=config.BACKEND)
+    parser.add_argument("--preprocess-workers", type=int, default=config.SERVER_PREPROCESS_WORKERS)
+    parser.add_argument("--pool-workers", type=int, default=config.POOL_WORKERS, help="Jumlah proses worker; 0 = satu proses")
+    parser.add_argument("--pool-backend", default=config.POOL_BACKEND)
+    args = parser.parse_args()
+
+    if args.pool_workers:
+        app = InferenceApplication(args.pool_backend, args.preprocess_workers, pool_workers=args.pool_workers)
+    else:
+        app = InferenceApplication(args.backend, args.preprocess_workers)
+    app.listen(args.port, max_body_size=config.SERVER_MAX_BODY_MB * 1024 * 1024)
+    loop = tornado.ioloop.IOLoop.current()
+    loop.run_in_executor(None, app.load)
+    print(f"EcoSort inference server di port {args.port}")
+    loop.start()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+import glob
+import os
+
+import pytest
+
+from classify import iter_glob
+
+FILES = [
+    "x.jpg",
+    ".tersembunyi.jpg",
+    "a/y.jpg",
+    "a/b/z.jpg",
+    "a/b/[x].jpg",
+    "c/w.png",
+    ".hd/q.jpg",
+]
+PATTERNS = [
+    "*.jpg",
+    "**/*.jpg",
+    "**",
+    "**/*",
+    "a/*/z.jpg",
+    "*/b/*.jpg",
+    "a/**/*.jpg",
+    ".*",
+    "*/",
+    "a/b/[[]x].jpg",
+    "x.jpg",
+    "tidak-ada/*.jpg",
+]
+
+
+@pytest.fixture
+def tree(tmp_path, monkeypatch):
+    for name in FILES:
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.touch()
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.mark.parametrize("pattern", PATTERNS)
+def test_iter_glob_matches_stdlib(tree, pattern):
+    assert sorted(iter_glob(pattern)) == sorted(glob.glob(pattern, recursive=True))
+
+
+@pytest.mark.parametrize("pattern", ["**/*.jpg", "a/**/*.jpg"])
+def test_iter_glob_absolute_pattern(tree, pattern):
+    pattern = os.path.join(str(tree), pattern)
+    assert sorted(iter_glob(pattern)) == sorted(glob.glob(pattern, recursive=True))
+
+
+def test_iter_glob_sorted_per_directory(tree):
+    # Isi direktori induk lebih dulu, lalu subdirektori berurutan
+    assert list(iter_glob("**/*.jpg")) == ["x.jpg", os.path.join("a", "y.jpg"), os.path.join("a", "b", "[x].jpg"), os.path.join("a", "b", "z.jpg")]
+
+
+def test_iter_glob_is_lazy(tree):
+    paths = iter_glob("**/*.jpg")
+    assert next(paths) == "x.jpg"
@@ -0,0 +1,285 @@
+import io
+import itertools
+import multiprocessing
+import multiprocessing.connection
+import os
+import pickle
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+from preprocessing import ImageRejected
+
+
+# --- Pre-fork Worker Pool ---
+# Worker di-fork dari proses forkserver yang sudah meng-import numpy, PIL, dan TensorFlow
+# (tanpa menginisialisasi runtime), sehingga halaman kode dan heap library berbagi secara
+# copy-on-write. Fork setelah runtime TensorFlow berjalan membuat worker hang, jadi model
+# tidak dimuat di induk: bobot dibagi lewat file TFLite yang di-mmap read-only (page cache
+# yang sama untuk semua worker). Setiap worker mengerjakan decode + resize + predict,
+# sehingga pre/post-processing memakai semua core.
+PRELOAD_MODULES = ["numpy", "PIL.Image", "tensorflow", "preprocessing", "backends", "model_loader"]
+# Jenis error dari worker -> exception yang diterima pemanggil submit()
+ERROR_TYPES = {"rejected": ImageRejected, "invalid": ValueError}
+
+
+def _worker_main(index, backend_name, jobs, results):
+    from model_loader import load_backend
+    from preprocessing import preprocess_image_uint8
+
+    try:
+        backend = load_backend(backend_name)
+    except Exception as e:
+        results.send(("load_error", index, f"{type(e).__name__}: {e}", None))
+        return
+    results.send(("ready", index, os.getpid(), backend.artifact_path))
+    while True:
+        # Antrean job milik worker ini saja; induk hanya mengirim job saat worker idle
+        job = jobs.get()
+        if job is None:
+            return
+        job_id, data = job
+        try:
+            img_array = preprocess_image_uint8(io.BytesIO(data))
+            probabilities = backend.predict_uint8(img_array[np.newaxis])[0]
+            results.send(("result", index, job_id, probabilities, None))
+        except ImageRejected as e:
+            results.send(("result", index, job_id, None, ("rejected", str(e))))
+        except (OSError, ValueError) as e:
+            # PIL menaikkan OSError/ValueError untuk file yang bukan gambar valid
+            results.send(("result", index, job_id, None, ("invalid", str(e))))
+        except Exception as e:
+            results.send(("result", index, job_id, None, ("error", f"{type(e).__name__}: {e}")))
+
+
+class WorkerPool:
+    def __init__(self, backend_name, workers, heartbeat_timeout=60.0):
+        if workers < 1:
+            raise ValueError("workers harus >= 1")
+        self.backend_name = backend_name
+        self.workers = workers
+        self.heartbeat_timeout = heartbeat_timeout
+        self.artifact_path = None
+        self.load_error = None
+
+        self._ctx = multiprocessing.get_context("forkserver")
+        self._ctx.set_forkserver_preload(PRELOAD_MODULES)
+        # Job menunggu di antrean induk; setiap worker punya antrean sendiri berisi paling
+        # banyak satu job, sehingga induk selalu tahu job mana yang dipegang worker mana
+        self._backlog = queue.Queue()
+        self._job_queues = [self._ctx.Queue() for _ in range(workers)]
+        # Hasil lewat pipe per worker: worker yang dibunuh saat menulis hanya merusak pipe-nya
+        # sendiri, bukan jalur hasil worker lain. Ujung baca -> index worker
+        self._results = {}
+
+        self._ids = itertools.count()
+        self._pending = {}
+        self._pids = {}
+        self._idle = set()
+        # index worker -> (job_id, waktu kirim time.monotonic)
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self._idle_changed = threading.Condition(self._lock)
+        self._ready = threading.Event()
+        self._settled = threading.Event()
+        self._counters = {"completed": 0, "failed": 0, "restarts": 0}
+        self._closed = False
+
+        self._processes = [self._start(i) for i in range(workers)]
+        threading.Thread(target=self._schedule, name="pool-schedule", daemon=True).start()
+        threading.Thread(target=self._dispatch, name="pool-dispatch", daemon=True).start()
+        threading.Thread(target=self._monitor, name="pool-monitor", daemon=True).start()
+
+    @property
+    def ready(self):
+        return self._ready.is_set()
+
+    def wait_ready(self, timeout=None):
+        self._settled.wait(timeout)
+        if not self.ready and self.load_error:
+            raise RuntimeError(f"Worker gagal memuat model: {self.load_error}")
+        return self.ready
+
+    def submit(self, data):
+        # data: bytes gambar terenkode; Future berisi probabilitas (num_classes,)
+        if self._closed:
+            raise RuntimeError("WorkerPool sudah ditutup")
+        future = Future()
+        job_id = next(self._ids)
+        with self._lock:
+            self._pending[job_id] = future
+        self._backlog.put((job_id, data))
+        return future
+
+    def stats(self):
+        with self._lock:
+            stats = dict(
+                self._counters,
+                pending=len(self._pending),
+                in_flight=len(self._in_flight),
+                ready_workers=len(self._pids),
+            )
+            pids = dict(self._pids)
+        stats["workers"] = self.workers
+        stats["alive"] = sum(process.is_alive() for process in self._processes)
+        memory = [process_memory(pid) for pid in pids.values()]
+        memory = [row for row in memory if row]
+        if memory:
+            stats["rss_per_worker_mb"] = sum(row["rss_mb"] for row in memory) / len(memory)
+            stats["pss_per_worker_mb"] = sum(row["pss_mb"] for row in memory) / len(memory)
+            stats["private_per_worker_mb"] = sum(row["private_mb"] for row in memory) / len(memory)
+        return stats
+
+    def close(self, timeout=10.0):
+        with self._lock:
+            self._closed = True
+            self._idle_changed.notify_all()
+        self._backlog.put(None)
+        for jobs in self._job_queues:
+            jobs.put(None)
+        deadline = time.time() + timeout
+        for process in self._processes:
+            process.join(max(0.0, deadline - time.time()))
+            if process.is_alive():
+                process.kill()
+                process.join()
+
+    def _start(self, index):
+        reader, writer = self._ctx.Pipe(duplex=False)
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(index, self.backend_name, self._job_queues[index], writer),
+            name=f"pool-worker-{index}",
+            daemon=True,
+        )
+        process.start()
+        # Hanya worker yang memegang ujung tulis, sehingga pipe EOF saat worker mati
+        writer.close()
+        with self._lock:
+            self._results[reader] = index
+        return process
+
+    def _schedule(self):
+        # Kirim job ke worker idle; penugasan dicatat sebelum job keluar dari induk
+        while True:
+            job = self._backlog.get()
+            if job is None:
+                return
+            job_id, _ = job
+            with self._lock:
+                future = self._pending.get(job_id)
+                # Lewati job yang sudah dibatalkan pemanggil (mis. timeout server)
+                if future is None or not future.set_running_or_notify_cancel():
+                    self._pending.pop(job_id, None)
+                    continue
+                while not self._idle and not self._closed:
+                    self._idle_changed.wait()
+                if self._closed:
+                    self._pending.pop(job_id, None)
+                    future.set_exception(RuntimeError("WorkerPool sudah ditutup"))
+                    continue
+                index = self._idle.pop()
+                self._in_flight[index] = (job_id, time.monotonic())
+                self._job_queues[index].put(job)
+
+    def _dispatch(self):
+        while True:
+            with self._lock:
+                readers = list(self._results)
+            # Timeout agar pipe worker yang baru di-restart ikut ditunggu
+            for reader in multiprocessing.connection.wait(readers, timeout=0.5):
+                try:
+                    message = reader.recv()
+                except (EOFError, OSError, pickle.UnpicklingError):
+                    # Worker mati (mungkin di tengah menulis); job-nya digagalkan _monitor
+                    with self._lock:
+                        self._results.pop(reader, None)
+                    reader.close()
+                    continue
+                self._handle(message)
+
+    def _handle(self, message):
+        if message[0] == "ready":
+            _, index, pid, artifact_path = message
+            with self._lock:
+                self._pids[index] = pid
+                self._idle.add(index)
+                self._idle_changed.notify()
+            self.artifact_path = artifact_path
+            self._ready.set()
+            self._settled.set()
+            return
+        if message[0] == "load_error":
+            self.load_error = message[2]
+            self._settled.set()
+            return
+        _, index, job_id, value, error = message
+        with self._lock:
+            if self._in_flight.get(index, (None,))[0] == job_id:
+                del self._in_flight[index]
+                self._idle.add(index)
+                self._idle_changed.notify()
+            future = self._pending.pop(job_id, None)
+            if future is not None:
+                self._counters["failed" if error else "completed"] += 1
+        if future is None:
+            # Sudah digagalkan _monitor saat worker-nya di-restart
+            return
+        if error is None:
+            future.set_result(value)
+        else:
+            error_kind, message = error
+            future.set_exception(ERROR_TYPES.get(error_kind, RuntimeError)(message))
+
+    def _monitor(self):
+        # Worker yang mati (crash/OOM) atau memegang satu job lebih lama dari
+        # heartbeat_timeout di-restart; job yang tercatat dipegangnya digagalkan
+        while not self._closed:
+            time.sleep(1.0)
+            for index, process in enumerate(self._processes):
+                with self._lock:
+                    assigned = self._in_flight.get(index)
+                stuck = assigned is not None and time.monotonic() - assigned[1] > self.heartbeat_timeout
+                if self._closed or (process.is_alive() and not stuck):
+                    continue
+                if self.load_error and not self.ready:
+                    # Model memang tidak bisa dimuat; jangan restart berulang-ulang
+                    continue
+                if process.is_alive():
+                    process.kill()
+                process.join()
+                with self._lock:
+                    self._pids.pop(index, None)
+                    self._idle.discard(index)
+                    assigned = self._in_flight.pop(index, None)
+                    future = self._pending.pop(assigned[0], None) if assigned else None
+                    self._counters["restarts"] += 1
+                    if future is not None:
+                        self._counters["failed"] += 1
+                    # Worker yang dibunuh bisa mati sambil memegang lock antrean; pakai
+                    # antrean baru agar pengganti tidak ikut macet (pipe hasil dibuat di _start)
+                    self._job_queues[index] = self._ctx.Queue()
+                if future is not None:
+                    future.set_exception(RuntimeError(f"Worker {index} berhenti saat memproses gambar"))
+                self._processes[index] = self._start(index)
+
+
+def process_memory(pid):
+    # Linux: PSS membagi halaman bersama (bobot mmap, library) secara adil antar proses
+    values = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", encoding="utf-8") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[1].isdigit():
+                    values[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    except OSError:
+        return None
+    return {
+        "rss_mb": values.get("Rss", 0.0),
+        "pss_mb": values.get("Pss", 0.0),
+        "private_mb": values.get("Private_Clean", 0.0) + values.get("Private_Dirty", 0.0),
+    }